@@ -0,0 +1,181 @@
+import argparse
+import asyncio
+import json
+import resource
+import subprocess
+import sys
+import threading
+import time
+
+from client.async_irc_client import AsyncIRCClient
+from client.irc_client import IRCClient
+from data_transfer.user import User
+from testing.fake_irc_server import FakeIRCServer
+
+CONNECTIONS_COUNTS = (10, 100, 1000)
+CHANNEL_SIZE = 10
+ENGINES = ('threaded', 'async')
+IDLE_SECONDS = 2.0
+MESSAGES_PER_CONNECTION = 10
+
+
+def read_rss_kilobytes():
+    with open('/proc/self/status') as status_file:
+        for line in status_file:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return 0
+
+
+def read_context_switches():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_nvcsw + usage.ru_nivcsw
+
+
+def raise_open_files_limit():
+    soft_limit, hard_limit = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft_limit < hard_limit:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard_limit, hard_limit))
+
+
+def wait_until(predicate, timeout):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise TimeoutError
+        time.sleep(0.01)
+
+
+def channel_name(client_index):
+    return "#bench{}".format(client_index // CHANNEL_SIZE)
+
+
+def run_threaded(server_address, connections_count):
+    registered = []
+    lock = threading.Lock()
+    clients = []
+    for index in range(connections_count):
+        client = IRCClient()
+        client.set_user(User("bench{}".format(index)))
+
+        def on_connected():
+            with lock:
+                registered.append(True)
+        client.on_connected_to_server = on_connected
+        client.connect_to_server(*server_address)
+        clients.append(client)
+    wait_until(lambda: len(registered) == connections_count, 60)
+    for index, client in enumerate(clients):
+        client.connect_to_channel(channel_name(index))
+
+    time.sleep(IDLE_SECONDS)
+    for client in clients:
+        for index in range(MESSAGES_PER_CONNECTION):
+            client.send_user_message("message {}".format(index))
+    time.sleep(IDLE_SECONDS)
+
+    sample = read_rss_kilobytes(), threading.active_count()
+    for client in clients:
+        client.close()
+    return sample
+
+
+async def run_async_clients(server_address, connections_count):
+    clients = []
+    for index in range(connections_count):
+        client = AsyncIRCClient()
+        client.set_user(User("bench{}".format(index)))
+        clients.append(client)
+    await asyncio.gather(*(client.connect_to_server(*server_address)
+                           for client in clients))
+    for index, client in enumerate(clients):
+        client.connect_to_channel(channel_name(index))
+
+    await asyncio.sleep(IDLE_SECONDS)
+    for client in clients:
+        for index in range(MESSAGES_PER_CONNECTION):
+            client.send_user_message("message {}".format(index))
+    await asyncio.sleep(IDLE_SECONDS)
+
+    sample = read_rss_kilobytes(), threading.active_count()
+    await asyncio.gather(*(client.close() for client in clients))
+    return sample
+
+
+def run_async(server_address, connections_count):
+    return asyncio.run(run_async_clients(server_address, connections_count))
+
+
+def measure(engine, server_address, connections_count):
+    raise_open_files_limit()
+    rss_before = read_rss_kilobytes()
+    switches_before = read_context_switches()
+    cpu_before = time.process_time()
+    runner = run_threaded if engine == 'threaded' else run_async
+    rss_peak, threads_count = runner(server_address, connections_count)
+    return {
+        'engine': engine,
+        'connections': connections_count,
+        'rss_kilobytes': rss_peak - rss_before,
+        'context_switches': read_context_switches() - switches_before,
+        'cpu_seconds': round(time.process_time() - cpu_before, 3),
+        'threads': threads_count
+    }
+
+
+def measure_in_subprocess(engine, server_address, connections_count):
+    output = subprocess.check_output(
+        [sys.executable, '-m', 'benchmarks.bench_connections',
+         '--child', engine, str(connections_count),
+         '--server', '{0}:{1}'.format(*server_address)])
+    return json.loads(output.decode().splitlines()[-1])
+
+
+def print_results(results):
+    print("{0:<9} {1:>11} {2:>10} {3:>17} {4:>8} {5:>8}".format(
+        'engine', 'connections', 'rss KiB', 'context switches',
+        'cpu s', 'threads'))
+    for result in results:
+        print("{engine:<9} {connections:>11} {rss_kilobytes:>10} "
+              "{context_switches:>17} {cpu_seconds:>8} {threads:>8}"
+              .format(**result))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare threaded and asyncio IRC connection engines.")
+    parser.add_argument('--counts', type=int, nargs='+',
+                        default=CONNECTIONS_COUNTS)
+    parser.add_argument('--engines', nargs='+', default=ENGINES,
+                        choices=ENGINES)
+    parser.add_argument('--json', help="write results to this file")
+    parser.add_argument('--child', nargs=2, help=argparse.SUPPRESS)
+    parser.add_argument('--server', help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+
+    if arguments.child is not None:
+        host, port = arguments.server.rsplit(':', 1)
+        engine, connections_count = arguments.child
+        result = measure(engine, (host, int(port)), int(connections_count))
+        print(json.dumps(result))
+        return
+
+    raise_open_files_limit()
+    server = FakeIRCServer().start()
+    results = []
+    try:
+        for connections_count in arguments.counts:
+            for engine in arguments.engines:
+                results.append(measure_in_subprocess(engine, server.address,
+                                                     connections_count))
+    finally:
+        server.stop()
+
+    print_results(results)
+    if arguments.json is not None:
+        with open(arguments.json, 'w') as results_file:
+            json.dump(results, results_file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+import argparse
+import os
+import tempfile
+import time
+
+from client.dcc_transfer import DccOffer, DccReceiver, DccSender
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure DCC throughput and CPU time on loopback.")
+    parser.add_argument('--megabytes', type=int, default=512)
+    parser.add_argument('--transfers', type=int, default=2)
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        source_path = os.path.join(directory, "source.bin")
+        size = arguments.megabytes * 1024 * 1024
+        with open(source_path, 'wb') as source_file:
+            chunk = os.urandom(1024 * 1024)
+            for _ in range(arguments.megabytes):
+                source_file.write(chunk)
+
+        started_at = time.perf_counter()
+        cpu_started_at = time.process_time()
+        transfers = []
+        for index in range(arguments.transfers):
+            sender = DccSender(source_path, "peer", host='127.0.0.1').start()
+            offer = DccOffer("me", "source.bin", '127.0.0.1', sender.port,
+                             size)
+            receiver = DccReceiver(offer, os.path.join(
+                directory, "received{0}.bin".format(index))).start()
+            transfers += [sender, receiver]
+        for transfer in transfers:
+            transfer.wait()
+        elapsed = time.perf_counter() - started_at
+        cpu_seconds = time.process_time() - cpu_started_at
+
+    failed = [transfer.error for transfer in transfers if transfer.error]
+    total_megabytes = arguments.megabytes * arguments.transfers
+    print("{0} transfers of {1} MiB: {2:.0f} MiB/s, CPU {3:.2f} s for "
+          "{4:.2f} s wall{5}".format(
+              arguments.transfers, arguments.megabytes,
+              total_megabytes / elapsed, cpu_seconds, elapsed,
+              ", failed: {0}".format(failed) if failed else ""))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+import argparse
+import random
+import time
+import tracemalloc
+
+from storage.channel_directory import ChannelDirectory
+
+WORDS = ("python", "rust", "linux", "gaming", "music", "help", "dev", "chat",
+         "news", "anime", "crypto", "science", "books", "movies", "ops")
+
+
+class DictChannelRecord:
+
+    def __init__(self, name, users_count, full_name):
+        self.name = name
+        self.users_count = users_count
+        self.full_name = full_name
+
+
+def generate_channels(channels_count, seed=1):
+    random_source = random.Random(seed)
+    for index in range(channels_count):
+        words = random_source.sample(WORDS, 3)
+        yield ("#{0}-{1}".format(words[0], index),
+               str(int(random_source.paretovariate(1.2))),
+               "[+nt] Welcome to {0} and {1} | {2}".format(*words))
+
+
+def measure_memory(build):
+    tracemalloc.start()
+    try:
+        started = tracemalloc.get_traced_memory()[0]
+        store = build()
+        return store, tracemalloc.get_traced_memory()[0] - started
+    finally:
+        tracemalloc.stop()
+
+
+def build_dict_records(channels):
+    return {name.lower(): DictChannelRecord(name, users_count, topic)
+            for name, users_count, topic in channels}
+
+
+def build_directory(channels):
+    directory = ChannelDirectory("bench.net")
+    directory.begin_refresh()
+    for name, users_count, topic in channels:
+        directory.add_row(name, int(users_count), topic)
+    directory.finish_refresh()
+    return directory
+
+
+def time_milliseconds(action, repeat):
+    started_at = time.perf_counter()
+    for _ in range(repeat):
+        action()
+    return (time.perf_counter() - started_at) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare memory and filtering speed of the columnar "
+                    "channel directory with per-channel dict records.")
+    parser.add_argument('--channels', type=int, default=60000)
+    parser.add_argument('--repeat', type=int, default=20)
+    arguments = parser.parse_args()
+
+    records, records_bytes = measure_memory(
+        lambda: build_dict_records(generate_channels(arguments.channels)))
+    del records
+    directory, directory_bytes = measure_memory(
+        lambda: build_directory(generate_channels(arguments.channels)))
+
+    print("{0} channels".format(arguments.channels))
+    print("memory KiB   dict records {0:.0f}  columnar {1:.0f}  "
+          "({2:.1f}x less)".format(records_bytes / 1024,
+                                   directory_bytes / 1024,
+                                   records_bytes / directory_bytes))
+    directory.filter(limit=1)
+    cases = (
+        ('top 50', lambda: directory.top(50)),
+        ('users 10..100', lambda: directory.filter(min_users=10,
+                                                   max_users=100)),
+        ('users >= 50 top 100', lambda: directory.filter(min_users=50,
+                                                         limit=100)),
+        ('name part', lambda: directory.filter(name_part='rust')),
+        ('name part top 20', lambda: directory.filter(name_part='rust',
+                                                      limit=20)),
+        ('sorted by name', lambda: directory.filter(sort_by='name',
+                                                    descending=False))
+    )
+    for case_name, action in cases:
+        print("{0:<22} {1:>8.3f} ms".format(
+            case_name, time_milliseconds(action, arguments.repeat)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,270 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from client.irc_client import IRCClient
+from client.irc_socket import IRCSocket
+from data_transfer.user import User
+from testing import traffic_generator
+
+TARGETS = ('socket', 'client')
+COMPARED_METRICS = {
+    'lines_per_second': 1,
+    'bytes_per_second': 1,
+    'latency_p99_ms': -1,
+    'cpu_seconds': -1,
+    'peak_rss_kilobytes': -1
+}
+REPLAY_TIMEOUT = 300
+
+
+class DeliveryRecorder:
+
+    def __init__(self):
+        self.deliveries_count = 0
+        self.started_at = None
+        self.last_delivery_at = None
+        self.latencies = []
+        self.finished = threading.Event()
+        self.is_drained = True
+        self.__lock = threading.Lock()
+
+    def start(self):
+        self.started_at = time.monotonic_ns()
+
+    def record(self, text):
+        timestamp_start = text.find("ts=")
+        with self.__lock:
+            now = time.monotonic_ns()
+            self.last_delivery_at = now
+            self.deliveries_count += 1
+            if timestamp_start != -1:
+                timestamp_end = text.find(' ', timestamp_start)
+                self.latencies.append(
+                    now - int(text[timestamp_start + 3:timestamp_end]))
+        if text.endswith(traffic_generator.END_OF_REPLAY):
+            self.finished.set()
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * fraction))
+    return sorted_values[index]
+
+
+def run_socket_target(address, recorder):
+    irc_socket = IRCSocket()
+    irc_socket.output_receiver = recorder.record
+    irc_socket.set_server_data(*address)
+    irc_socket.connect_to_server()
+    recorder.start()
+    irc_socket.send_user_data(User("bench"))
+    recorder.finished.wait(REPLAY_TIMEOUT)
+    irc_socket.disconnect()
+
+
+def run_client_target(address, recorder):
+    client = IRCClient()
+    client.set_user(User("bench"))
+    client.chat_transmitter.connect_receiver(
+        lambda message: recorder.record(message.trailing))
+    client.channel_data_handler.connect_receiver(
+        lambda channel_info: recorder.record(channel_info.full_name))
+    client.channel_names_transmitter.connect_receiver(
+        lambda message: recorder.record(message.trailing))
+
+    def on_connected():
+        client.connect_to_channel(traffic_generator.BENCH_CHANNEL)
+        client.is_searching_for_channels = True
+        client.is_searching_for_names = True
+    client.on_connected_to_server = on_connected
+    recorder.start()
+    client.connect_to_server(*address)
+    recorder.finished.wait(REPLAY_TIMEOUT)
+    recorder.is_drained = client.event_bus.flush(REPLAY_TIMEOUT)
+    client.close()
+
+
+def measure(target, address):
+    recorder = DeliveryRecorder()
+    cpu_before = time.process_time()
+    runner = run_socket_target if target == 'socket' else run_client_target
+    runner(address, recorder)
+    latencies = sorted(recorder.latencies)
+    duration = 0
+    if recorder.last_delivery_at is not None:
+        duration = (recorder.last_delivery_at - recorder.started_at) / 1e9
+    return {
+        'finished': recorder.finished.is_set() and recorder.is_drained,
+        'deliveries': recorder.deliveries_count,
+        'duration_seconds': duration,
+        'latency_p50_ms': to_milliseconds(percentile(latencies, 0.5)),
+        'latency_p90_ms': to_milliseconds(percentile(latencies, 0.9)),
+        'latency_p99_ms': to_milliseconds(percentile(latencies, 0.99)),
+        'latency_max_ms': to_milliseconds(latencies[-1]
+                                          if latencies else None),
+        'cpu_seconds': round(time.process_time() - cpu_before, 3),
+        'peak_rss_kilobytes': resource.getrusage(
+            resource.RUSAGE_SELF).ru_maxrss
+    }
+
+
+def to_milliseconds(nanoseconds):
+    if nanoseconds is None:
+        return None
+    return round(nanoseconds / 1e6, 3)
+
+
+def start_server(traffic_path, rate):
+    command = [sys.executable, '-m', 'testing.fake_irc_server',
+               '--port', '0', '--replay', traffic_path]
+    if rate is not None:
+        command += ['--rate', str(rate)]
+    server_process = subprocess.Popen(command, stdout=subprocess.PIPE)
+    host, port = server_process.stdout.readline().decode().strip() \
+        .rsplit(':', 1)
+    return server_process, (host, int(port))
+
+
+def run_scenario(scenario, targets, rate, directory):
+    lines = list(traffic_generator.SCENARIOS[scenario]())
+    lines.append(traffic_generator.end_of_replay_line())
+    traffic_path = os.path.join(directory, scenario + '.irc')
+    traffic_generator.write_traffic_file(traffic_path, lines)
+    traffic_bytes = os.path.getsize(traffic_path)
+
+    results = []
+    for target in targets:
+        server_process, address = start_server(traffic_path, rate)
+        result_path = os.path.join(directory, 'result.json')
+        try:
+            subprocess.check_call(
+                [sys.executable, '-m', 'benchmarks.bench_pipeline',
+                 '--child', target, '{0}:{1}'.format(*address), result_path],
+                stdout=subprocess.DEVNULL)
+        finally:
+            server_process.kill()
+            server_process.wait()
+        with open(result_path) as result_file:
+            result = json.load(result_file)
+        duration = result['duration_seconds'] or float('nan')
+        result.update({
+            'scenario': scenario,
+            'target': target,
+            'lines': len(lines),
+            'bytes': traffic_bytes,
+            'lines_per_second': round(len(lines) / duration, 1),
+            'bytes_per_second': round(traffic_bytes / duration, 1)
+        })
+        results.append(result)
+    return results
+
+
+def read_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'],
+                                       stderr=subprocess.DEVNULL) \
+            .decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old_report, new_report, threshold):
+    old_results = {(result['scenario'], result['target']): result
+                   for result in old_report['results']}
+    regressions = []
+    print("{0:<14} {1:<7} {2:<19} {3:>14} {4:>14} {5:>8}".format(
+        'scenario', 'target', 'metric', 'old', 'new', 'change'))
+    for result in new_report['results']:
+        old_result = old_results.get((result['scenario'], result['target']))
+        if old_result is None:
+            continue
+        for metric, direction in COMPARED_METRICS.items():
+            old_value, new_value = old_result.get(metric), result.get(metric)
+            if not old_value or new_value is None:
+                continue
+            change = (new_value - old_value) / old_value
+            is_regression = change * direction < -threshold
+            print("{0:<14} {1:<7} {2:<19} {3:>14} {4:>14} {5:>+7.1%}{6}"
+                  .format(result['scenario'], result['target'], metric,
+                          old_value, new_value, change,
+                          ' !' if is_regression else ''))
+            if is_regression:
+                regressions.append((result['scenario'], result['target'],
+                                    metric))
+    return regressions
+
+
+def print_results(results):
+    print("{0:<14} {1:<7} {2:>12} {3:>14} {4:>9} {5:>9} {6:>8} {7:>10}"
+          .format('scenario', 'target', 'lines/s', 'bytes/s', 'p50 ms',
+                  'p99 ms', 'cpu s', 'rss KiB'))
+    for result in results:
+        print("{scenario:<14} {target:<7} {lines_per_second:>12} "
+              "{bytes_per_second:>14} {p50:>9} {p99:>9} {cpu_seconds:>8} "
+              "{peak_rss_kilobytes:>10}".format(
+                  p50=str(result['latency_p50_ms']),
+                  p99=str(result['latency_p99_ms']), **result))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay recorded traffic through IRCSocket and "
+                    "IRCClient and report throughput and latency.")
+    parser.add_argument('--scenarios', nargs='+',
+                        default=list(traffic_generator.SCENARIOS),
+                        choices=list(traffic_generator.SCENARIOS))
+    parser.add_argument('--targets', nargs='+', default=TARGETS,
+                        choices=TARGETS)
+    parser.add_argument('--rate', type=float,
+                        help="replay rate in lines per second "
+                             "(as fast as possible by default)")
+    parser.add_argument('--output', help="write the JSON report here")
+    parser.add_argument('--compare', help="JSON report to compare with")
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help="relative change treated as a regression")
+    parser.add_argument('--child', nargs=3, help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+
+    if arguments.child is not None:
+        target, server, result_path = arguments.child
+        host, port = server.rsplit(':', 1)
+        with open(result_path, 'w') as result_file:
+            json.dump(measure(target, (host, int(port))), result_file)
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for scenario in arguments.scenarios:
+            results += run_scenario(scenario, arguments.targets,
+                                    arguments.rate, directory)
+    report = {
+        'commit': read_commit(),
+        'python': platform.python_version(),
+        'created_at': time.time(),
+        'rate': arguments.rate,
+        'results': results
+    }
+    print_results(results)
+
+    if arguments.output is not None:
+        with open(arguments.output, 'w') as report_file:
+            json.dump(report, report_file, indent=2)
+    if arguments.compare is not None:
+        with open(arguments.compare) as report_file:
+            regressions = compare(json.load(report_file), report,
+                                  arguments.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
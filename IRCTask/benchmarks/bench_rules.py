@@ -0,0 +1,87 @@
+import argparse
+import random
+import re
+import time
+
+from client.message_rules import MessageRules
+from data_transfer.irc_message import IRCMessage
+
+WORDS = ("python", "rust", "linux", "gaming", "music", "help", "dev", "chat",
+         "news", "anime", "crypto", "science", "books", "movies", "ops")
+
+
+class NaiveRules:
+
+    def __init__(self, highlights, keywords, ignores):
+        self.word_rules = [
+            (re.compile(r'(?<!\w)' + re.escape(word) + r'(?!\w)',
+                        re.IGNORECASE), route)
+            for word, route in [(word, None) for word in highlights] +
+            list(keywords)]
+        self.ignore_rules = [
+            re.compile(MessageRules.glob_pattern(mask.lower()) + r'\Z',
+                       re.IGNORECASE) for mask in ignores]
+
+    def apply(self, message):
+        mask = message.prefix.lower()
+        if any(rule.match(mask) for rule in self.ignore_rules):
+            return None
+        return [route for rule, route in self.word_rules
+                if rule.search(message.trailing)]
+
+
+def generate_rules(rules_count, random_source):
+    highlights = ["nick{0}".format(index) for index in range(rules_count)]
+    keywords = [("{0}{1}".format(random_source.choice(WORDS), index),
+                 random_source.choice(WORDS)) for index in range(rules_count)]
+    ignores = ["*!*@host{0}.example".format(index)
+               for index in range(rules_count // 2)] + \
+        ["spam{0}*!*@*".format(index) for index in range(rules_count // 2)]
+    return highlights, keywords, ignores
+
+
+def generate_messages(messages_count, rules_count, random_source):
+    messages = []
+    for index in range(messages_count):
+        text = ' '.join(random_source.choice(WORDS) for _ in range(12))
+        if index % 10 == 0:
+            text += " nick{0}".format(random_source.randrange(rules_count))
+        prefix = "user{0}!~u@host{1}.net".format(index, index % 97)
+        messages.append(IRCMessage("PRIVMSG", ["#bench", text], prefix))
+    return messages
+
+
+def lines_per_second(rules, messages):
+    started_at = time.perf_counter()
+    for message in messages:
+        rules.apply(message)
+    return len(messages) / (time.perf_counter() - started_at)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the compiled message rules with matching "
+                    "every rule separately.")
+    parser.add_argument('--rules', type=int, default=2000)
+    parser.add_argument('--messages', type=int, default=2000)
+    arguments = parser.parse_args()
+
+    random_source = random.Random(1)
+    rules_lists = generate_rules(arguments.rules, random_source)
+    messages = generate_messages(arguments.messages, arguments.rules,
+                                 random_source)
+
+    started_at = time.perf_counter()
+    compiled_rules = MessageRules(*rules_lists)
+    compile_seconds = time.perf_counter() - started_at
+    naive_rate = lines_per_second(NaiveRules(*rules_lists), messages)
+    compiled_rate = lines_per_second(compiled_rules, messages)
+
+    print("{0} rules, compiled in {1:.0f} ms".format(
+        compiled_rules.rules_count, compile_seconds * 1000))
+    print("lines/s   per-rule {0:.0f}  compiled {1:.0f}  ({2:.1f}x)".format(
+        naive_rate, compiled_rate, compiled_rate / naive_rate))
+
+
+if __name__ == '__main__':
+    main()
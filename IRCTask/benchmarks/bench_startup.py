@@ -0,0 +1,147 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+from testing.fake_irc_server import FakeIRCServer
+
+FRONT_END_MODULE = 'terminal.terminal_front_end'
+REGISTERED_MARK = b'REGISTERED AS'
+FORBIDDEN_MODULES_PREFIXES = ('PyQt5', 'asyncio')
+STARTUP_TIMEOUT = 10
+
+
+def read_rss_kilobytes(process_id):
+    try:
+        with open('/proc/{0}/status'.format(process_id)) as status_file:
+            for line in status_file:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def measure_startup(server_address):
+    started_at = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, 'terminal_main.py', server_address[0],
+         '--port', str(server_address[1]), '--nick', 'startup'],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    connected_seconds = None
+    rss_kilobytes = None
+    try:
+        deadline = started_at + STARTUP_TIMEOUT
+        for line in process.stdout:
+            if REGISTERED_MARK in line:
+                connected_seconds = time.perf_counter() - started_at
+                rss_kilobytes = read_rss_kilobytes(process.pid)
+                break
+            if time.perf_counter() > deadline:
+                break
+        process.stdin.write(b'/quit\n')
+        process.stdin.close()
+        process.wait(STARTUP_TIMEOUT)
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+    return connected_seconds, rss_kilobytes
+
+
+def measure_imports(statement):
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        stderr=subprocess.PIPE, check=True)
+    modules = []
+    for line in completed.stderr.decode().splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_time, cumulative_time, name = \
+            line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(self_time), int(cumulative_time)))
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure cold start to connected time, import time "
+                    "and RSS of the terminal front-end.")
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--top', type=int, default=10,
+                        help="slowest imports to print")
+    parser.add_argument('--max-startup-ms', type=float, default=100,
+                        help="median startup budget")
+    parser.add_argument('--max-rss-kilobytes', type=int, default=32768)
+    parser.add_argument('--output', help="write the JSON report here")
+    arguments = parser.parse_args()
+
+    server = FakeIRCServer().start()
+    try:
+        startups = [measure_startup(server.address)
+                    for _ in range(arguments.runs)]
+    finally:
+        server.stop()
+    if any(seconds is None for seconds, _ in startups):
+        print("front-end did not register within {0} s"
+              .format(STARTUP_TIMEOUT))
+        sys.exit(1)
+    startup_ms = sorted(seconds * 1000 for seconds, _ in startups)
+    rss_kilobytes = max(rss for _, rss in startups if rss is not None)
+
+    baseline_modules = measure_imports('pass')
+    modules = measure_imports('import ' + FRONT_END_MODULE)
+    baseline_names = {name for name, _, _ in baseline_modules}
+    added_modules = [module for module in modules
+                     if module[0] not in baseline_names]
+    forbidden_modules = [name for name, _, _ in modules
+                         if name.startswith(FORBIDDEN_MODULES_PREFIXES)]
+
+    report = {
+        'runs': arguments.runs,
+        'startup_ms_min': round(startup_ms[0], 2),
+        'startup_ms_median': round(statistics.median(startup_ms), 2),
+        'startup_ms_max': round(startup_ms[-1], 2),
+        'peak_rss_kilobytes': rss_kilobytes,
+        'interpreter_import_ms': round(
+            sum(self_time for _, self_time, _ in baseline_modules) / 1000, 2),
+        'front_end_import_ms': round(
+            sum(self_time for _, self_time, _ in added_modules) / 1000, 2),
+        'imported_modules': len(added_modules),
+        'forbidden_modules': forbidden_modules
+    }
+
+    print("startup ms   min {startup_ms_min}  median {startup_ms_median}  "
+          "max {startup_ms_max}".format(**report))
+    print("peak rss KiB {peak_rss_kilobytes}".format(**report))
+    print("import ms    interpreter {interpreter_import_ms}  front-end "
+          "{front_end_import_ms} ({imported_modules} modules)"
+          .format(**report))
+    print("{0:<40} {1:>10} {2:>12}".format('module', 'self us',
+                                           'cumulative us'))
+    for name, self_time, cumulative_time in sorted(
+            added_modules, key=lambda module: -module[1])[:arguments.top]:
+        print("{0:<40} {1:>10} {2:>12}".format(name, self_time,
+                                               cumulative_time))
+
+    if arguments.output is not None:
+        with open(arguments.output, 'w') as report_file:
+            json.dump(report, report_file, indent=2)
+    failures = []
+    if forbidden_modules:
+        failures.append("imports " + ', '.join(forbidden_modules))
+    if report['startup_ms_median'] > arguments.max_startup_ms:
+        failures.append("median startup over {0} ms"
+                        .format(arguments.max_startup_ms))
+    if rss_kilobytes > arguments.max_rss_kilobytes:
+        failures.append("rss over {0} KiB".format(arguments.max_rss_kilobytes))
+    if failures:
+        print("budget exceeded: " + '; '.join(failures))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
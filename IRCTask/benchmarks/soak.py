@@ -0,0 +1,43 @@
+import argparse
+import sys
+
+from testing.soak_harness import SoakBudget, SoakHarness
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run simulated hours of IRC traffic against a local fake "
+                    "server and fail on memory, thread or descriptor "
+                    "growth.")
+    parser.add_argument('--cycles', type=int, default=600,
+                        help="simulated minutes of traffic")
+    parser.add_argument('--channels', type=int, default=20)
+    parser.add_argument('--messages', type=int, default=200,
+                        help="flooded messages per cycle")
+    parser.add_argument('--list-every', type=int, default=10)
+    parser.add_argument('--reconnect-every', type=int, default=25,
+                        help="cycles between dropped connections")
+    parser.add_argument('--restart-every', type=int, default=60,
+                        help="cycles between full disconnects")
+    parser.add_argument('--memory-budget-kib', type=int, default=2048)
+    parser.add_argument('--threads-budget', type=int, default=0)
+    parser.add_argument('--fds-budget', type=int, default=0)
+    parser.add_argument('--top', type=int, default=10,
+                        help="allocation sites shown in the report")
+    arguments = parser.parse_args()
+
+    harness = SoakHarness(
+        arguments.cycles,
+        SoakBudget(arguments.memory_budget_kib * 1024,
+                   arguments.threads_budget, arguments.fds_budget),
+        arguments.channels, arguments.messages, arguments.list_every,
+        arguments.reconnect_every, arguments.restart_every,
+        top_count=arguments.top)
+    report = harness.run()
+    print(report.format())
+    if not report.is_within_budget():
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
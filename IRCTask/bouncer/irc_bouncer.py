@@ -0,0 +1,359 @@
+import asyncio
+import collections
+import random
+import time
+
+from client.async_irc_client import AsyncIRCClient
+from client.line_framer import LineFramer
+from data_transfer.irc_message import IRCMessage
+from data_transfer.scrollback import Scrollback
+
+
+class BouncerClient(AsyncIRCClient):
+
+    def __init__(self, network):
+        super().__init__()
+        self.network = network
+
+    def handle_irc_message(self, text):
+        super().handle_irc_message(text)
+        self.network.receive_line(text)
+
+
+class UpstreamNetwork:
+    BASE_RECONNECT_DELAY = 1
+    MAX_RECONNECT_DELAY = 300
+    FILTERED_COMMANDS = {"PING", "PONG", "CAP", "001", "002", "003", "004",
+                         "005", "251", "252", "253", "254", "255", "265",
+                         "266", "372", "375", "376", "422"}
+
+    def __init__(self, name, server_name, server_port, user, channels=(),
+                 scrollback_messages=500, scrollback_bytes=256 * 1024,
+                 max_scrollbacks=256):
+        self.name = name
+        self.server_name = server_name
+        self.server_port = server_port
+        self.initial_channels = list(channels)
+        self.scrollback_messages = scrollback_messages
+        self.scrollback_bytes = scrollback_bytes
+        self.max_scrollbacks = max_scrollbacks
+        self.downstream_clients = set()
+        self.scrollbacks = collections.OrderedDict()
+        self.client = BouncerClient(self)
+        self.client.set_user(user)
+        self.client.on_registered = self.__join_channels
+        self.__connection_lost = None
+        self.__is_stopped = False
+
+    @property
+    def nick(self):
+        return self.client.connection_data.user.username
+
+    async def run(self):
+        self.__connection_lost = asyncio.Event()
+        self.client.on_connection_lost = self.__connection_lost.set
+        attempt = 0
+        while not self.__is_stopped:
+            await self.client.connect_to_server(self.server_name,
+                                                self.server_port)
+            if self.client.is_connected():
+                attempt = 0
+                await self.__connection_lost.wait()
+                self.__connection_lost.clear()
+            if self.__is_stopped:
+                break
+            delay = min(UpstreamNetwork.MAX_RECONNECT_DELAY,
+                        UpstreamNetwork.BASE_RECONNECT_DELAY * 2 ** attempt)
+            attempt += 1
+            await asyncio.sleep(random.uniform(delay / 2, delay))
+
+    async def stop(self):
+        self.__is_stopped = True
+        if self.__connection_lost is not None:
+            self.__connection_lost.set()
+        await self.client.close()
+
+    def __join_channels(self):
+        channels_names = self.client.joined_channels() or \
+            self.initial_channels
+        if channels_names:
+            self.client.connect_to_channels(channels_names)
+
+    def receive_line(self, line):
+        if not line or line[0] not in ':@':
+            return
+        message = IRCMessage.parse(line)
+        if message.command in UpstreamNetwork.FILTERED_COMMANDS:
+            return
+        if message.command == "PRIVMSG":
+            self.remember_message(message)
+        for downstream_client in list(self.downstream_clients):
+            downstream_client.send_upstream_line(line, message)
+
+    def remember_message(self, message, nick=None):
+        mask = message.prefix if nick is None else nick
+        buffer_name = message.target
+        if not buffer_name.startswith(('#', '&', '+', '!')) and \
+                message.nick is not None:
+            buffer_name = message.nick
+        scrollback = self.get_scrollback(buffer_name)
+        scrollback.append(mask, message.trailing,
+                          message.server_time() or time.time())
+
+    def get_scrollback(self, buffer_name):
+        buffer_key = buffer_name.lower()
+        scrollback = self.scrollbacks.get(buffer_key)
+        if scrollback is None:
+            if len(self.scrollbacks) >= self.max_scrollbacks:
+                self.scrollbacks.popitem(last=False)
+            scrollback = Scrollback(self.scrollback_messages,
+                                    self.scrollback_bytes)
+            scrollback.name = buffer_name
+            self.scrollbacks[buffer_key] = scrollback
+        else:
+            self.scrollbacks.move_to_end(buffer_key)
+        return scrollback
+
+    def send_from_downstream(self, sender, line, message):
+        if message.command == "JOIN" and message.params:
+            self.client.connect_to_channels(message.params[0].split(','))
+            return
+        if message.command == "PART" and message.params:
+            for channel_name in message.params[0].split(','):
+                self.client.leave_channel(channel_name)
+            return
+        self.client.send_raw_message(line)
+        if message.command == "PRIVMSG" and len(message.params) > 1:
+            own_mask = "{0}!{0}@bouncer".format(self.nick)
+            echo = IRCMessage("PRIVMSG", message.params, own_mask)
+            self.remember_message(echo, own_mask)
+            echo_line = ":{0} PRIVMSG {1} :{2}".format(
+                own_mask, message.target, message.trailing)
+            for downstream_client in list(self.downstream_clients):
+                if downstream_client is not sender:
+                    downstream_client.send_upstream_line(echo_line, echo)
+
+
+class DownstreamClient:
+    CAPABILITIES = ("server-time", "message-tags", "batch")
+    TAGS_CAPABILITIES = frozenset(("server-time", "message-tags"))
+    MAX_WRITE_BUFFER_BYTES = 1024 * 1024
+    FEATURES_PER_LINE = 12
+    NAMES_LINE_LENGTH = 400
+
+    def __init__(self, bouncer, reader, writer):
+        self.bouncer = bouncer
+        self.reader = reader
+        self.writer = writer
+        self.network = None
+        self.nick = None
+        self.username = None
+        self.password = None
+        self.capabilities = set()
+        self.is_negotiating = False
+        self.is_registered = False
+        self.is_closed = False
+
+    def send_line(self, line):
+        if self.is_closed:
+            return
+        if self.writer.transport.get_write_buffer_size() > \
+                DownstreamClient.MAX_WRITE_BUFFER_BYTES:
+            self.close()
+            return
+        self.writer.write(bytes(line + '\r\n', "UTF-8"))
+
+    def send_numeric(self, numeric, *params):
+        self.send_line(":{0} {1} {2} {3}".format(
+            IRCBouncer.SERVER_NAME, numeric, self.nick or '*',
+            ' '.join(params)))
+
+    def send_upstream_line(self, line, message):
+        if message.command == "BATCH" and "batch" not in self.capabilities:
+            return
+        if line[0] == '@' and self.capabilities.isdisjoint(
+                DownstreamClient.TAGS_CAPABILITIES):
+            line = line.partition(' ')[2].lstrip(' ')
+        self.send_line(line)
+
+    def close(self):
+        if self.is_closed:
+            return
+        self.is_closed = True
+        if self.network is not None:
+            self.network.downstream_clients.discard(self)
+        self.writer.close()
+
+    def handle_line(self, line):
+        message = IRCMessage.parse(line)
+        if message.command == "CAP":
+            self.__handle_capabilities(message)
+        elif message.command == "PING":
+            self.send_line(":{0} PONG {0} :{1}".format(
+                IRCBouncer.SERVER_NAME, message.trailing))
+        elif message.command == "QUIT":
+            self.close()
+        elif not self.is_registered:
+            self.__handle_registration(message)
+        elif message.command not in ("PASS", "USER"):
+            self.network.send_from_downstream(self, line, message)
+
+    def __handle_capabilities(self, message):
+        subcommand = message.params[0].upper() if message.params else ''
+        if subcommand == "LS":
+            self.is_negotiating = True
+            self.send_line(":{0} CAP * LS :{1}".format(
+                IRCBouncer.SERVER_NAME,
+                ' '.join(DownstreamClient.CAPABILITIES)))
+        elif subcommand == "REQ":
+            self.is_negotiating = True
+            requested = message.trailing.split()
+            if all(capability in DownstreamClient.CAPABILITIES
+                   for capability in requested):
+                self.capabilities.update(requested)
+                reply = "ACK"
+            else:
+                reply = "NAK"
+            self.send_line(":{0} CAP * {1} :{2}".format(
+                IRCBouncer.SERVER_NAME, reply, ' '.join(requested)))
+        elif subcommand == "END":
+            self.is_negotiating = False
+            self.__try_register()
+
+    def __handle_registration(self, message):
+        if message.command == "PASS":
+            self.password = message.trailing
+        elif message.command == "NICK":
+            self.nick = message.target
+        elif message.command == "USER":
+            self.username = message.target
+        self.__try_register()
+
+    def __try_register(self):
+        if self.is_registered or self.is_negotiating or \
+                None in (self.nick, self.username):
+            return
+        network_name = self.password
+        if '/' in self.username:
+            network_name = self.username.partition('/')[2]
+        self.network = self.bouncer.find_network(network_name)
+        if self.network is None:
+            self.send_line("ERROR :Unknown network")
+            self.close()
+            return
+        self.is_registered = True
+        self.nick = self.network.nick
+        self.__send_welcome()
+        self.network.downstream_clients.add(self)
+
+    def __send_welcome(self):
+        client = self.network.client
+        self.send_numeric("001", ":Welcome to the bouncer, attached to " +
+                          self.network.name)
+        features = ["{0}={1}".format(name, value) if value else name
+                    for name, value in client.server_features.items()]
+        for start in range(0, len(features),
+                           DownstreamClient.FEATURES_PER_LINE):
+            self.send_numeric("005", ' '.join(
+                features[start:start + DownstreamClient.FEATURES_PER_LINE]),
+                ":are supported by this server")
+        self.send_numeric("422", ":MOTD File is missing")
+        own_mask = "{0}!{0}@bouncer".format(self.nick)
+        for channel_name in client.joined_channels():
+            self.send_line(":{0} JOIN {1}".format(own_mask, channel_name))
+            roster = client.get_roster(channel_name)
+            if roster is not None:
+                self.__send_names(channel_name, roster.names())
+            self.send_numeric("366", channel_name, ":End of /NAMES list.")
+        for scrollback in list(self.network.scrollbacks.values()):
+            self.__replay_scrollback(scrollback)
+
+    def __send_names(self, channel_name, names):
+        line_names = []
+        line_length = 0
+        for name in names:
+            if line_names and line_length + len(name) > \
+                    DownstreamClient.NAMES_LINE_LENGTH:
+                self.send_numeric("353", "=", channel_name,
+                                  ":" + ' '.join(line_names))
+                line_names = []
+                line_length = 0
+            line_names.append(name)
+            line_length += len(name) + 1
+        if line_names:
+            self.send_numeric("353", "=", channel_name,
+                              ":" + ' '.join(line_names))
+
+    def __replay_scrollback(self, scrollback):
+        target = scrollback.name
+        if not target.startswith(('#', '&', '+', '!')):
+            target = self.nick
+        for record in scrollback:
+            line = ":{0} PRIVMSG {1} :{2}".format(record.nick, target,
+                                                  record.text)
+            if "server-time" in self.capabilities:
+                line = "@time={0} {1}".format(
+                    IRCMessage.format_server_time(record.timestamp), line)
+            self.send_line(line)
+
+
+class IRCBouncer:
+    SERVER_NAME = "bouncer"
+
+    def __init__(self):
+        self.networks = collections.OrderedDict()
+        self.servers = []
+        self.__network_tasks = []
+
+    def add_network(self, network):
+        self.networks[network.name.lower()] = network
+        return network
+
+    def find_network(self, network_name):
+        if network_name:
+            return self.networks.get(network_name.lower())
+        return next(iter(self.networks.values()), None)
+
+    async def start(self, host=None, port=None, unix_path=None):
+        for network in self.networks.values():
+            self.__network_tasks.append(
+                asyncio.get_running_loop().create_task(network.run()))
+        if port is not None:
+            self.servers.append(await asyncio.start_server(
+                self.handle_downstream, host, port))
+        if unix_path is not None:
+            self.servers.append(await asyncio.start_unix_server(
+                self.handle_downstream, unix_path))
+        return self
+
+    def addresses(self):
+        return [server.sockets[0].getsockname() for server in self.servers]
+
+    async def stop(self):
+        for server in self.servers:
+            server.close()
+            await server.wait_closed()
+        for network in self.networks.values():
+            for downstream_client in list(network.downstream_clients):
+                downstream_client.close()
+            await network.stop()
+        for task in self.__network_tasks:
+            task.cancel()
+        self.__network_tasks = []
+
+    async def handle_downstream(self, reader, writer):
+        downstream_client = DownstreamClient(self, reader, writer)
+        line_framer = LineFramer(buffer_size=8192)
+        try:
+            while not downstream_client.is_closed:
+                data = await reader.read(8192)
+                if not data:
+                    break
+                for line in line_framer.feed(data):
+                    downstream_client.handle_line(line)
+                    if downstream_client.is_closed:
+                        break
+        except ConnectionError:
+            pass
+        finally:
+            downstream_client.close()
@@ -0,0 +1,62 @@
+import asyncio
+
+from client.async_irc_socket import AsyncIRCSocket
+from client.irc_client import IRCClient
+from client.irc_socket import SecureConnectionError
+
+
+class AsyncIRCClient(IRCClient):
+
+    def __init__(self, event_bus=None):
+        self.__irc_socket = AsyncIRCSocket()
+        super().__init__(self.__irc_socket, event_bus)
+        self.__irc_socket.on_connection_lost = self.__handle_connection_lost
+        self.on_connection_lost = None
+
+    def __handle_connection_lost(self):
+        self.is_registered = False
+        if self.on_connection_lost is not None:
+            self.on_connection_lost()
+
+    async def establish_connection(self):
+        if self.__irc_socket.connected:
+            await self.disconnect()
+        if self.check_connection_data():
+            await self.__connect_socket()
+        else:
+            self.update_status("E: NO FIELDS SHOULD BE EMPTY!")
+
+    async def __connect_socket(self):
+        self.update_status("N: CONNECTING...")
+        self.__irc_socket.set_server_data(self.connection_data.server,
+                                          self.connection_data.port)
+
+        self.__irc_socket.output_receiver = self.handle_irc_message
+        try:
+            await self.__irc_socket.connect_to_server()
+        except SecureConnectionError:
+            self.update_status("E: SECURE CONNECTION FAILED")
+        except ValueError:
+            self.update_status("E: WRONG SERVER NAME")
+        else:
+            self.update_status("S: SUCCESSFULLY CONNECTED")
+
+        if self.__irc_socket.connected:
+            self.__irc_socket.send_user_data(
+                self.connection_data.user,
+                self.capability_negotiator.start())
+            if self.on_connected_to_server is not None:
+                self.on_connected_to_server()
+
+    async def connect_to_server(self, server_name, server_port):
+        self.connection_data.server = server_name
+        self.connection_data.port = server_port
+        await self.establish_connection()
+
+    async def disconnect(self):
+        await self.__irc_socket.disconnect()
+
+    async def close(self):
+        await self.disconnect()
+        await asyncio.get_running_loop().run_in_executor(
+            None, self.event_bus.close)
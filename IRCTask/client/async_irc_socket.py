@@ -0,0 +1,189 @@
+import asyncio
+import socket
+import ssl
+
+from client.dual_stack_connector import DualStackConnector
+from client.irc_socket import IRCSocket, SecureConnectionError
+from client.line_framer import LineFramer
+from client.outbound_scheduler import OutboundScheduler
+
+
+class AsyncIRCSocket:
+    READ_CHUNK_SIZE = 65536
+
+    def __init__(self):
+        self.__server_data = '', 0
+        self.__reader = None
+        self.__writer = None
+        self.__loop = None
+        self.connected = False
+        self.joined_channel = False
+        self.connected_channel_name = "NONE"
+        self.joined_channels = {}
+        self.output_receiver = None
+        self.stats = None
+        self.capture = None
+        self.__line_framer = LineFramer()
+        self.__scheduler = OutboundScheduler()
+        self.__flush_handle = None
+        self.__reading_task = None
+        self.on_connection_lost = None
+        self.user = None
+        self.transport_security = None
+
+    def set_server_data(self, server_name, server_port):
+        self.__server_data = server_name, server_port
+
+    async def connect_to_server(self):
+        security = self.transport_security
+        try:
+            self.__reader, self.__writer = await asyncio.open_connection(
+                *self.__server_data,
+                ssl=None if security is None else security.context,
+                happy_eyeballs_delay=DualStackConnector.HAPPY_EYEBALLS_DELAY)
+            if security is not None:
+                security.check_pin(self.__writer.get_extra_info('ssl_object'))
+        except ssl.SSLError as error:
+            if self.__writer is not None:
+                self.__writer.close()
+                self.__writer = None
+            raise SecureConnectionError(str(error))
+        except socket.gaierror:
+            raise ValueError
+        except OSError:
+            raise ValueError
+        self.__loop = asyncio.get_running_loop()
+        self.__line_framer = LineFramer()
+        self.__scheduler.resume()
+        self.connected = True
+        self.__reading_task = self.__loop.create_task(self.read_messages())
+        self.flush()
+
+    def send_user_data(self, user, leading_lines=()):
+        self.user = user
+        for line in leading_lines:
+            self.queue_message(line)
+        self.queue_message("USER {0} {0} {0} {1}".format(user.username,
+                                                         user.real_name))
+        self.queue_message("NICK {}".format(user.username))
+
+    def join_channel(self, channel_name):
+        self.join_channels([channel_name])
+
+    def join_channels(self, channels_names):
+        if not self.connected:
+            raise ValueError("Connect to server first!")
+
+        for join_line in IRCSocket.build_join_lines(channels_names):
+            self.queue_message(join_line)
+        for channel_name in channels_names:
+            self.joined_channels[channel_name.lower()] = channel_name
+            self.connected_channel_name = channel_name
+        self.joined_channel = len(self.joined_channels) > 0
+
+    def part_channel(self, channel_name):
+        if not self.connected:
+            raise ValueError("Connect to server first!")
+
+        self.queue_message("PART {}".format(channel_name))
+        self.joined_channels.pop(channel_name.lower(), None)
+        self.joined_channel = len(self.joined_channels) > 0
+
+    def is_channel_joined(self, channel_name):
+        return channel_name.lower() in self.joined_channels
+
+    async def read_messages(self):
+        while self.connected:
+            try:
+                data = await self.__reader.read(self.READ_CHUNK_SIZE)
+            except (ConnectionError, OSError):
+                break
+            if not data:
+                break
+            if self.capture is not None:
+                self.capture.record_inbound(data)
+            lines_count = 0
+            for raw_message in self.__line_framer.feed(data):
+                lines_count += 1
+                self.handle_message(raw_message)
+            if self.stats is not None:
+                self.stats.increment('bytes_received', len(data))
+                self.stats.increment('lines_received', lines_count)
+        was_connected = self.connected
+        self.connected = False
+        if was_connected:
+            self.__writer.close()
+            self.__writer = None
+            if self.on_connection_lost is not None:
+                self.on_connection_lost()
+
+    def get_channels_list(self, list_filter=''):
+        self.send_message(('LIST ' + list_filter).rstrip())
+
+    def get_users_list(self):
+        self.send_message('NAMES ' + self.connected_channel_name)
+
+    def is_message_queue_empty(self):
+        return len(self.__scheduler) == 0
+
+    def set_flood_control(self, rate=OutboundScheduler.RFC1459_RATE,
+                          burst=OutboundScheduler.RFC1459_BURST):
+        self.__scheduler.set_rate_limit(rate, burst)
+
+    def handle_message(self, message):
+        if self.output_receiver is not None:
+            self.output_receiver(message)
+
+    def send_message(self, message):
+        self.queue_message(message)
+        self.echo_message(message)
+
+    def echo_message(self, message):
+        if self.capture is not None:
+            self.capture.record_echo(message)
+        self.handle_message(message)
+
+    def send_urgent_message(self, message):
+        self.queue_message(message)
+
+    def ping(self, token="pingisn"):
+        self.send_message("PONG :" + token)
+
+    async def disconnect(self):
+        if self.connected:
+            self.send_message("QUIT")
+            self.__scheduler.put(None)
+            self.connected = False
+        if self.__writer is not None:
+            self.flush()
+            self.__scheduler.clear()
+            self.__writer.close()
+            try:
+                await self.__writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+            self.__writer = None
+        if self.__reading_task is not None:
+            self.__reading_task.cancel()
+            self.__reading_task = None
+
+    def flush(self):
+        self.__flush_handle = None
+        if self.__writer is None:
+            return
+        entries, delay = self.__scheduler.take()
+        if entries:
+            data = b''.join(data for data, _ in entries)
+            if self.stats is not None:
+                self.stats.increment('bytes_sent', len(data))
+                self.stats.increment('lines_sent', len(entries))
+            if self.capture is not None:
+                self.capture.record_outbound(data)
+            self.__writer.write(data)
+        if delay > 0:
+            self.__flush_handle = self.__loop.call_later(delay, self.flush)
+
+    def queue_message(self, message):
+        self.__scheduler.put(bytes(message + '\r\n', "UTF-8"))
+        if self.__flush_handle is None and self.__writer is not None:
+            self.__flush_handle = self.__loop.call_soon(self.flush)
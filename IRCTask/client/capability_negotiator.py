@@ -0,0 +1,86 @@
+class CapabilityNegotiator:
+    PROTOCOL_VERSION = "302"
+
+    def __init__(self, wanted_capabilities=()):
+        self.wanted_capabilities = set(wanted_capabilities)
+        self.available_capabilities = {}
+        self.enabled_capabilities = set()
+        self.is_negotiating = False
+        self.__requested_capabilities = set()
+
+    def is_enabled(self, capability):
+        return capability in self.enabled_capabilities
+
+    def start(self):
+        self.available_capabilities = {}
+        self.enabled_capabilities = set()
+        self.__requested_capabilities = set()
+        self.is_negotiating = bool(self.wanted_capabilities)
+        if not self.is_negotiating:
+            return []
+        return ["CAP LS " + CapabilityNegotiator.PROTOCOL_VERSION]
+
+    def handle(self, message):
+        if len(message.params) < 3:
+            return []
+        subcommand = message.params[1].upper()
+        if subcommand == "LS":
+            return self.__handle_list(message)
+        if subcommand == "ACK":
+            return self.__handle_acknowledgement(message.trailing)
+        if subcommand == "NAK":
+            self.__requested_capabilities.difference_update(
+                message.trailing.split())
+            return self.__finish_if_settled()
+        if subcommand == "NEW":
+            self.__add_available(message.trailing)
+            return self.__request(self.__wanted_available())
+        if subcommand == "DEL":
+            for capability in message.trailing.split():
+                self.available_capabilities.pop(capability, None)
+                self.enabled_capabilities.discard(capability)
+        return []
+
+    def __handle_list(self, message):
+        self.__add_available(message.trailing)
+        if len(message.params) > 3 and message.params[2] == '*':
+            return []
+        if not self.is_negotiating:
+            return []
+        lines = self.__request(self.__wanted_available())
+        return lines if lines else self.__finish()
+
+    def __handle_acknowledgement(self, capabilities):
+        for capability in capabilities.split():
+            if capability.startswith('-'):
+                self.enabled_capabilities.discard(capability[1:])
+                capability = capability[1:]
+            else:
+                self.enabled_capabilities.add(capability)
+            self.__requested_capabilities.discard(capability)
+        return self.__finish_if_settled()
+
+    def __add_available(self, capabilities):
+        for capability in capabilities.split():
+            name, _, value = capability.partition('=')
+            self.available_capabilities[name] = value
+
+    def __wanted_available(self):
+        return sorted(capability for capability in self.wanted_capabilities
+                      if capability in self.available_capabilities and
+                      capability not in self.enabled_capabilities)
+
+    def __request(self, capabilities):
+        if not capabilities:
+            return []
+        self.__requested_capabilities.update(capabilities)
+        return ["CAP REQ :" + ' '.join(capabilities)]
+
+    def __finish_if_settled(self):
+        if self.is_negotiating and not self.__requested_capabilities:
+            return self.__finish()
+        return []
+
+    def __finish(self):
+        self.is_negotiating = False
+        return ["CAP END"]
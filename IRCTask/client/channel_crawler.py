@@ -0,0 +1,160 @@
+import asyncio
+import time
+
+from client.async_irc_client import AsyncIRCClient
+from data_transfer.event_bus import EventBus
+from data_transfer.user import User
+
+
+class CrawlTarget:
+    __slots__ = ('server_name', 'server_port', 'uses_tls')
+
+    def __init__(self, server_name, server_port, uses_tls=False):
+        self.server_name = server_name
+        self.server_port = server_port
+        self.uses_tls = uses_tls
+
+    @property
+    def address(self):
+        return "{0}:{1}".format(self.server_name, self.server_port)
+
+    @staticmethod
+    def parse(value):
+        address, _, options = value.partition('+')
+        server_name, _, server_port = address.rpartition(':')
+        if not server_name or not server_port.isdigit() or \
+                options not in ('', 'tls'):
+            raise ValueError("Server should look like host:port[+tls]")
+        return CrawlTarget(server_name, int(server_port), options == 'tls')
+
+
+class CrawlResult:
+    __slots__ = ('server_address', 'channels_count', 'attempts', 'seconds',
+                 'error')
+
+    def __init__(self, server_address, channels_count, attempts, seconds,
+                 error=None):
+        self.server_address = server_address
+        self.channels_count = channels_count
+        self.attempts = attempts
+        self.seconds = seconds
+        self.error = error
+
+
+class ChannelCrawler:
+    DEFAULT_MAX_CONNECTIONS = 16
+    DEFAULT_TIMEOUT = 120
+    DEFAULT_RETRIES = 2
+    DEFAULT_RETRY_DELAY = 2
+    BATCH_SIZE = 512
+    FLUSH_TIMEOUT = 10
+
+    def __init__(self, channel_index, nick,
+                 max_connections=DEFAULT_MAX_CONNECTIONS,
+                 timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES,
+                 retry_delay=DEFAULT_RETRY_DELAY, transport_security=None,
+                 client_factory=AsyncIRCClient):
+        if max_connections < 1:
+            raise ValueError("At least one connection should be allowed!")
+        self.channel_index = channel_index
+        self.nick = nick
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.transport_security = transport_security
+        self.client_factory = client_factory
+        self.active_connections_count = 0
+        self.peak_connections_count = 0
+
+    def run(self, targets):
+        return asyncio.run(self.crawl(targets))
+
+    async def crawl(self, targets):
+        started_at = time.time()
+        pool = asyncio.Semaphore(self.max_connections)
+        results = await asyncio.gather(*(self.__crawl_server(target, pool)
+                                         for target in targets),
+                                       return_exceptions=True)
+        return [CrawlResult(target.address, 0, 1, time.time() - started_at,
+                            ChannelCrawler.describe_error(result))
+                if isinstance(result, BaseException) else result
+                for target, result in zip(targets, results)]
+
+    async def __crawl_server(self, target, pool):
+        started_at = time.time()
+        error = None
+        channels_count = 0
+        attempt = 0
+        while attempt <= self.retries:
+            if attempt:
+                await asyncio.sleep(self.retry_delay * 2 ** (attempt - 1))
+            attempt += 1
+            async with pool:
+                self.active_connections_count += 1
+                self.peak_connections_count = max(
+                    self.peak_connections_count,
+                    self.active_connections_count)
+                try:
+                    channels_count = await asyncio.wait_for(
+                        self.__list_channels(target), self.timeout)
+                except (asyncio.TimeoutError, ConnectionError) as crawl_error:
+                    error = ChannelCrawler.describe_error(crawl_error)
+                else:
+                    error = None
+                    break
+                finally:
+                    self.active_connections_count -= 1
+        self.channel_index.finish_crawl(target.address, started_at,
+                                        channels_count, error)
+        return CrawlResult(target.address, channels_count, attempt,
+                           time.time() - started_at, error)
+
+    async def __list_channels(self, target):
+        event_bus = EventBus()
+        client = self.client_factory(event_bus)
+        client.set_user(User(self.nick))
+        if target.uses_tls:
+            self.transport_security = client.enable_tls(
+                self.transport_security)
+        channels_counts = [0]
+        client.channel_data_handler.connect_receiver(
+            lambda channels_infos: self.__store_channels(
+                target.address, channels_infos, channels_counts),
+            batch_size=ChannelCrawler.BATCH_SIZE)
+        progressed = asyncio.Event()
+        client.on_registered = progressed.set
+        client.on_channels_listed = progressed.set
+        client.on_connection_lost = progressed.set
+        try:
+            await client.connect_to_server(target.server_name,
+                                           target.server_port)
+            if not client.is_connected():
+                raise ConnectionError(client.current_status)
+            await progressed.wait()
+            if not client.is_registered:
+                raise ConnectionError("Connection lost before registration")
+            progressed.clear()
+            client.update_channels_list(force=True)
+            await progressed.wait()
+            if client.is_searching_for_channels:
+                raise ConnectionError("Connection lost while listing")
+        finally:
+            await client.disconnect()
+            await asyncio.get_running_loop().run_in_executor(
+                None, ChannelCrawler.__close_event_bus, event_bus)
+        return channels_counts[0]
+
+    @staticmethod
+    def describe_error(error):
+        return "{0}: {1}".format(type(error).__name__, error)
+
+    def __store_channels(self, server_address, channels_infos,
+                         channels_counts):
+        self.channel_index.add_channels(server_address, channels_infos)
+        channels_counts[0] += len(channels_infos)
+
+    @staticmethod
+    def __close_event_bus(event_bus):
+        event_bus.flush(ChannelCrawler.FLUSH_TIMEOUT)
+        event_bus.close()
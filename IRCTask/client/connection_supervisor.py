@@ -0,0 +1,130 @@
+import random
+import threading
+import time
+
+
+class ConnectionSupervisor:
+    DEFAULT_PING_INTERVAL = 60
+    DEFAULT_PONG_TIMEOUT = 30
+    DEFAULT_BASE_DELAY = 1
+    DEFAULT_MAX_DELAY = 300
+    KEEPALIVE_TOKEN = "keepalive"
+
+    def __init__(self, client, irc_socket,
+                 ping_interval=DEFAULT_PING_INTERVAL,
+                 pong_timeout=DEFAULT_PONG_TIMEOUT,
+                 base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY,
+                 max_attempts=None, random_source=None):
+        if ping_interval <= 0 or pong_timeout <= 0 or base_delay <= 0:
+            raise ValueError("Intervals and delays should be positive!")
+        self.ping_interval = ping_interval
+        self.pong_timeout = pong_timeout
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.reconnects_count = 0
+        self.failed_attempts_count = 0
+        self.__client = client
+        self.__irc_socket = irc_socket
+        self.__random = random_source if random_source is not None \
+            else random.Random()
+        self.__condition = threading.Condition()
+        self.__is_connection_lost = False
+        self.__is_stopped = True
+        self.__keepalive_sent_at = None
+        self.__connected_at = time.monotonic()
+        self.__attempt = 0
+        self.__supervising_thread = None
+
+    def start(self):
+        with self.__condition:
+            if not self.__is_stopped:
+                return
+            self.__is_stopped = False
+        self.__irc_socket.on_connection_lost = self.notify_connection_lost
+        self.__supervising_thread = threading.Thread(target=self.supervise,
+                                                     daemon=True)
+        self.__supervising_thread.start()
+
+    def stop(self):
+        with self.__condition:
+            self.__is_stopped = True
+            self.__condition.notify_all()
+        if self.__irc_socket.on_connection_lost == \
+                self.notify_connection_lost:
+            self.__irc_socket.on_connection_lost = None
+        if self.__supervising_thread is not None and \
+                self.__supervising_thread is not threading.current_thread():
+            self.__supervising_thread.join()
+
+    def is_running(self):
+        return not self.__is_stopped
+
+    def notify_connection_lost(self):
+        with self.__condition:
+            self.__is_connection_lost = True
+            self.__condition.notify_all()
+
+    def supervise(self):
+        check_interval = min(self.ping_interval, self.pong_timeout) / 4
+        while True:
+            with self.__condition:
+                if not self.__is_connection_lost:
+                    self.__condition.wait_for(
+                        lambda: self.__is_connection_lost or
+                        self.__is_stopped, check_interval)
+                if self.__is_stopped:
+                    return
+                is_connection_lost = self.__is_connection_lost
+            if is_connection_lost:
+                self.reconnect()
+            else:
+                self.check_liveness(time.monotonic())
+
+    def check_liveness(self, now):
+        last_received_at = self.__irc_socket.last_received_at
+        if not self.__irc_socket.connected or last_received_at is None:
+            return
+        silence = now - last_received_at
+        if silence >= self.ping_interval + self.pong_timeout:
+            self.__client.update_status("E: SERVER STOPPED RESPONDING")
+            self.__irc_socket.drop_connection()
+        elif silence >= self.ping_interval and \
+                (self.__keepalive_sent_at is None or
+                 self.__keepalive_sent_at < last_received_at):
+            self.__keepalive_sent_at = now
+            self.__irc_socket.queue_message(
+                "PING :" + ConnectionSupervisor.KEEPALIVE_TOKEN)
+
+    def next_delay(self, attempt):
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+        return self.__random.uniform(delay / 2, delay)
+
+    def reconnect(self):
+        if time.monotonic() - self.__connected_at >= self.max_delay:
+            self.__attempt = 0
+        while True:
+            delay = self.next_delay(self.__attempt)
+            self.__client.update_status(
+                "N: RECONNECTING IN {:.1f}s".format(delay))
+            with self.__condition:
+                if self.__condition.wait_for(lambda: self.__is_stopped,
+                                             delay):
+                    return
+                self.__is_connection_lost = False
+            self.__attempt += 1
+            try:
+                self.__client.reconnect()
+            except (ValueError, OSError):
+                self.failed_attempts_count += 1
+                if self.max_attempts is not None and \
+                        self.__attempt >= self.max_attempts:
+                    self.__client.update_status("E: COULD NOT RECONNECT")
+                    with self.__condition:
+                        self.__is_stopped = True
+                    return
+                continue
+            self.reconnects_count += 1
+            self.__connected_at = time.monotonic()
+            self.__keepalive_sent_at = None
+            return
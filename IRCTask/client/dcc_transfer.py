@@ -0,0 +1,430 @@
+import abc
+import mmap
+import os
+import socket
+import struct
+import threading
+import time
+
+ACKNOWLEDGEMENT = struct.Struct('!I')
+
+
+class DccOffer:
+    __slots__ = ('nick', 'filename', 'host', 'port', 'size', 'position')
+
+    def __init__(self, nick, filename, host, port, size):
+        self.nick = nick
+        self.filename = filename
+        self.host = host
+        self.port = port
+        self.size = size
+        self.position = 0
+
+    @staticmethod
+    def split_arguments(text):
+        arguments = []
+        rest = text.strip()
+        while rest:
+            if rest[0] == '"' and '"' in rest[1:]:
+                argument, _, rest = rest[1:].partition('"')
+            else:
+                argument, _, rest = rest.partition(' ')
+            arguments.append(argument)
+            rest = rest.lstrip(' ')
+        return arguments
+
+    @staticmethod
+    def safe_filename(filename):
+        filename = os.path.basename(filename.replace('\\', '/')).strip()
+        if filename in ('', '.', '..'):
+            raise ValueError("Wrong DCC file name!")
+        return filename
+
+    @staticmethod
+    def decode_host(host):
+        if host.isdigit():
+            return socket.inet_ntoa(struct.pack('!I', int(host)))
+        return host
+
+    @staticmethod
+    def encode_host(host):
+        try:
+            return str(struct.unpack('!I', socket.inet_aton(host))[0])
+        except OSError:
+            return host
+
+    @staticmethod
+    def quote_filename(filename):
+        if ' ' in filename:
+            return '"{0}"'.format(filename)
+        return filename
+
+
+class DccProgress:
+    __slots__ = ('transfer_id', 'direction', 'nick', 'filename', 'size',
+                 'bytes_transferred', 'bytes_per_second', 'state')
+
+    def __init__(self, transfer_id, direction, nick, filename, size,
+                 bytes_transferred, bytes_per_second, state):
+        self.transfer_id = transfer_id
+        self.direction = direction
+        self.nick = nick
+        self.filename = filename
+        self.size = size
+        self.bytes_transferred = bytes_transferred
+        self.bytes_per_second = bytes_per_second
+        self.state = state
+
+
+class DccTransfer(abc.ABC):
+    SEND = "send"
+    RECEIVE = "receive"
+    WAITING = "waiting"
+    TRANSFERRING = "transferring"
+    DONE = "done"
+    FAILED = "failed"
+    CHUNK_SIZE = 4 * 1024 * 1024
+    PROGRESS_INTERVAL = 0.25
+    DEFAULT_TIMEOUT = 120
+    __ids_lock = threading.Lock()
+    __last_id = 0
+
+    def __init__(self, direction, nick, filename, size,
+                 progress_transmitter=None, timeout=DEFAULT_TIMEOUT):
+        with DccTransfer.__ids_lock:
+            DccTransfer.__last_id += 1
+            self.transfer_id = DccTransfer.__last_id
+        self.direction = direction
+        self.nick = nick
+        self.filename = filename
+        self.size = size
+        self.position = 0
+        self.bytes_transferred = 0
+        self.state = DccTransfer.WAITING
+        self.error = None
+        self.timeout = timeout
+        self.progress_transmitter = progress_transmitter
+        self.on_finished = None
+        self.__started_at = None
+        self.__reported_at = 0
+        self.__thread = None
+        self.__finished = threading.Event()
+
+    def start(self):
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+        return self
+
+    def wait(self, timeout=None):
+        return self.__finished.wait(timeout)
+
+    def is_finished(self):
+        return self.__finished.is_set()
+
+    def bytes_per_second(self):
+        if self.__started_at is None:
+            return 0
+        elapsed = time.monotonic() - self.__started_at
+        return self.bytes_transferred / elapsed if elapsed > 0 else 0
+
+    def __run(self):
+        try:
+            self.transfer()
+        except (OSError, ValueError) as error:
+            self.error = error
+            self.state = DccTransfer.FAILED
+        else:
+            self.state = DccTransfer.DONE
+        finally:
+            self.report_progress(force=True)
+            if self.on_finished is not None:
+                self.on_finished(self)
+            self.__finished.set()
+
+    @abc.abstractmethod
+    def transfer(self):
+        pass
+
+    def begin_transferring(self):
+        self.state = DccTransfer.TRANSFERRING
+        self.__started_at = time.monotonic()
+        self.report_progress(force=True)
+
+    def advance(self, bytes_count):
+        self.bytes_transferred += bytes_count
+        self.report_progress()
+
+    def report_progress(self, force=False):
+        if self.progress_transmitter is None or \
+                not self.progress_transmitter.can_transmit():
+            return
+        now = time.monotonic()
+        if not force and now - self.__reported_at < \
+                DccTransfer.PROGRESS_INTERVAL:
+            return
+        self.__reported_at = now
+        self.progress_transmitter.transmit(DccProgress(
+            self.transfer_id, self.direction, self.nick, self.filename,
+            self.size, self.position + self.bytes_transferred,
+            self.bytes_per_second(), self.state))
+
+    @abc.abstractmethod
+    def cancel(self):
+        pass
+
+    @staticmethod
+    def shutdown(transfer_socket):
+        if transfer_socket is None:
+            return
+        try:
+            transfer_socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+class DccSender(DccTransfer):
+
+    def __init__(self, path, nick, progress_transmitter=None, host='',
+                 timeout=DccTransfer.DEFAULT_TIMEOUT):
+        super().__init__(DccTransfer.SEND, nick,
+                         DccOffer.safe_filename(path),
+                         os.path.getsize(path), progress_transmitter, timeout)
+        self.path = path
+        self.__listener = socket.create_server((host, 0))
+        self.__listener.settimeout(timeout)
+        self.port = self.__listener.getsockname()[1]
+        self.__connection = None
+
+    def offer_text(self, advertised_host):
+        return "DCC SEND {0} {1} {2} {3}".format(
+            DccOffer.quote_filename(self.filename),
+            DccOffer.encode_host(advertised_host), self.port, self.size)
+
+    def resume_from(self, position):
+        if self.state != DccTransfer.WAITING or \
+                not 0 <= position <= self.size:
+            return False
+        self.position = position
+        return True
+
+    def transfer(self):
+        with self.__listener:
+            connection, _ = self.__listener.accept()
+        self.__connection = connection
+        with connection, open(self.path, 'rb') as sent_file:
+            connection.settimeout(self.timeout)
+            self.begin_transferring()
+            offset = self.position
+            while offset < self.size:
+                sent = connection.sendfile(
+                    sent_file, offset,
+                    min(DccTransfer.CHUNK_SIZE, self.size - offset))
+                if not sent:
+                    raise ConnectionError("DCC receiver closed connection")
+                offset += sent
+                self.advance(sent)
+            self.__wait_acknowledgement(connection)
+
+    def __wait_acknowledgement(self, connection):
+        expected = self.size & 0xFFFFFFFF
+        pending = b''
+        while True:
+            data = connection.recv(ACKNOWLEDGEMENT.size * 64)
+            if not data:
+                return
+            pending += data
+            while len(pending) >= ACKNOWLEDGEMENT.size:
+                acknowledged = ACKNOWLEDGEMENT.unpack_from(pending)[0]
+                pending = pending[ACKNOWLEDGEMENT.size:]
+                if acknowledged == expected:
+                    return
+
+    def cancel(self):
+        DccTransfer.shutdown(self.__listener)
+        DccTransfer.shutdown(self.__connection)
+
+
+class DccReceiver(DccTransfer):
+
+    def __init__(self, offer, path, progress_transmitter=None,
+                 timeout=DccTransfer.DEFAULT_TIMEOUT):
+        super().__init__(DccTransfer.RECEIVE, offer.nick, offer.filename,
+                         offer.size, progress_transmitter, timeout)
+        self.offer = offer
+        self.path = path
+        self.position = offer.position
+        self.__connection = None
+
+    def transfer(self):
+        mode = 'r+b' if self.position else 'w+b'
+        with open(self.path, mode) as received_file:
+            DccReceiver.preallocate(received_file, self.size)
+            offset = self.position
+            try:
+                self.__connection = socket.create_connection(
+                    (self.offer.host, self.offer.port), self.timeout)
+                with self.__connection as connection:
+                    self.begin_transferring()
+                    if offset < self.size:
+                        offset = self.__receive_mapped(
+                            connection, received_file, offset)
+                    connection.sendall(
+                        ACKNOWLEDGEMENT.pack(offset & 0xFFFFFFFF))
+            finally:
+                if offset < self.size:
+                    received_file.truncate(offset)
+
+    def __receive_mapped(self, connection, received_file, offset):
+        with mmap.mmap(received_file.fileno(), self.size) as mapped:
+            view = memoryview(mapped)
+            try:
+                while offset < self.size:
+                    received = connection.recv_into(
+                        view[offset:],
+                        min(DccTransfer.CHUNK_SIZE, self.size - offset))
+                    if not received:
+                        raise ConnectionError("DCC sender closed connection")
+                    offset += received
+                    self.advance(received)
+            finally:
+                view.release()
+        return offset
+
+    @staticmethod
+    def preallocate(received_file, size):
+        received_file.truncate(size)
+        if size and hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(received_file.fileno(), 0, size)
+            except OSError:
+                pass
+
+    def cancel(self):
+        DccTransfer.shutdown(self.__connection)
+
+
+class DccManager:
+
+    def __init__(self, irc_client, download_directory, host='',
+                 advertised_host=None, timeout=DccTransfer.DEFAULT_TIMEOUT):
+        self.irc_client = irc_client
+        self.download_directory = download_directory
+        self.host = host
+        self.advertised_host = advertised_host
+        self.timeout = timeout
+        self.progress_transmitter = irc_client.event_bus.transmitter("dcc")
+        self.offers_transmitter = \
+            irc_client.event_bus.transmitter("dcc_offers")
+        self.transfers = []
+        self.__senders = {}
+        self.__resuming_offers = {}
+        self.__lock = threading.Lock()
+        irc_client.ctcp_transmitter.connect_receiver(self.handle_ctcp)
+
+    def send_file(self, nick, path):
+        sender = DccSender(path, nick, self.progress_transmitter, self.host,
+                           self.timeout)
+        advertised_host = self.advertised_host or \
+            self.irc_client.local_address() or '127.0.0.1'
+        sender.on_finished = self.__forget_transfer
+        with self.__lock:
+            self.__senders[sender.port] = sender
+            self.transfers.append(sender)
+        sender.start()
+        self.irc_client.send_ctcp_message(nick,
+                                          sender.offer_text(advertised_host))
+        return sender
+
+    def accept_offer(self, offer, resume=False, path=None):
+        if path is None:
+            path = os.path.join(self.download_directory, offer.filename)
+        if resume and os.path.exists(path):
+            position = os.path.getsize(path)
+            if 0 < position < offer.size:
+                with self.__lock:
+                    self.__resuming_offers[offer.port] = offer, path
+                self.irc_client.send_ctcp_message(
+                    offer.nick, "DCC RESUME {0} {1} {2}".format(
+                        DccOffer.quote_filename(offer.filename), offer.port,
+                        position))
+                return None
+        offer.position = 0
+        return self.__receive(offer, path)
+
+    def __receive(self, offer, path):
+        receiver = DccReceiver(offer, path, self.progress_transmitter,
+                               self.timeout)
+        receiver.on_finished = self.__forget_transfer
+        with self.__lock:
+            self.transfers.append(receiver)
+        return receiver.start()
+
+    def __forget_transfer(self, transfer):
+        with self.__lock:
+            if transfer in self.transfers:
+                self.transfers.remove(transfer)
+            if isinstance(transfer, DccSender) and \
+                    self.__senders.get(transfer.port) is transfer:
+                del self.__senders[transfer.port]
+
+    def handle_ctcp(self, message):
+        text = message.trailing.strip('\x01')
+        if not text.upper().startswith("DCC ") or message.nick is None:
+            return
+        arguments = DccOffer.split_arguments(text[4:])
+        if len(arguments) < 4:
+            return
+        kind = arguments[0].upper()
+        try:
+            if kind == "SEND" and len(arguments) >= 5:
+                self.__handle_send(message.nick, arguments)
+            elif kind == "RESUME":
+                self.__handle_resume(message.nick, arguments)
+            elif kind == "ACCEPT":
+                self.__handle_accept(arguments)
+        except ValueError:
+            return
+
+    def __handle_send(self, nick, arguments):
+        port = int(arguments[3])
+        if not 0 < port < 65536:
+            return
+        offer = DccOffer(nick, DccOffer.safe_filename(arguments[1]),
+                         DccOffer.decode_host(arguments[2]), port,
+                         int(arguments[4]))
+        if self.offers_transmitter.can_transmit():
+            self.offers_transmitter.transmit(offer)
+
+    def __handle_resume(self, nick, arguments):
+        port, position = int(arguments[2]), int(arguments[3])
+        with self.__lock:
+            sender = self.__senders.get(port)
+        if sender is None or sender.nick.lower() != nick.lower() or \
+                not sender.resume_from(position):
+            return
+        self.irc_client.send_ctcp_message(
+            nick, "DCC ACCEPT {0} {1} {2}".format(
+                DccOffer.quote_filename(sender.filename), port, position))
+
+    def __handle_accept(self, arguments):
+        port, position = int(arguments[2]), int(arguments[3])
+        with self.__lock:
+            offer, path = self.__resuming_offers.pop(port, (None, None))
+        if offer is None:
+            return
+        offer.position = position
+        self.__receive(offer, path)
+
+    def active_transfers(self):
+        with self.__lock:
+            return [transfer for transfer in self.transfers
+                    if not transfer.is_finished()]
+
+    def close(self):
+        with self.__lock:
+            transfers = list(self.transfers)
+            self.__senders.clear()
+            self.__resuming_offers.clear()
+        for transfer in transfers:
+            if not transfer.is_finished():
+                transfer.cancel()
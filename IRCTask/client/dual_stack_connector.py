@@ -0,0 +1,84 @@
+import errno
+import itertools
+import selectors
+import socket
+import time
+
+
+class DualStackConnector:
+    HAPPY_EYEBALLS_DELAY = 0.25
+    IN_PROGRESS_ERRORS = (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN)
+
+    @staticmethod
+    def interleave_addresses(addresses):
+        families = {}
+        for address in addresses:
+            families.setdefault(address[0], []).append(address)
+        interleaved = []
+        for group in itertools.zip_longest(*families.values()):
+            interleaved.extend(address for address in group
+                               if address is not None)
+        return interleaved
+
+    @staticmethod
+    def connect(server_name, server_port, timeout=None,
+                attempt_delay=HAPPY_EYEBALLS_DELAY):
+        addresses = DualStackConnector.interleave_addresses(
+            socket.getaddrinfo(server_name, server_port, socket.AF_UNSPEC,
+                               socket.SOCK_STREAM))
+        deadline = None if timeout is None else time.monotonic() + timeout
+        selector = selectors.DefaultSelector()
+        pending = []
+        errors = []
+        connected_socket = None
+        next_attempt_at = time.monotonic()
+        try:
+            while connected_socket is None and (addresses or pending):
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    raise socket.timeout("Connection timed out")
+                if addresses and (not pending or now >= next_attempt_at):
+                    connected_socket = DualStackConnector.__start_attempt(
+                        addresses.pop(0), selector, pending, errors)
+                    next_attempt_at = now + attempt_delay
+                    continue
+                wait = next_attempt_at - now if addresses else None
+                if deadline is not None:
+                    wait = deadline - now if wait is None else \
+                        min(wait, deadline - now)
+                for key, _ in selector.select(wait):
+                    attempt_socket = key.fileobj
+                    selector.unregister(attempt_socket)
+                    pending.remove(attempt_socket)
+                    error = attempt_socket.getsockopt(socket.SOL_SOCKET,
+                                                      socket.SO_ERROR)
+                    if error == 0:
+                        connected_socket = attempt_socket
+                        break
+                    attempt_socket.close()
+                    errors.append(OSError(error, "Could not connect"))
+        finally:
+            for attempt_socket in pending:
+                if attempt_socket is not connected_socket:
+                    attempt_socket.close()
+            selector.close()
+        if connected_socket is None:
+            raise errors[-1] if errors else OSError("No addresses to connect")
+        connected_socket.setblocking(True)
+        return connected_socket
+
+    @staticmethod
+    def __start_attempt(address, selector, pending, errors):
+        family, socket_type, protocol, _, socket_address = address
+        attempt_socket = socket.socket(family, socket_type, protocol)
+        attempt_socket.setblocking(False)
+        error = attempt_socket.connect_ex(socket_address)
+        if error == 0:
+            return attempt_socket
+        if error in DualStackConnector.IN_PROGRESS_ERRORS:
+            selector.register(attempt_socket, selectors.EVENT_WRITE)
+            pending.append(attempt_socket)
+        else:
+            attempt_socket.close()
+            errors.append(OSError(error, "Could not connect"))
+        return None
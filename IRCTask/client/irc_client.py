@@ -1,18 +1,35 @@
-import re
-from client.irc_socket import IRCSocket
+from client.irc_socket import IRCSocket, SecureConnectionError
+from client.capability_negotiator import CapabilityNegotiator
+from client.outbound_scheduler import OutboundScheduler
 import threading as thr
+import time
 from data_transfer.connection_data import ConnectionData
 from data_transfer.channel_info import ChannelInfo
+from data_transfer.channel_roster import ChannelRoster
+from data_transfer.irc_batch import BatchCollector
+from data_transfer.irc_message import IRCMessage
 from data_transfer.user import User
-from data_transfer.transmitter import Transmitter
+from data_transfer.event_bus import EventBus
 
 
 class IRCClient:
-    CHANNEL_REGEX = r'.*? .*? .*? ([^:].*?) (\d.*?) (:.*)$'
-    MESSAGE_SPLITTING_REGEX = r'.*? :(.*?$)'
-
-    def __init__(self):
-        self.__irc_socket = IRCSocket()
+    DEFAULT_CHANNEL_MODES = "beI,k,l,imnpst"
+    LATENCY_PROBE_PREFIX = "lag"
+    DEFAULT_CAPABILITIES = ("message-tags", "server-time", "batch",
+                            "draft/chathistory")
+    CHAT_HISTORY_BATCH_TYPES = ("chathistory", "draft/chathistory")
+    DEFAULT_HISTORY_LIMIT = 50
+    MAX_LINE_BYTES = 510
+    MAX_TARGETS_LENGTH = 200
+    DEFAULT_USER_HOST_LENGTH = len("~") + 10 + len("@") + 63
+
+    def __init__(self, irc_socket=None, event_bus=None):
+        if irc_socket is None:
+            irc_socket = IRCSocket()
+        if event_bus is None:
+            event_bus = EventBus()
+        self.__irc_socket = irc_socket
+        self.event_bus = event_bus
         self.connection_data = ConnectionData()
         self.connection_data.user = User("")
 
@@ -20,22 +37,70 @@ class IRCClient:
 
         self.is_searching_for_channels = False
         self.is_searching_for_names = False
+        self.is_registered = False
+        self.server_features = {}
+
+        self.__message_handlers = {
+            "PING": self.__handle_ping,
+            "PONG": self.__handle_pong,
+            "CAP": self.__handle_capabilities,
+            "BATCH": self.__handle_batch,
+            "001": self.__handle_welcome,
+            "005": self.__handle_server_features,
+            "433": self.__handle_nick_in_use,
+            "PRIVMSG": self.__handle_user_message,
+            "JOIN": self.__handle_join,
+            "PART": self.__handle_part,
+            "KICK": self.__handle_kick,
+            "QUIT": self.__handle_quit,
+            "NICK": self.__handle_nick,
+            "MODE": self.__handle_mode,
+            "322": self.__handle_channel_data,
+            "323": self.__handle_channels_list_end,
+            "353": self.__handle_names,
+            "366": self.__handle_names_end
+        }
+
+        self.__socket_thread = None
+
+        self.status_update_handler = event_bus.transmitter("status")
+
+        self.chat_transmitter = event_bus.transmitter("chat")
+        self.channel_names_transmitter = event_bus.transmitter("names")
+        self.channel_data_handler = event_bus.transmitter("channels")
+        self.roster_transmitter = event_bus.transmitter("roster")
+        self.batch_transmitter = event_bus.transmitter("batch")
+        self.highlight_transmitter = event_bus.transmitter("highlights")
+        self.routed_transmitter = event_bus.transmitter("routed")
+        self.ctcp_transmitter = event_bus.transmitter("ctcp")
+
+        self.rosters = {}
 
-        self.__channel_compiled_regex = re.compile(
-            IRCClient.CHANNEL_REGEX)
+        self.on_connected_to_server = None
+        self.on_registered = None
+        self.on_channels_listed = None
 
-        self.__message_splitting_compiled_regex = re.compile(
-            IRCClient.MESSAGE_SPLITTING_REGEX)
+        self.chat_log_store = None
 
-        self.__socket_thread = thr.Thread(target=self.__connect_socket)
+        self.channel_directory = None
+        self.channel_snapshots_directory = None
+        self.__pending_list_replies_count = 0
+        self.__list_min_users = None
 
-        self.status_update_handler = Transmitter()
+        self.stats = None
 
-        self.chat_transmitter = Transmitter()
-        self.channel_names_transmitter = Transmitter()
-        self.channel_data_handler = Transmitter()
+        self.supervisor = None
+        self.__is_restoring_session = False
 
-        self.on_connected_to_server = None
+        self.capability_negotiator = CapabilityNegotiator(
+            IRCClient.DEFAULT_CAPABILITIES)
+        self.batch_collector = BatchCollector()
+        self.history_limit = IRCClient.DEFAULT_HISTORY_LIMIT
+        self.last_message_times = {}
+        self.own_user_host = None
+
+        self.message_rules = None
+        self.ignored_messages_count = 0
 
     def establish_connection(self):
         if self.__irc_socket.connected:
@@ -43,7 +108,8 @@ class IRCClient:
         if self.check_connection_data():
             self.__connect_socket()
         else:
-            if self.__socket_thread.is_alive():
+            if self.__socket_thread is not None and \
+                    self.__socket_thread.is_alive():
                 self.__socket_thread.join()
             self.update_status("E: NO FIELDS SHOULD BE EMPTY!")
 
@@ -55,6 +121,8 @@ class IRCClient:
         self.__irc_socket.output_receiver = self.handle_irc_message
         try:
             self.__irc_socket.connect_to_server()
+        except SecureConnectionError:
+            self.update_status("E: SECURE CONNECTION FAILED")
         except ValueError:
             self.update_status("E: WRONG SERVER NAME")
         except Exception as e:
@@ -63,29 +131,106 @@ class IRCClient:
             self.update_status("S: SUCCESSFULLY CONNECTED")
 
         if self.__irc_socket.connected:
-            self.__irc_socket.send_user_data(self.connection_data.user)
+            self.__irc_socket.send_user_data(
+                self.connection_data.user,
+                self.capability_negotiator.start())
             if self.on_connected_to_server is not None:
                 self.on_connected_to_server()
 
+    def reconnect(self):
+        self.is_registered = False
+        self.__is_restoring_session = True
+        self.rosters = {}
+        self.__irc_socket.connect_to_server(is_resuming=True)
+        self.update_status("S: RECONNECTED")
+        self.batch_collector.clear()
+        self.__irc_socket.send_user_data(self.connection_data.user,
+                                         self.capability_negotiator.start())
+
+    def enable_auto_reconnect(self, **supervisor_options):
+        self.disable_auto_reconnect()
+        from client.connection_supervisor import ConnectionSupervisor
+        self.supervisor = ConnectionSupervisor(self, self.__irc_socket,
+                                               **supervisor_options)
+        self.supervisor.start()
+        return self.supervisor
+
+    def disable_auto_reconnect(self):
+        if self.supervisor is not None:
+            self.supervisor.stop()
+            self.supervisor = None
+
+    def enable_tls(self, transport_security=None, **security_options):
+        if transport_security is None:
+            from client.transport_security import TransportSecurity
+            transport_security = TransportSecurity(**security_options)
+        self.__irc_socket.transport_security = transport_security
+        return transport_security
+
+    def disable_tls(self):
+        self.__irc_socket.transport_security = None
+
     def set_user(self, user):
         self.connection_data.user = user
 
     def is_message_user_message(self, message):
-        return self.is_in_message_preamble(message, "PRIVMSG")
-
-    def is_in_message_preamble(self, message, pattern):
-        message_match = re.match(self.__message_splitting_compiled_regex,
-                                 message)
-        if message_match is None:
-            return False
-        message_preamble = message_match.group(0)
-        return message_preamble.find(pattern) != -1
+        return IRCMessage.parse(message).command == "PRIVMSG"
 
     def send_user_message(self, message, target='def'):
         if target == "def":
             target = self.connection_data.channel
-        message = "PRIVMSG {0} :{1}".format(target, message)
-        self.__irc_socket.send_message(message)
+        for text in IRCMessage.split_text(
+                message, self.message_bytes_budget(target)):
+            self.__irc_socket.send_message(
+                "PRIVMSG {0} :{1}".format(target, text))
+
+    def send_broadcast_message(self, targets, message):
+        max_targets = self.max_targets("PRIVMSG")
+        if max_targets is None:
+            max_targets = float('inf')
+        targets_groups = []
+        group_length = 0
+        for target in targets:
+            if not targets_groups or \
+                    len(targets_groups[-1]) >= max_targets or \
+                    group_length + len(target) >= \
+                    IRCClient.MAX_TARGETS_LENGTH:
+                targets_groups.append([])
+                group_length = 0
+            targets_groups[-1].append(target)
+            group_length += len(target) + 1
+        for targets_group in targets_groups:
+            joined_targets = ','.join(targets_group)
+            for text in IRCMessage.split_text(
+                    message, self.message_bytes_budget(joined_targets)):
+                self.__irc_socket.queue_message(
+                    "PRIVMSG {0} :{1}".format(joined_targets, text))
+                for target in targets_group:
+                    self.__irc_socket.echo_message(
+                        "PRIVMSG {0} :{1}".format(target, text))
+
+    def message_bytes_budget(self, target, command="PRIVMSG"):
+        user_host_length = IRCClient.DEFAULT_USER_HOST_LENGTH \
+            if self.own_user_host is None else len(self.own_user_host)
+        prefix_length = len(":{0}! {1} {2} :".format(
+            self.connection_data.user.username, command, target)
+            .encode("UTF-8")) + user_host_length
+        return IRCClient.MAX_LINE_BYTES - prefix_length
+
+    def max_targets(self, command):
+        for limit in self.server_features.get('TARGMAX', '').split(','):
+            limit_command, _, value = limit.partition(':')
+            if limit_command.upper() == command:
+                return int(value) if value.isdigit() else None
+        max_targets = self.server_features.get('MAXTARGETS', '')
+        return int(max_targets) if max_targets.isdigit() else 1
+
+    def enable_flood_control(self, rate=OutboundScheduler.RFC1459_RATE,
+                             burst=OutboundScheduler.RFC1459_BURST):
+        self.__irc_socket.set_flood_control(rate, burst)
+
+    def disable_flood_control(self):
+        self.__irc_socket.set_flood_control(None)
 
     def check_connection_data(self):
         server_is_not_empty = (not self.connection_data.server == "")
@@ -98,66 +243,456 @@ class IRCClient:
             self.status_update_handler.transmit(text)
 
     def handle_irc_message(self, text):  # pragma: no cover
-        if self.is_message_user_message(text):
-            if self.__irc_socket.joined_channel:
-                if self.chat_transmitter.can_transmit():
-                    self.chat_transmitter.transmit(text)
-                return
+        if self.stats is not None:
+            self.__handle_measured_irc_message(text)
+            return
+        message = IRCMessage.parse(text)
+        if message.tags and message.command != "BATCH" and \
+                self.batch_collector.collect(message):
+            return
+        message_handler = self.__message_handlers.get(message.command)
+        if message_handler is not None:
+            message_handler(message)
+
+    def __handle_measured_irc_message(self, text):
+        started_at = time.perf_counter()
+        message = IRCMessage.parse(text)
+        parsed_at = time.perf_counter()
+        if message.tags and message.command != "BATCH" and \
+                self.batch_collector.collect(message):
+            self.stats.observe('parse_seconds', parsed_at - started_at)
+            self.stats.increment('messages_handled', 1, "batched")
+            return
+        message_handler = self.__message_handlers.get(message.command)
+        if message_handler is not None:
+            message_handler(message)
+        handled_at = time.perf_counter()
+        command = message.command if message_handler is not None else "other"
+        self.stats.observe('parse_seconds', parsed_at - started_at)
+        self.stats.observe('dispatch_seconds', handled_at - parsed_at,
+                           command)
+        self.stats.increment('messages_handled', 1, command)
+
+    def enable_stats(self, stats=None):
+        if stats is None:
+            from monitoring.pipeline_stats import PipelineStats
+            stats = PipelineStats(self.connection_data.server)
+        self.stats = stats
+        self.__irc_socket.stats = stats
+        self.event_bus.set_stats(stats)
+        return stats
+
+    def disable_stats(self):
+        self.stats = None
+        self.__irc_socket.stats = None
+        self.event_bus.set_stats(None)
+
+    def start_capture(self, capture_path):
+        self.stop_capture()
+        from monitoring.traffic_capture import TrafficCapture
+        self.__irc_socket.capture = TrafficCapture(capture_path)
+        return self.__irc_socket.capture
+
+    def stop_capture(self):
+        capture = self.__irc_socket.capture
+        if capture is not None:
+            self.__irc_socket.capture = None
+            capture.close()
+
+    def probe_latency(self):
+        self.__irc_socket.queue_message("PING :{0}{1}".format(
+            IRCClient.LATENCY_PROBE_PREFIX, time.monotonic_ns()))
+
+    def is_own_message(self, message):
+        if message.prefix is None:
+            return True
+        username = self.connection_data.user.username
+        return message.nick is not None and \
+            message.nick.lower() == username.lower()
+
+    def is_connected_channel(self, channel_name):
+        return self.__irc_socket.is_channel_joined(channel_name)
+
+    def __handle_ping(self, message):
+        self.__irc_socket.ping(message.trailing)
+
+    def __handle_pong(self, message):
+        token = message.trailing or ''
+        if self.stats is None or \
+                not token.startswith(IRCClient.LATENCY_PROBE_PREFIX):
+            return
+        sent_at = token[len(IRCClient.LATENCY_PROBE_PREFIX):]
+        if sent_at.isdigit():
+            self.stats.observe('ping_round_trip_seconds',
+                               (time.monotonic_ns() - int(sent_at)) / 1e9)
+
+    def __handle_capabilities(self, message):
+        for line in self.capability_negotiator.handle(message):
+            self.__irc_socket.send_urgent_message(line)
+
+    def __handle_batch(self, message):
+        if message.target.startswith('+'):
+            self.batch_collector.open(message)
+        elif message.target.startswith('-'):
+            batch = self.batch_collector.close(message)
+            if batch is not None:
+                self.__handle_completed_batch(batch)
+
+    def __handle_completed_batch(self, batch):
+        if batch.batch_type in IRCClient.CHAT_HISTORY_BATCH_TYPES:
+            for message in batch.messages:
+                if isinstance(message, IRCMessage) and \
+                        message.command == "PRIVMSG":
+                    self.__remember_message_time(message)
+                    if self.chat_log_store is not None:
+                        self.__log_user_message(message)
         else:
-            if self.is_searching_for_names and \
-                    self.is_message_names_list(text) != -1:
-                if self.channel_names_transmitter.can_transmit():
-                    self.channel_names_transmitter.transmit(text)
+            self.__dispatch_batched_messages(batch)
+        if self.batch_transmitter.can_transmit():
+            self.batch_transmitter.transmit(batch)
+
+    def __dispatch_batched_messages(self, batch):
+        for message in batch.messages:
+            if not isinstance(message, IRCMessage):
+                self.__dispatch_batched_messages(message)
+                continue
+            message_handler = self.__message_handlers.get(message.command)
+            if message_handler is not None:
+                message_handler(message)
+
+    def __remember_message_time(self, message):
+        message_time = message.server_time()
+        if message_time is None:
+            return
+        channel_key = message.target.lower()
+        if message_time > self.last_message_times.get(channel_key, 0):
+            self.last_message_times[channel_key] = message_time
+
+    def request_history(self, channel_name, limit=None):
+        if not self.capability_negotiator.is_enabled("draft/chathistory"):
+            return False
+        if limit is None:
+            limit = self.history_limit
+        server_limit = self.server_features.get('CHATHISTORY', '')
+        if server_limit.isdigit() and int(server_limit) > 0:
+            limit = min(limit, int(server_limit))
+        last_time = self.last_message_times.get(channel_name.lower())
+        if last_time is None:
+            self.__irc_socket.queue_message("CHATHISTORY LATEST {0} * {1}"
+                                            .format(channel_name, limit))
+        else:
+            self.__irc_socket.queue_message(
+                "CHATHISTORY AFTER {0} timestamp={1} {2}".format(
+                    channel_name, IRCMessage.format_server_time(last_time),
+                    limit))
+        return True
+
+    def __handle_welcome(self, message):
+        self.is_registered = True
+        if self.__is_restoring_session:
+            self.__restore_session()
+        if self.on_registered is not None:
+            self.on_registered()
+
+    def __restore_session(self):
+        self.__is_restoring_session = False
+        self.__irc_socket.restore_session()
+        if self.is_searching_for_channels:
+            self.update_channels_list(force=True)
+
+    def __handle_nick_in_use(self, message):
+        if self.is_registered or len(message.params) < 2:
+            return
+        username = message.params[1] + '_'
+        self.connection_data.user.username = username
+        self.__irc_socket.send_urgent_message("NICK " + username)
+
+    def __handle_server_features(self, message):
+        for feature in message.params[1:-1]:
+            name, _, value = feature.partition('=')
+            if name.startswith('-'):
+                self.server_features.pop(name[1:], None)
+            else:
+                self.server_features[name] = value
+
+    def __handle_user_message(self, message):
+        if IRCClient.is_ctcp_request(message):
+            message_rules = self.message_rules
+            if message_rules is not None and \
+                    message_rules.is_ignored(message):
+                self.ignored_messages_count += 1
                 return
-            if text.find("JOIN") != -1 and text.find(
-                    self.__irc_socket.connected_channel_name) != -1:
-                self.is_searching_for_names = True
+            if self.ctcp_transmitter.can_transmit():
+                self.ctcp_transmitter.transmit(message)
+            return
+        if message.tags:
+            self.__remember_message_time(message)
+        message_rules = self.message_rules
+        if message_rules is not None:
+            verdict = message_rules.apply(message)
+            if verdict.is_ignored:
+                self.ignored_messages_count += 1
                 return
-            if self.is_searching_for_channels:
-                self.__collect_channels(text)
+            if verdict:
+                self.__transmit_verdict(message, verdict)
+        if self.chat_log_store is not None:
+            self.__log_user_message(message)
+        if self.__irc_socket.joined_channel and \
+                self.chat_transmitter.can_transmit():
+            self.chat_transmitter.transmit(message)
+
+    @staticmethod
+    def is_ctcp_request(message):
+        text = message.trailing
+        return len(text) > 1 and text[0] == '\x01' and \
+            not text.startswith('\x01ACTION ')
+
+    def __transmit_verdict(self, message, verdict):
+        if verdict.highlights and self.highlight_transmitter.can_transmit():
+            self.highlight_transmitter.transmit((verdict.highlights, message))
+        if self.routed_transmitter.can_transmit():
+            for route in verdict.routes:
+                self.routed_transmitter.transmit((route, message))
+
+    def set_message_rules(self, message_rules):
+        self.message_rules = message_rules
+
+    def reload_message_rules(self, rules_path):
+        from client.message_rules import MessageRules
+
+        def load_rules():
+            try:
+                message_rules = MessageRules.load(rules_path)
+            except (OSError, ValueError):
+                self.update_status("E: COULD NOT RELOAD RULES")
+            else:
+                self.message_rules = message_rules
+                self.update_status("S: RULES RELOADED")
+        loading_thread = thr.Thread(target=load_rules, daemon=True)
+        loading_thread.start()
+        return loading_thread
+
+    def __log_user_message(self, message):
+        nick = message.nick
+        if message.prefix is None:
+            nick = self.connection_data.user.username
+        channel_name = message.target
+        if not self.is_connected_channel(channel_name) and \
+                message.nick is not None:
+            channel_name = message.nick
+        self.chat_log_store.append(self.connection_data.server,
+                                   channel_name, nick, message.trailing,
+                                   message.server_time())
+
+    def __handle_join(self, message):
+        if self.is_own_message(message):
+            if message.prefix is not None and '!' in message.prefix:
+                self.own_user_host = message.prefix.partition('!')[2]
+            if self.is_connected_channel(message.target):
+                self.is_searching_for_names = True
+                self.__create_roster(message.target)
+                self.request_history(message.target)
+            return
+        roster = self.get_roster(message.target)
+        if roster is not None:
+            roster.add(message.nick)
+
+    def __handle_part(self, message):
+        self.__remove_member(message.target, message.nick)
+
+    def __handle_kick(self, message):
+        if len(message.params) > 1:
+            self.__remove_member(message.target, message.params[1])
 
-    def is_message_names_list(self, message):
-        preamble_type_1 = "@ " + self.__irc_socket.connected_channel_name
-        preamble_type_2 = "= " + self.__irc_socket.connected_channel_name
-        return self.is_in_message_preamble(message, preamble_type_1) or \
-               self.is_in_message_preamble(message, preamble_type_2)
+    def __remove_member(self, channel_name, nick):
+        if nick is None:
+            return
+        if nick.lower() == self.connection_data.user.username.lower():
+            self.rosters.pop(channel_name.lower(), None)
+            return
+        roster = self.get_roster(channel_name)
+        if roster is not None:
+            roster.remove(nick)
+
+    def __handle_quit(self, message):
+        if message.nick is None:
+            return
+        for roster in self.rosters.values():
+            roster.remove(message.nick)
+
+    def __handle_nick(self, message):
+        if message.nick is None:
+            return
+        if self.is_own_message(message):
+            self.connection_data.user.username = message.trailing
+        for roster in self.rosters.values():
+            roster.rename(message.nick, message.trailing)
+
+    def __handle_mode(self, message):
+        roster = self.get_roster(message.target)
+        if roster is None or len(message.params) < 2:
+            return
+        list_modes, always_modes, set_modes, _ = self.__get_modes_types()
+        arguments = iter(message.params[2:])
+        is_enabled = True
+        for mode in message.params[1]:
+            if mode in '+-':
+                is_enabled = mode == '+'
+            elif mode in roster.prefix_modes:
+                nick = next(arguments, None)
+                if nick is not None:
+                    roster.set_mode(nick, mode, is_enabled)
+            elif mode in list_modes or mode in always_modes or \
+                    (is_enabled and mode in set_modes):
+                next(arguments, None)
+
+    def __get_modes_types(self):
+        channel_modes = self.server_features.get(
+            'CHANMODES', IRCClient.DEFAULT_CHANNEL_MODES)
+        return (channel_modes.split(',') + [''] * 4)[:4]
+
+    def get_roster(self, channel_name):
+        return self.rosters.get(channel_name.lower())
+
+    def __create_roster(self, channel_name):
+        roster = ChannelRoster(channel_name, self.server_features.get(
+            'PREFIX', ChannelRoster.DEFAULT_PREFIX_FEATURE))
+        roster.change_receiver = \
+            lambda change: self.__transmit_roster_change(channel_name, change)
+        self.rosters[channel_name.lower()] = roster
+        return roster
+
+    def __transmit_roster_change(self, channel_name, change):
+        if self.roster_transmitter.can_transmit():
+            self.roster_transmitter.transmit((channel_name, change))
+
+    def __handle_names(self, message):
+        if len(message.params) < 4:
+            return
+        roster = self.get_roster(message.params[2])
+        if roster is not None:
+            roster.add_names(message.trailing)
+        if self.is_searching_for_names and \
+                self.is_connected_channel(message.params[2]) and \
+                self.channel_names_transmitter.can_transmit():
+            self.channel_names_transmitter.transmit(message)
+
+    def __handle_names_end(self, message):
+        self.is_searching_for_names = False
+        if len(message.params) > 1:
+            roster = self.get_roster(message.params[1])
+            if roster is not None:
+                roster.end_names()
 
     def connect_to_server(self, server_name, server_port):
         self.connection_data.server = server_name
         self.connection_data.port = server_port
-        if self.__socket_thread.is_alive():
+        if self.__socket_thread is not None and \
+                self.__socket_thread.is_alive():
             return
-        else:
-            self.__socket_thread.start()
+        self.__socket_thread = thr.Thread(target=self.__connect_socket)
+        self.__socket_thread.start()
 
     def connect_to_channel(self, channel_name):
         self.connection_data.channel = channel_name
         self.__irc_socket.join_channel(channel_name)
 
+    def connect_to_channels(self, channels_names):
+        if not channels_names:
+            return
+        self.connection_data.channel = channels_names[-1]
+        self.__irc_socket.join_channels(channels_names)
+
+    def leave_channel(self, channel_name):
+        self.__irc_socket.part_channel(channel_name)
+
+    def joined_channels(self):
+        return list(self.__irc_socket.joined_channels.values())
+
+    def send_raw_message(self, message):
+        self.__irc_socket.queue_message(message)
+
+    def send_ctcp_message(self, target, text):
+        self.__irc_socket.queue_message(
+            "PRIVMSG {0} :\x01{1}\x01".format(target, text))
+
+    def local_address(self):
+        return self.__irc_socket.local_address()
+
+    def is_connected(self):
+        return self.__irc_socket.connected
+
     def disconnect(self):
+        self.disable_auto_reconnect()
         self.__irc_socket.disconnect()
-        if self.__socket_thread.is_alive():
+        if self.__socket_thread is not None and \
+                self.__socket_thread.is_alive() and \
+                self.__socket_thread is not thr.current_thread():
             self.__socket_thread.join()
 
-    def update_channels_list(self):
-        self.__irc_socket.get_channels_list()
-        self.is_searching_for_channels = True
+    def close(self):
+        self.disconnect()
+        self.event_bus.close()
 
-    def __collect_channels(self, channel_data):
-        channel_match = re.fullmatch(self.__channel_compiled_regex,
-                                     channel_data)
-
-        if channel_match is None:
+    def update_channels_list(self, force=False, min_users=None):
+        directory = self.get_channel_directory()
+        if not force and directory.is_fresh():
+            self.is_searching_for_channels = True
+            self.__transmit_directory(directory, min_users)
+            self.is_searching_for_channels = False
             return
 
-        if channel_match.group(1).startswith('Channel'):
+        list_filters = directory.build_list_filters(
+            self.server_features.get('ELIST', ''), min_users)
+        self.__pending_list_replies_count = len(list_filters)
+        self.__list_min_users = min_users
+        self.is_searching_for_channels = True
+        for list_filter in list_filters:
+            self.__irc_socket.get_channels_list(list_filter)
+
+    def __transmit_directory(self, directory, min_users):
+        for channel_info in directory.filter(min_users=min_users):
+            if self.channel_data_handler.can_transmit():
+                self.channel_data_handler.transmit(channel_info)
+
+    def get_channel_directory(self):
+        server_name = self.connection_data.server
+        if self.channel_directory is None or \
+                self.channel_directory.server_name != server_name:
+            from storage.channel_directory import ChannelDirectory
+            self.channel_directory = ChannelDirectory.for_server(
+                server_name, self.channel_snapshots_directory)
+        return self.channel_directory
+
+    def __handle_channel_data(self, message):
+        if not self.is_searching_for_channels or len(message.params) < 3:
             return
 
-        if channel_match.group(1).startswith(':End'):
-            self.is_searching_for_channels = False
-
-        channel_info = ChannelInfo(channel_match.group(1),
-                                   channel_match.group(2),
-                                   channel_match.group(3)[1:])
+        channel_topic = message.params[3] if len(message.params) > 3 else ''
+        users_count = message.params[2]
+        channel_info = ChannelInfo(message.params[1],
+                                   int(users_count)
+                                   if users_count.isdigit() else 0,
+                                   channel_topic)
+        directory = self.get_channel_directory()
+        directory.add_channel(channel_info)
+        if directory.is_incremental_refresh or \
+                (self.__list_min_users is not None and
+                 channel_info.users_count < self.__list_min_users):
+            return
         if self.channel_data_handler.can_transmit():
             self.channel_data_handler.transmit(channel_info)
+
+    def __handle_channels_list_end(self, message):
+        if self.__pending_list_replies_count > 1:
+            self.__pending_list_replies_count -= 1
+            return
+        self.__pending_list_replies_count = 0
+        directory = self.get_channel_directory()
+        is_incremental_refresh = directory.is_incremental_refresh
+        directory.finish_refresh()
+        if is_incremental_refresh:
+            self.__transmit_directory(directory, self.__list_min_users)
+        self.is_searching_for_channels = False
+        if self.on_channels_listed is not None:
+            self.on_channels_listed()
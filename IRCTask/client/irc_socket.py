@@ -1,29 +1,56 @@
+import select
 import socket
+import ssl
 import threading
+import time
 
-from queue import Queue
+from client.dual_stack_connector import DualStackConnector
+from client.line_framer import LineFramer
+from client.outbound_scheduler import OutboundScheduler
+
+
+class SecureConnectionError(ValueError):
+    pass
 
 
 class IRCSocket:
+    MAX_LINE_LENGTH = 510
+    SECURE_IO_TIMEOUT = 0.05
 
     def __init__(self):
         self.__server_data = '', 0
-        self.__socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.__socket = None
         self.connected = False
         self.joined_channel = False
         self.connected_channel_name = "NONE"
-        self._messages_queue = Queue()
+        self.joined_channels = {}
+        self._messages_queue = OutboundScheduler()
+        self.__line_framer = LineFramer()
         self.output_receiver = None
-        self.__reading_thread = threading.Thread(target=self.read_messages)
-        self.__writing_thread = threading.Thread(target=self.write_messages)
+        self.stats = None
+        self.capture = None
+        self.__collected_enqueued_at = []
+        self.__reading_thread = None
+        self.__writing_thread = None
+        self.__unsent_data = []
+        self.__is_connection_lost = False
+        self.__is_writing_held = False
+        self.__connection_lock = threading.Lock()
+        self.__direct_sending_lock = threading.Lock()
+        self.__secure_io_lock = None
+        self.on_connection_lost = None
+        self.last_received_at = None
         self.user = None
+        self.transport_security = None
+        self.is_session_reused = False
 
     def set_server_data(self, server_name, server_port):
         self.__server_data = server_name, server_port
 
-    def connect_to_server(self):
+    def connect_to_server(self, is_resuming=False):
+        self.__join_threads()
         try:
-            self.__socket.connect(self.__server_data)
+            self.__socket = DualStackConnector.connect(*self.__server_data)
         except socket.timeout:
             raise socket.timeout
         except socket.gaierror:
@@ -33,73 +60,317 @@ class IRCSocket:
         except Exception as e:
             raise e
         else:
+            self.__secure_io_lock = None
+            if self.transport_security is not None:
+                self.__secure_socket()
+            if not is_resuming:
+                self.__unsent_data = []
+            self._messages_queue.resume()
+            self.__line_framer = LineFramer()
+            self.__is_connection_lost = False
+            self.last_received_at = time.monotonic()
             self.connected = True
+            self.__reading_thread = threading.Thread(
+                target=self.read_messages)
             self.__reading_thread.start()
-            self.__writing_thread.start()
+            self.__is_writing_held = is_resuming
+            if not is_resuming:
+                self.__start_writing()
+
+    def __secure_socket(self):
+        server_name, server_port = self.__server_data
+        try:
+            self.__socket = self.transport_security.wrap(
+                self.__socket, server_name, server_port)
+        except (OSError, ValueError) as error:
+            self.__socket.close()
+            raise SecureConnectionError(str(error))
+        self.is_session_reused = self.__socket.session_reused
+        self.__socket.settimeout(IRCSocket.SECURE_IO_TIMEOUT)
+        self.__secure_io_lock = threading.Lock()
+
+    def __remember_tls_session(self):
+        if self.transport_security is not None and \
+                hasattr(self.__socket, 'session_reused'):
+            self.transport_security.remember_session(
+                self.__socket, *self.__server_data)
 
-    def send_user_data(self, user):
+    def resume_writing(self, leading_lines=()):
+        if not self.__is_writing_held:
+            return
+        with self.__direct_sending_lock:
+            self.__is_writing_held = False
+            leading_data = b''.join(bytes(line + '\r\n', "UTF-8")
+                                    for line in leading_lines)
+            if leading_data:
+                self.__unsent_data.insert(0, leading_data)
+            self.__start_writing()
+
+    def restore_session(self):
+        self.resume_writing(IRCSocket.build_join_lines(
+            list(self.joined_channels.values())))
+
+    def unsent_bytes_count(self):
+        return sum(len(data) for data in self.__unsent_data)
+
+    def send_user_data(self, user, leading_lines=()):
         self.user = user
-        self.__socket.send(bytes("USER {0} {0} {0} {1} \n"
-                                 .format(user.username, user.real_name),
-                                 "UTF-8"))
-        self.__socket.send(bytes("NICK {} \n".format(user.username), "UTF-8"))
+        user_data = bytes(''.join(line + '\r\n' for line in leading_lines) +
+                          "USER {0} {0} {0} {1}\r\n"
+                          .format(user.username, user.real_name), "UTF-8")
+        nick_data = bytes("NICK {}\r\n".format(user.username), "UTF-8")
+        if self.capture is not None:
+            self.capture.record_outbound(user_data + nick_data)
+        with self.__direct_sending_lock:
+            self.__send_all(user_data)
+            self.__send_all(nick_data)
 
     def join_channel(self, channel_name):
+        self.join_channels([channel_name])
+
+    def join_channels(self, channels_names):
         if not self.connected:
             raise ValueError("Connect to server first!")
 
-        self.__socket.send(bytes("JOIN {} \n".format(channel_name), "UTF-8"))
-        self.joined_channel = True
-        self.connected_channel_name = channel_name
+        for join_line in IRCSocket.build_join_lines(channels_names):
+            self.queue_message(join_line)
+        for channel_name in channels_names:
+            self.joined_channels[channel_name.lower()] = channel_name
+            self.connected_channel_name = channel_name
+        self.joined_channel = len(self.joined_channels) > 0
+
+    def part_channel(self, channel_name):
+        if not self.connected:
+            raise ValueError("Connect to server first!")
+
+        self.queue_message("PART {}".format(channel_name))
+        self.joined_channels.pop(channel_name.lower(), None)
+        self.joined_channel = len(self.joined_channels) > 0
+
+    def local_address(self):
+        if self.__socket is None:
+            return None
+        try:
+            return self.__socket.getsockname()[0]
+        except OSError:
+            return None
+
+    def is_channel_joined(self, channel_name):
+        return channel_name.lower() in self.joined_channels
+
+    @staticmethod
+    def build_join_lines(channels_names):
+        join_lines = []
+        line_channels = []
+        line_length = len("JOIN ")
+        for channel_name in channels_names:
+            if line_channels and line_length + len(channel_name) + 1 > \
+                    IRCSocket.MAX_LINE_LENGTH:
+                join_lines.append("JOIN " + ','.join(line_channels))
+                line_channels = []
+                line_length = len("JOIN ")
+            line_channels.append(channel_name)
+            line_length += len(channel_name) + 1
+        if line_channels:
+            join_lines.append("JOIN " + ','.join(line_channels))
+        return join_lines
 
     def write_messages(self):
+        if self.__unsent_data:
+            unsent_data = b''.join(self.__unsent_data)
+            self.__unsent_data = []
+            if not self.__send_data(unsent_data):
+                self.__unsent_data.insert(0, unsent_data)
+                return
+        while True:
+            data, is_stopping = self.collect_pending_data()
+            if data and (self.__is_connection_lost or
+                         not self.__send_data(data)):
+                self.__unsent_data.append(data)
+            if self.__is_connection_lost or is_stopping:
+                break
+
+    def __send_data(self, data):
+        if self.capture is not None:
+            self.capture.record_outbound(data)
+        try:
+            self.__send_all(data)
+        except OSError:
+            self.drop_connection()
+            return False
+        if self.stats is not None:
+            self.__record_sent_data(data)
+        return True
+
+    def __send_all(self, data):
+        if self.__secure_io_lock is None:
+            self.__socket.sendall(data)
+            return
+        data_view = memoryview(data)
+        while len(data_view) > 0:
+            with self.__secure_io_lock:
+                try:
+                    sent_count = self.__socket.send(data_view)
+                except (socket.timeout, ssl.SSLWantWriteError,
+                        ssl.SSLWantReadError):
+                    sent_count = 0
+            if sent_count == 0:
+                select.select([], [self.__socket], [],
+                              IRCSocket.SECURE_IO_TIMEOUT)
+            data_view = data_view[sent_count:]
+
+    def __receive(self):
+        if self.__secure_io_lock is None:
+            return self.__line_framer.receive_from(self.__socket)
         while self.connected:
-            if not self._messages_queue.empty():
-                self._messages_queue.get()()
+            try:
+                if not self.__socket.pending() and not select.select(
+                        [self.__socket], [], [],
+                        IRCSocket.SECURE_IO_TIMEOUT)[0]:
+                    continue
+            except ValueError:
+                return 0
+            with self.__secure_io_lock:
+                try:
+                    return self.__line_framer.receive_from(self.__socket)
+                except (socket.timeout, ssl.SSLWantReadError,
+                        ssl.SSLWantWriteError):
+                    pass
+        return 0
+
+    def collect_pending_data(self):
+        entries, is_stopping = self._messages_queue.wait_and_take()
+        if self.stats is not None:
+            self.__collected_enqueued_at.extend(
+                enqueued_at for _, enqueued_at in entries)
+        return b''.join(data for data, _ in entries), is_stopping
+
+    def set_flood_control(self, rate=OutboundScheduler.RFC1459_RATE,
+                          burst=OutboundScheduler.RFC1459_BURST):
+        self._messages_queue.set_rate_limit(rate, burst)
 
     def read_messages(self):
-        buffer = ''
         while self.connected:
-            irc_message = self.__socket.recv(2048).decode("UTF-8",
-                                                          errors='replace')
+            try:
+                received_count = self.__receive()
+            except OSError:
+                received_count = 0
             if not self.connected:
                 break
-            buffer += irc_message
-            messages = buffer.split('\r\n')
-            for raw_message in messages[:-1]:
+            if received_count == 0:
+                self.drop_connection()
+                break
+            self.last_received_at = time.monotonic()
+            if self.capture is not None:
+                self.capture.record_inbound(
+                    self.__line_framer.received_data(received_count))
+            lines_count = 0
+            for raw_message in self.__line_framer.lines():
+                lines_count += 1
                 self.handle_message(raw_message)
-                if raw_message.find("PING :") != -1:
-                    self.ping()
-            buffer = ''
-            buffer += messages[-1]
+            if self.stats is not None:
+                self.stats.increment('bytes_received', received_count)
+                self.stats.increment('lines_received', lines_count)
+
+    def __record_sent_data(self, data):
+        now = time.monotonic()
+        lines_count = data.count(b'\n')
+        self.stats.increment('bytes_sent', len(data))
+        self.stats.increment('lines_sent', lines_count)
+        self.stats.set_gauge('outbound_queue_depth',
+                             len(self._messages_queue))
+        for enqueued_at in self.__collected_enqueued_at:
+            self.stats.observe('outbound_wait_seconds', now - enqueued_at)
+        self.__collected_enqueued_at = []
 
-    def get_channels_list(self):
-        self.send_message('LIST')
+    def get_channels_list(self, list_filter=''):
+        self.send_message(('LIST ' + list_filter).rstrip())
 
     def get_users_list(self):
         self.send_message('NAMES ' + self.connected_channel_name)
 
     def is_message_queue_empty(self):
-        return self._messages_queue.empty()
+        return len(self._messages_queue) == 0
 
     def handle_message(self, message):
-        print(message)
         if self.output_receiver is not None:
             self.output_receiver(message)
 
     def send_message(self, message):
-        self._messages_queue.put(lambda: self.__socket.send(
-            bytes(message + '\n', "UTF-8")))
+        self.queue_message(message)
+        self.echo_message(message)
+
+    def echo_message(self, message):
+        if self.capture is not None:
+            self.capture.record_echo(message)
         self.handle_message(message)
 
-    def ping(self):
-        self.send_message("PONG :pingisn")
+    def queue_message(self, message):
+        self._messages_queue.put(bytes(message + '\r\n', "UTF-8"))
+        if self.stats is not None:
+            self.stats.set_gauge('outbound_queue_depth',
+                                 len(self._messages_queue))
+
+    def ping(self, token="pingisn"):
+        self.send_urgent_message("PONG :" + token)
+        self.handle_message("PONG :" + token)
+
+    def send_urgent_message(self, message):
+        data = bytes(message + '\r\n', "UTF-8")
+        with self.__direct_sending_lock:
+            if not self.__is_writing_held:
+                self.queue_message(message)
+                return
+            if self.capture is not None:
+                self.capture.record_outbound(data)
+            try:
+                self.__send_all(data)
+            except OSError:
+                self.drop_connection()
+
+    def drop_connection(self):
+        with self.__connection_lock:
+            if not self.connected or self.__is_connection_lost:
+                return
+            self.__is_connection_lost = True
+            self.connected = False
+        if self.__secure_io_lock is None:
+            self.__shut_down_socket()
+        else:
+            with self.__secure_io_lock:
+                self.__shut_down_socket()
+        self._messages_queue.put(None)
+        if self.on_connection_lost is not None:
+            self.on_connection_lost()
+
+    def __shut_down_socket(self):
+        self.__remember_tls_session()
+        try:
+            self.__socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
 
     def disconnect(self):
         if self.connected:
             self.send_message("QUIT")
             self.connected = False
-        if self.__reading_thread.is_alive():
-            self.__reading_thread.join()
-        if self.__writing_thread.is_alive():
-            self.__writing_thread.join()
+            self._messages_queue.put(None)
+            if self.__is_writing_held:
+                self.__is_writing_held = False
+                self.__start_writing()
+        self.__join_threads()
+        self.__unsent_data = []
+        self._messages_queue.clear()
+        if self.__socket is not None:
+            self.__remember_tls_session()
+            self.__socket.close()
+
+    def __start_writing(self):
+        self.__writing_thread = threading.Thread(target=self.write_messages)
+        self.__writing_thread.start()
+
+    def __join_threads(self):
+        for thread in (self.__reading_thread, self.__writing_thread):
+            if thread is not None and thread.is_alive() and \
+                    thread is not threading.current_thread():
+                thread.join()
@@ -0,0 +1,73 @@
+class LineFramer:
+    BUFFER_SIZE = 65536
+    LINE_END = b'\n'
+
+    def __init__(self, buffer_size=BUFFER_SIZE, encoding="UTF-8",
+                 fallback_encoding="latin-1"):
+        self.encoding = encoding
+        self.fallback_encoding = fallback_encoding
+        self.__buffer = bytearray(buffer_size)
+        self.__view = memoryview(self.__buffer)
+        self.__start = 0
+        self.__end = 0
+        self.__is_discarding = False
+
+    def receive_from(self, source_socket):
+        self.__make_room()
+        received = source_socket.recv_into(self.__view[self.__end:])
+        self.__end += received
+        return received
+
+    def received_data(self, received_count):
+        return bytes(self.__view[self.__end - received_count:self.__end])
+
+    def feed(self, data):
+        data_view = memoryview(data)
+        while len(data_view) > 0:
+            self.__make_room()
+            chunk_size = min(len(data_view), len(self.__buffer) - self.__end)
+            self.__view[self.__end:self.__end + chunk_size] = \
+                data_view[:chunk_size]
+            self.__end += chunk_size
+            data_view = data_view[chunk_size:]
+            yield from self.lines()
+
+    def lines(self):
+        while self.__start < self.__end:
+            line_end = self.__buffer.find(LineFramer.LINE_END,
+                                          self.__start, self.__end)
+            if line_end == -1:
+                break
+            line_start = self.__start
+            self.__start = line_end + 1
+            if self.__is_discarding:
+                self.__is_discarding = False
+                continue
+            if line_end > line_start and \
+                    self.__buffer[line_end - 1] == ord('\r'):
+                line_end -= 1
+            if line_end > line_start:
+                yield self.decode(self.__view[line_start:line_end])
+        if self.__start == self.__end:
+            self.__start = self.__end = 0
+
+    def pending_bytes_count(self):
+        return self.__end - self.__start
+
+    def decode(self, raw_line):
+        try:
+            return str(raw_line, self.encoding)
+        except UnicodeDecodeError:
+            return str(raw_line, self.fallback_encoding, errors='replace')
+
+    def __make_room(self):
+        if self.__end < len(self.__buffer):
+            return
+        if self.__start == 0:
+            self.__end = 0
+            self.__is_discarding = True
+            return
+        pending_count = self.__end - self.__start
+        self.__view[:pending_count] = self.__view[self.__start:self.__end]
+        self.__start = 0
+        self.__end = pending_count
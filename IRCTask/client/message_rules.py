@@ -0,0 +1,164 @@
+import re
+
+
+class RuleVerdict:
+    __slots__ = ('is_ignored', 'highlights', 'routes')
+
+    def __init__(self, is_ignored=False, highlights=(), routes=()):
+        self.is_ignored = is_ignored
+        self.highlights = highlights
+        self.routes = routes
+
+    def __bool__(self):
+        return self.is_ignored or bool(self.highlights or self.routes)
+
+
+class MessageRules:
+    HIGHLIGHT = "highlight"
+    KEYWORD = "keyword"
+    IGNORE = "ignore"
+    NO_MATCH = RuleVerdict()
+    IGNORED = RuleVerdict(is_ignored=True)
+
+    def __init__(self, highlights=(), keywords=(), ignores=()):
+        self.__actions = {}
+        for word in highlights:
+            self.__add_action(word, None)
+        for word, route in keywords:
+            self.__add_action(word, route)
+        self.__text_regex = None
+        if self.__actions:
+            self.__text_regex = re.compile(
+                r'(?<!\w)' + MessageRules.words_pattern(self.__actions) +
+                r'(?!\w)', re.IGNORECASE)
+
+        self.__ignored_masks = set()
+        self.__ignored_nicks = set()
+        self.__ignored_hosts = set()
+        glob_patterns = []
+        for mask in ignores:
+            self.__add_ignore(mask.lower(), glob_patterns)
+        self.__ignore_regex = None
+        if glob_patterns:
+            self.__ignore_regex = re.compile(
+                '(?:' + '|'.join(glob_patterns) + r')\Z', re.IGNORECASE)
+        self.rules_count = len(self.__actions) + len(glob_patterns) + \
+            len(self.__ignored_masks) + len(self.__ignored_nicks) + \
+            len(self.__ignored_hosts)
+
+    def __add_action(self, word, route):
+        word = word.strip().lower()
+        if not word:
+            return
+        is_highlight, routes = self.__actions.get(word, (False, ()))
+        if route is None:
+            is_highlight = True
+        elif route not in routes:
+            routes += (route,)
+        self.__actions[word] = is_highlight, routes
+
+    def __add_ignore(self, mask, glob_patterns):
+        if '!' not in mask and '@' not in mask:
+            mask += '!*@*'
+        nick, _, user_host = mask.partition('!')
+        user, _, host = user_host.partition('@')
+        if not any(char in mask for char in '*?'):
+            self.__ignored_masks.add(mask)
+        elif user == '*' and host == '*' and \
+                not any(char in nick for char in '*?'):
+            self.__ignored_nicks.add(nick)
+        elif nick == '*' and user == '*' and \
+                not any(char in host for char in '*?'):
+            self.__ignored_hosts.add(host)
+        else:
+            glob_patterns.append(MessageRules.glob_pattern(mask))
+
+    @staticmethod
+    def glob_pattern(mask):
+        return ''.join('.*' if char == '*' else '.' if char == '?'
+                       else re.escape(char) for char in mask)
+
+    @staticmethod
+    def words_pattern(words):
+        trie = {}
+        for word in words:
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[''] = None
+        return MessageRules.__trie_pattern(trie)
+
+    @staticmethod
+    def __trie_pattern(node):
+        alternatives = [re.escape(char) + MessageRules.__trie_pattern(child)
+                        for char, child in sorted(node.items()) if char]
+        if not alternatives:
+            return ''
+        if '' in node:
+            return '(?:' + '|'.join(alternatives) + ')?'
+        if len(alternatives) == 1:
+            return alternatives[0]
+        return '(?:' + '|'.join(alternatives) + ')'
+
+    @staticmethod
+    def parse(lines):
+        highlights = []
+        keywords = []
+        ignores = []
+        for line_number, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            kind, _, rest = line.partition(' ')
+            kind = kind.lower()
+            rest = rest.strip()
+            if kind == MessageRules.HIGHLIGHT and rest:
+                highlights.append(rest)
+            elif kind == MessageRules.KEYWORD and ' ' in rest:
+                route, _, word = rest.partition(' ')
+                keywords.append((word.strip(), route))
+            elif kind == MessageRules.IGNORE and rest:
+                ignores.append(rest)
+            else:
+                raise ValueError("Wrong rule on line {0}: {1}".format(
+                    line_number, line))
+        return MessageRules(highlights, keywords, ignores)
+
+    @staticmethod
+    def load(path):
+        with open(path, encoding="UTF-8") as rules_file:
+            return MessageRules.parse(rules_file)
+
+    def is_ignored(self, message):
+        if message.prefix is None:
+            return False
+        mask = message.prefix.lower()
+        if mask in self.__ignored_masks:
+            return True
+        nick, _, host = mask.partition('!')
+        if nick in self.__ignored_nicks or \
+                host.partition('@')[2] in self.__ignored_hosts:
+            return True
+        return self.__ignore_regex is not None and \
+            self.__ignore_regex.match(mask) is not None
+
+    def apply(self, message):
+        if self.is_ignored(message):
+            return MessageRules.IGNORED
+        if self.__text_regex is None:
+            return MessageRules.NO_MATCH
+        highlights = []
+        routes = []
+        for match in self.__text_regex.finditer(message.trailing):
+            action = self.__actions.get(match.group().lower())
+            if action is None:
+                continue
+            is_highlight, word_routes = action
+            if is_highlight:
+                highlights.append(match.group())
+            for route in word_routes:
+                if route not in routes:
+                    routes.append(route)
+        if not highlights and not routes:
+            return MessageRules.NO_MATCH
+        return RuleVerdict(False, tuple(highlights), tuple(routes))
@@ -0,0 +1,136 @@
+import collections
+import threading
+import time
+
+
+class TokenBucket:
+
+    def __init__(self, rate, burst, clock=time.monotonic):
+        if rate <= 0 or burst < 1:
+            raise ValueError("Rate should be positive and burst at least 1!")
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = burst
+        self.__updated_at = clock()
+
+    def refill(self):
+        now = self.clock()
+        self.tokens = min(self.burst,
+                          self.tokens + (now - self.__updated_at) * self.rate)
+        self.__updated_at = now
+
+    def delay(self, cost=1):
+        self.refill()
+        if self.tokens >= cost:
+            return 0
+        return (cost - self.tokens) / self.rate
+
+    def consume(self, cost=1):
+        self.refill()
+        self.tokens -= cost
+
+
+class OutboundScheduler:
+    URGENT = 0
+    CONTROL = 1
+    CHAT = 2
+    URGENT_COMMANDS = frozenset(("PONG", "PING", "QUIT"))
+    CHAT_COMMANDS = frozenset(("PRIVMSG", "NOTICE", "TAGMSG"))
+    RFC1459_RATE = 0.5
+    RFC1459_BURST = 5
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.bucket = None
+        self.throttled_count = 0
+        self.__lanes = (collections.deque(), collections.deque(),
+                        collections.deque())
+        self.__is_stopping = False
+        self.__condition = threading.Condition()
+
+    def __len__(self):
+        return sum(len(lane) for lane in self.__lanes)
+
+    def lanes_sizes(self):
+        return tuple(len(lane) for lane in self.__lanes)
+
+    def set_rate_limit(self, rate=RFC1459_RATE, burst=RFC1459_BURST):
+        with self.__condition:
+            self.bucket = None if rate is None else \
+                TokenBucket(rate, burst, self.clock)
+            self.__condition.notify_all()
+
+    @staticmethod
+    def classify(data):
+        start = 0
+        if data[:1] in (b'@', b':'):
+            start = data.find(b' ') + 1
+            if data[:1] == b'@' and data[start:start + 1] == b':':
+                start = data.find(b' ', start) + 1
+        end = start
+        while end < len(data) and data[end] not in b' \r\n':
+            end += 1
+        command = data[start:end].upper().decode("ascii", "replace")
+        if command in OutboundScheduler.URGENT_COMMANDS:
+            return OutboundScheduler.URGENT
+        if command in OutboundScheduler.CHAT_COMMANDS:
+            return OutboundScheduler.CHAT
+        return OutboundScheduler.CONTROL
+
+    def put(self, data, lane=None):
+        with self.__condition:
+            if data is None:
+                self.__is_stopping = True
+            else:
+                if lane is None:
+                    lane = OutboundScheduler.classify(data)
+                self.__lanes[lane].append((data, self.clock()))
+            self.__condition.notify_all()
+
+    def resume(self):
+        with self.__condition:
+            self.__is_stopping = False
+
+    def clear(self):
+        with self.__condition:
+            for lane in self.__lanes:
+                lane.clear()
+
+    def take(self):
+        with self.__condition:
+            return self.__take()
+
+    def wait_and_take(self):
+        with self.__condition:
+            while True:
+                entries, delay = self.__take()
+                if entries or self.__is_stopping:
+                    return entries, self.__is_stopping
+                self.__condition.wait(delay or None)
+
+    def __take(self):
+        entries = list(self.__lanes[OutboundScheduler.URGENT])
+        urgent_count = len(entries)
+        self.__lanes[OutboundScheduler.URGENT].clear()
+        if self.bucket is not None and not self.__is_stopping:
+            self.bucket.consume(urgent_count)
+        delay = 0
+        for lane in self.__lanes[OutboundScheduler.CONTROL:]:
+            while lane and delay == 0:
+                if self.bucket is not None:
+                    delay = self.bucket.delay()
+                    if delay > 0:
+                        self.throttled_count += 1
+                        break
+                    self.bucket.consume()
+                entries.append(lane.popleft())
+        if self.__is_stopping:
+            if self.bucket is not None:
+                self.bucket.consume(urgent_count)
+            entries.sort(key=OutboundScheduler.__is_quit_entry)
+        return entries, delay
+
+    @staticmethod
+    def __is_quit_entry(entry):
+        return entry[0][:4].upper() == b'QUIT'
@@ -0,0 +1,111 @@
+import threading
+
+from client.irc_client import IRCClient
+
+
+class SessionManager:
+    ALL_CHANNELS = None
+
+    def __init__(self, client_factory=IRCClient):
+        self.__client_factory = client_factory
+        self.__clients = {}
+        self.__pending_channels = {}
+        self.__subscribers = {}
+        self.__lock = threading.Lock()
+
+    def add_server(self, server_name, server_port, user):
+        with self.__lock:
+            if server_name in self.__clients:
+                return self.__clients[server_name]
+            client = self.__client_factory()
+            self.__clients[server_name] = client
+            self.__pending_channels[server_name] = []
+
+        client.set_user(user)
+        client.chat_transmitter.connect_receiver(
+            lambda message: self.__route_message(server_name, message))
+        client.on_registered = \
+            lambda: self.__join_pending_channels(server_name)
+        client.connect_to_server(server_name, server_port)
+        return client
+
+    def get_client(self, server_name):
+        return self.__clients.get(server_name)
+
+    def servers(self):
+        return list(self.__clients)
+
+    def join_channel(self, server_name, channel_name):
+        self.join_channels(server_name, [channel_name])
+
+    def join_channels(self, server_name, channels_names):
+        client = self.__get_existing_client(server_name)
+        with self.__lock:
+            if not client.is_registered:
+                self.__pending_channels[server_name].extend(channels_names)
+                return
+        client.connect_to_channels(channels_names)
+
+    def leave_channel(self, server_name, channel_name):
+        self.__get_existing_client(server_name).leave_channel(channel_name)
+
+    def subscribe(self, server_name, channel_name, receiver):
+        key = SessionManager.__subscription_key(server_name, channel_name)
+        with self.__lock:
+            self.__subscribers.setdefault(key, []).append(receiver)
+
+    def unsubscribe(self, server_name, channel_name, receiver):
+        key = SessionManager.__subscription_key(server_name, channel_name)
+        with self.__lock:
+            receivers = self.__subscribers.get(key, [])
+            if receiver in receivers:
+                receivers.remove(receiver)
+            if not receivers:
+                self.__subscribers.pop(key, None)
+
+    def send_message(self, server_name, target, message):
+        self.__get_existing_client(server_name).send_user_message(message,
+                                                                  target)
+
+    def disconnect(self, server_name):
+        with self.__lock:
+            client = self.__clients.pop(server_name, None)
+            self.__pending_channels.pop(server_name, None)
+        if client is not None:
+            client.close()
+
+    def disconnect_all(self):
+        for server_name in self.servers():
+            self.disconnect(server_name)
+
+    def __get_existing_client(self, server_name):
+        client = self.__clients.get(server_name)
+        if client is None:
+            raise ValueError("Add server {} first!".format(server_name))
+        return client
+
+    def __join_pending_channels(self, server_name):
+        with self.__lock:
+            channels_names = self.__pending_channels.get(server_name, [])
+            self.__pending_channels[server_name] = []
+        client = self.__clients.get(server_name)
+        if client is not None and channels_names:
+            client.connect_to_channels(channels_names)
+
+    def __route_message(self, server_name, message):
+        channel_name = message.target
+        if message.nick is not None and \
+                not channel_name.startswith(('#', '&', '+', '!')):
+            channel_name = message.nick
+        channel_key = (server_name, channel_name.lower())
+        server_key = (server_name, SessionManager.ALL_CHANNELS)
+        receivers = self.__subscribers.get(channel_key, []) + \
+            self.__subscribers.get(server_key, [])
+        for receiver in receivers:
+            receiver(server_name, channel_name, message)
+
+    @staticmethod
+    def __subscription_key(server_name, channel_name):
+        if channel_name is SessionManager.ALL_CHANNELS:
+            return server_name, channel_name
+        return server_name, channel_name.lower()
@@ -0,0 +1,85 @@
+import hashlib
+import ssl
+import threading
+
+
+class CertificatePinError(ssl.SSLError):
+    pass
+
+
+class TransportSecurity:
+    DEFAULT_PORT = 6697
+    MAX_SESSIONS = 64
+
+    def __init__(self, verify=True, ca_file=None, pinned_fingerprints=(),
+                 client_certificate=None, client_key=None):
+        self.verify = verify
+        self.pinned_fingerprints = {
+            TransportSecurity.normalize_fingerprint(fingerprint)
+            for fingerprint in pinned_fingerprints}
+        self.context = ssl.create_default_context(cafile=ca_file)
+        if not verify:
+            self.context.check_hostname = False
+            self.context.verify_mode = ssl.CERT_NONE
+        if client_certificate is not None:
+            self.context.load_cert_chain(client_certificate, client_key)
+        self.resumed_count = 0
+        self.__sessions = {}
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def normalize_fingerprint(fingerprint):
+        return fingerprint.replace(':', '').strip().lower()
+
+    @staticmethod
+    def fingerprint(certificate_data):
+        return hashlib.sha256(certificate_data).hexdigest()
+
+    def check_pin(self, ssl_object):
+        if not self.pinned_fingerprints:
+            return
+        fingerprint = TransportSecurity.fingerprint(
+            ssl_object.getpeercert(binary_form=True))
+        if fingerprint not in self.pinned_fingerprints:
+            raise CertificatePinError(
+                "Certificate {0} is not pinned".format(fingerprint))
+
+    def wrap(self, raw_socket, server_name, server_port, timeout=None):
+        session_key = server_name.lower(), server_port
+        with self.__lock:
+            session = self.__sessions.get(session_key)
+        raw_socket.settimeout(timeout)
+        try:
+            ssl_socket = self.context.wrap_socket(
+                raw_socket, server_hostname=server_name, session=session)
+        except (ssl.SSLError, ValueError):
+            self.forget_session(server_name, server_port)
+            raise
+        try:
+            self.check_pin(ssl_socket)
+        except CertificatePinError:
+            ssl_socket.close()
+            raise
+        ssl_socket.settimeout(None)
+        if ssl_socket.session_reused:
+            self.resumed_count += 1
+        self.remember_session(ssl_socket, server_name, server_port)
+        return ssl_socket
+
+    def remember_session(self, ssl_socket, server_name, server_port):
+        session = getattr(ssl_socket, 'session', None)
+        if session is None:
+            return
+        with self.__lock:
+            self.__sessions.pop((server_name.lower(), server_port), None)
+            if len(self.__sessions) >= TransportSecurity.MAX_SESSIONS:
+                self.__sessions.pop(next(iter(self.__sessions)))
+            self.__sessions[server_name.lower(), server_port] = session
+
+    def forget_session(self, server_name, server_port):
+        with self.__lock:
+            self.__sessions.pop((server_name.lower(), server_port), None)
+
+    def has_session(self, server_name, server_port):
+        with self.__lock:
+            return (server_name.lower(), server_port) in self.__sessions
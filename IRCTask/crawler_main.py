@@ -0,0 +1,57 @@
+import argparse
+import sys
+import time
+
+from client.channel_crawler import ChannelCrawler, CrawlTarget
+from storage.channel_index import ChannelIndex
+
+
+def parse_target(value):
+    try:
+        return CrawlTarget.parse(value)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(str(error))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="List channels of many IRC servers concurrently and "
+                    "merge them into one index.")
+    parser.add_argument('servers', type=parse_target, nargs='+',
+                        help="servers as host:port or host:port+tls")
+    parser.add_argument('--index', required=True,
+                        help="SQLite file of the merged channel index")
+    parser.add_argument('--nick', required=True)
+    parser.add_argument('--connections', type=int,
+                        default=ChannelCrawler.DEFAULT_MAX_CONNECTIONS,
+                        help="servers crawled at the same time")
+    parser.add_argument('--timeout', type=float,
+                        default=ChannelCrawler.DEFAULT_TIMEOUT,
+                        help="seconds allowed for one attempt")
+    parser.add_argument('--retries', type=int,
+                        default=ChannelCrawler.DEFAULT_RETRIES)
+    arguments = parser.parse_args()
+
+    channel_index = ChannelIndex(arguments.index)
+    crawler = ChannelCrawler(channel_index, arguments.nick,
+                             arguments.connections, arguments.timeout,
+                             arguments.retries)
+    started_at = time.monotonic()
+    try:
+        results = crawler.run(arguments.servers)
+    finally:
+        channel_index.close()
+    for result in results:
+        print("{0:<32} {1:>7} channels {2:>7.2f} s  {3} attempt(s){4}".format(
+            result.server_address, result.channels_count, result.seconds,
+            result.attempts, "  " + result.error if result.error else ""))
+    print("crawled {0} servers in {1:.2f} s".format(
+        len(results), time.monotonic() - started_at))
+    if channel_index.last_error is not None:
+        print("could not write the index: {0}".format(
+            channel_index.last_error), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
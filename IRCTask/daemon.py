@@ -0,0 +1,64 @@
+import argparse
+import asyncio
+
+from bouncer.irc_bouncer import IRCBouncer, UpstreamNetwork
+from data_transfer.user import User
+
+
+def parse_network(value):
+    name, _, address = value.partition('=')
+    host, _, port = address.rpartition(':')
+    if not name or not host or not port.isdigit():
+        raise argparse.ArgumentTypeError(
+            "network should look like name=host:port")
+    return name, host, int(port)
+
+
+def parse_channels(value):
+    name, _, channels = value.partition('=')
+    return name.lower(), [channel for channel in channels.split(',')
+                          if channel]
+
+
+async def run_bouncer(arguments):
+    bouncer = IRCBouncer()
+    channels = dict(arguments.join)
+    for name, host, port in arguments.network:
+        bouncer.add_network(UpstreamNetwork(
+            name, host, port, User(arguments.nick),
+            channels.get(name.lower(), ()),
+            scrollback_messages=arguments.scrollback))
+    host, _, port = arguments.listen.rpartition(':')
+    await bouncer.start(host or None, int(port), arguments.unix)
+    for address in bouncer.addresses():
+        print(address, flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await bouncer.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Keep IRC sessions online and share them between "
+                    "attached clients.")
+    parser.add_argument('--network', type=parse_network, action='append',
+                        required=True, help="upstream as name=host:port")
+    parser.add_argument('--nick', required=True)
+    parser.add_argument('--join', type=parse_channels, action='append',
+                        default=[], help="channels as name=#first,#second")
+    parser.add_argument('--listen', default='127.0.0.1:6697',
+                        help="TCP address for attaching clients")
+    parser.add_argument('--unix', help="unix socket path for attaching "
+                                       "clients")
+    parser.add_argument('--scrollback', type=int, default=500,
+                        help="messages kept per channel and query")
+    arguments = parser.parse_args()
+    try:
+        asyncio.run(run_bouncer(arguments))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
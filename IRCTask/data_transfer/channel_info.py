@@ -1,4 +1,6 @@
 class ChannelInfo: # pragma: no cover
+    __slots__ = ('name', 'users_count', 'full_name')
+
     def __init__(self, name, users_count, full_name):
         self.name = name
         self.users_count = users_count
@@ -0,0 +1,146 @@
+import bisect
+
+
+class ChannelRoster:
+    DEFAULT_PREFIX_FEATURE = "(qaohv)~&@%+"
+
+    def __init__(self, channel_name, prefix_feature=DEFAULT_PREFIX_FEATURE):
+        self.channel_name = channel_name
+        self.prefix_modes, self.prefix_symbols = \
+            ChannelRoster.parse_prefix_feature(prefix_feature)
+        self.change_receiver = None
+        self.__keys = []
+        self.__members = {}
+        self.__loading_members = None
+
+    @staticmethod
+    def parse_prefix_feature(prefix_feature):
+        if not prefix_feature.startswith('('):
+            return '', ''
+        modes, _, symbols = prefix_feature[1:].partition(')')
+        return modes, symbols
+
+    @staticmethod
+    def casefold(nick):
+        return nick.lower()
+
+    def __len__(self):
+        return len(self.__keys)
+
+    def __contains__(self, nick):
+        return ChannelRoster.casefold(nick) in self.__members
+
+    @property
+    def is_loading(self):
+        return self.__loading_members is not None
+
+    def names(self):
+        return [self.display_name(self.__members[key[1]][0])
+                for key in self.__keys]
+
+    def display_name(self, nick):
+        member = self.__members.get(ChannelRoster.casefold(nick))
+        if member is None:
+            return nick
+        weight = self.__weight(member[1])
+        if weight < len(self.prefix_symbols):
+            return self.prefix_symbols[weight] + member[0]
+        return member[0]
+
+    def index_of(self, nick):
+        member = self.__members.get(ChannelRoster.casefold(nick))
+        if member is None:
+            return -1
+        return bisect.bisect_left(self.__keys, self.__key(member))
+
+    def add_names(self, names):
+        if self.__loading_members is None:
+            self.__loading_members = {}
+        for name in names.split():
+            modes = set()
+            nick_start = 0
+            while nick_start < len(name) and \
+                    name[nick_start] in self.prefix_symbols:
+                symbol_index = self.prefix_symbols.index(name[nick_start])
+                modes.add(self.prefix_modes[symbol_index])
+                nick_start += 1
+            nick = name[nick_start:]
+            if nick:
+                self.__loading_members[ChannelRoster.casefold(nick)] = \
+                    [nick, modes]
+
+    def end_names(self):
+        if self.__loading_members is None:
+            self.__loading_members = {}
+        self.__members = self.__loading_members
+        self.__loading_members = None
+        self.__keys = sorted(self.__key(member)
+                             for member in self.__members.values())
+        self.__notify('reset', self.names())
+
+    def add(self, nick, modes=()):
+        if nick in self:
+            return
+        member = [nick, set(modes)]
+        self.__members[ChannelRoster.casefold(nick)] = member
+        index = self.__insert_key(member)
+        self.__notify('insert', index, self.display_name(nick))
+
+    def remove(self, nick):
+        member = self.__members.pop(ChannelRoster.casefold(nick), None)
+        if member is None:
+            return False
+        index = self.__remove_key(member)
+        self.__notify('remove', index)
+        return True
+
+    def rename(self, old_nick, new_nick):
+        member = self.__members.pop(ChannelRoster.casefold(old_nick), None)
+        if member is None:
+            return False
+        old_index = self.__remove_key(member)
+        member[0] = new_nick
+        self.__members[ChannelRoster.casefold(new_nick)] = member
+        new_index = self.__insert_key(member)
+        self.__notify('move', old_index, new_index,
+                      self.display_name(new_nick))
+        return True
+
+    def set_mode(self, nick, mode, is_enabled):
+        if mode not in self.prefix_modes:
+            return False
+        member = self.__members.get(ChannelRoster.casefold(nick))
+        if member is None or (mode in member[1]) == is_enabled:
+            return False
+        old_index = self.__remove_key(member)
+        if is_enabled:
+            member[1].add(mode)
+        else:
+            member[1].discard(mode)
+        new_index = self.__insert_key(member)
+        self.__notify('move', old_index, new_index, self.display_name(nick))
+        return True
+
+    def __weight(self, modes):
+        for weight, mode in enumerate(self.prefix_modes):
+            if mode in modes:
+                return weight
+        return len(self.prefix_modes)
+
+    def __key(self, member):
+        return self.__weight(member[1]), ChannelRoster.casefold(member[0])
+
+    def __insert_key(self, member):
+        key = self.__key(member)
+        index = bisect.bisect_left(self.__keys, key)
+        self.__keys.insert(index, key)
+        return index
+
+    def __remove_key(self, member):
+        index = bisect.bisect_left(self.__keys, self.__key(member))
+        del self.__keys[index]
+        return index
+
+    def __notify(self, *change):
+        if self.change_receiver is not None:
+            self.change_receiver(change)
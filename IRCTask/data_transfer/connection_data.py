@@ -1,4 +1,5 @@
 class ConnectionData:  # pragma: no cover
+    __slots__ = ('server', 'port', 'channel', 'user')
 
     def __init__(self):
         self.server = ''
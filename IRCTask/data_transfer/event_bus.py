@@ -0,0 +1,219 @@
+import collections
+import threading
+import time
+
+from data_transfer.transmitter import Transmitter
+
+
+class Subscription:
+    DROP_OLDEST = 'drop_oldest'
+    BLOCK = 'block'
+    COALESCE = 'coalesce'
+    OVERFLOW_POLICIES = (DROP_OLDEST, BLOCK, COALESCE)
+
+    def __init__(self, topic, receiver, max_queue_size=10000,
+                 overflow_policy=DROP_OLDEST, batch_size=1,
+                 coalesce_key=None):
+        if overflow_policy not in Subscription.OVERFLOW_POLICIES:
+            raise ValueError("Unknown overflow policy: " + overflow_policy)
+        if overflow_policy == Subscription.COALESCE and coalesce_key is None:
+            raise ValueError("Coalescing needs a coalesce key!")
+        if max_queue_size <= 0 or batch_size <= 0:
+            raise ValueError("Queue and batch sizes should be positive!")
+        self.topic = topic
+        self.receiver = receiver
+        self.max_queue_size = max_queue_size
+        self.overflow_policy = overflow_policy
+        self.batch_size = batch_size
+        self.coalesce_key = coalesce_key
+        self.dropped_count = 0
+        self.delivered_count = 0
+        self.stats = None
+        self.__queue = collections.OrderedDict() \
+            if overflow_policy == Subscription.COALESCE \
+            else collections.deque()
+        self.__is_delivering = False
+        self.__is_closed = False
+        self.__condition = threading.Condition()
+        self.__delivering_thread = threading.Thread(target=self.deliver,
+                                                    daemon=True)
+        self.__delivering_thread.start()
+
+    def __len__(self):
+        return len(self.__queue)
+
+    def put(self, data):
+        with self.__condition:
+            if self.__is_closed:
+                return
+            if self.overflow_policy == Subscription.COALESCE:
+                self.__put_coalescing(data)
+            else:
+                if len(self.__queue) >= self.max_queue_size:
+                    if self.overflow_policy == Subscription.BLOCK:
+                        self.__wait_for_space()
+                    else:
+                        self.__queue.popleft()
+                        self.dropped_count += 1
+                self.__queue.append(data)
+            self.__condition.notify_all()
+
+    def deliver(self):
+        while True:
+            with self.__condition:
+                while not self.__queue and not self.__is_closed:
+                    self.__condition.wait()
+                if not self.__queue:
+                    return
+                batch = self.__take_batch()
+                self.__is_delivering = True
+                self.__condition.notify_all()
+            stats = self.stats
+            if stats is not None:
+                started_at = time.perf_counter()
+            try:
+                if self.batch_size == 1:
+                    self.receiver(batch[0])
+                else:
+                    self.receiver(batch)
+            except Exception:
+                import traceback
+                traceback.print_exc()
+            if stats is not None:
+                stats.observe('delivery_seconds',
+                              time.perf_counter() - started_at, self.topic)
+                stats.increment('delivered_events', len(batch), self.topic)
+                stats.set_gauge('delivery_queue_depth', len(self.__queue),
+                                self.topic)
+            with self.__condition:
+                self.delivered_count += len(batch)
+                self.__is_delivering = False
+                self.__condition.notify_all()
+
+    def wait_until_delivered(self, timeout=None):
+        with self.__condition:
+            return self.__condition.wait_for(
+                lambda: not self.__queue and not self.__is_delivering,
+                timeout)
+
+    def close(self):
+        with self.__condition:
+            self.__is_closed = True
+            self.__condition.notify_all()
+        if self.__delivering_thread is not threading.current_thread():
+            self.__delivering_thread.join()
+
+    def __put_coalescing(self, data):
+        key = self.coalesce_key(data)
+        if key in self.__queue:
+            self.__queue[key] = data
+            self.dropped_count += 1
+            return
+        if len(self.__queue) >= self.max_queue_size:
+            self.__queue.popitem(last=False)
+            self.dropped_count += 1
+        self.__queue[key] = data
+
+    def __wait_for_space(self):
+        while len(self.__queue) >= self.max_queue_size and \
+                not self.__is_closed:
+            self.__condition.wait()
+
+    def __take_batch(self):
+        batch = []
+        while self.__queue and len(batch) < self.batch_size:
+            if isinstance(self.__queue, collections.OrderedDict):
+                batch.append(self.__queue.popitem(last=False)[1])
+            else:
+                batch.append(self.__queue.popleft())
+        return batch
+
+
+class EventBus:
+
+    def __init__(self):
+        self.__subscriptions = {}
+        self.__lock = threading.Lock()
+        self.stats = None
+
+    def set_stats(self, stats):
+        self.stats = stats
+        for subscription in self.subscriptions():
+            subscription.stats = stats
+
+    def subscribe(self, topic, receiver, **subscription_options):
+        subscription = Subscription(topic, receiver, **subscription_options)
+        subscription.stats = self.stats
+        with self.__lock:
+            self.__subscriptions[topic] = \
+                self.__subscriptions.get(topic, ()) + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.__lock:
+            subscriptions = self.__subscriptions.get(subscription.topic, ())
+            self.__subscriptions[subscription.topic] = tuple(
+                other for other in subscriptions if other is not subscription)
+            if not self.__subscriptions[subscription.topic]:
+                del self.__subscriptions[subscription.topic]
+        subscription.close()
+
+    def publish(self, topic, data):
+        for subscription in self.__subscriptions.get(topic, ()):
+            subscription.put(data)
+
+    def has_subscribers(self, topic):
+        return topic in self.__subscriptions
+
+    def subscriptions(self, topic=None):
+        if topic is not None:
+            return list(self.__subscriptions.get(topic, ()))
+        return [subscription
+                for subscriptions in list(self.__subscriptions.values())
+                for subscription in subscriptions]
+
+    def flush(self, timeout=None):
+        return all(subscription.wait_until_delivered(timeout)
+                   for subscription in self.subscriptions())
+
+    def close(self):
+        for subscription in self.subscriptions():
+            self.unsubscribe(subscription)
+
+    def transmitter(self, topic):
+        return BusTransmitter(self, topic)
+
+
+class BusTransmitter(Transmitter):
+
+    def __init__(self, event_bus, topic):
+        super(BusTransmitter, self).__init__()
+        self.event_bus = event_bus
+        self.topic = topic
+        self.__subscription = None
+        self.__transmitted_any_data = False
+
+    def transmit(self, data):
+        if self.can_transmit():
+            self.__transmitted_any_data = True
+            self.event_bus.publish(self.topic, data)
+        else:
+            raise ValueError('No transmitter delegate is set!')
+
+    def connect_receiver(self, receiver_delegate, **subscription_options):
+        if self.__subscription is not None:
+            self.event_bus.unsubscribe(self.__subscription)
+        self.receiver = receiver_delegate
+        self.__subscription = self.subscribe(receiver_delegate,
+                                             **subscription_options)
+        return self.__subscription
+
+    def subscribe(self, receiver, **subscription_options):
+        return self.event_bus.subscribe(self.topic, receiver,
+                                        **subscription_options)
+
+    def can_transmit(self):
+        return self.event_bus.has_subscribers(self.topic)
+
+    def is_transmitted_any_data(self):
+        return self.__transmitted_any_data
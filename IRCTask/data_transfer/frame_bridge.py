@@ -0,0 +1,84 @@
+import threading
+import time
+
+
+class FrameBridge:
+    DEFAULT_MAX_FLUSHES_PER_SECOND = 30
+    DEFAULT_MAX_PENDING_EVENTS = 20000
+    SUBSCRIPTION_BATCH_SIZE = 512
+
+    def __init__(self, request_flush,
+                 max_flushes_per_second=DEFAULT_MAX_FLUSHES_PER_SECOND,
+                 max_pending_events=DEFAULT_MAX_PENDING_EVENTS,
+                 clock=time.monotonic):
+        if max_flushes_per_second <= 0:
+            raise ValueError("Flushes rate should be positive!")
+        self.request_flush = request_flush
+        self.min_flush_interval = 1 / max_flushes_per_second
+        self.max_pending_events = max_pending_events
+        self.clock = clock
+        self.flushes_count = 0
+        self.events_count = 0
+        self.dropped_count = 0
+        self.__handlers = {}
+        self.__pending = {}
+        self.__is_flush_requested = False
+        self.__last_flush_at = None
+        self.__lock = threading.Lock()
+
+    def add_handler(self, topic, handler, keeps_last=False,
+                    keeps_all=False):
+        self.__handlers[topic] = handler, keeps_last, keeps_all
+
+    def connect(self, transmitter, handler, keeps_last=False,
+                keeps_all=False):
+        topic = transmitter.topic
+        self.add_handler(topic, handler, keeps_last, keeps_all)
+        return transmitter.connect_receiver(
+            lambda events: self.post_many(topic, events),
+            batch_size=FrameBridge.SUBSCRIPTION_BATCH_SIZE)
+
+    def post(self, topic, event):
+        self.post_many(topic, (event,))
+
+    def post_many(self, topic, events):
+        with self.__lock:
+            _, keeps_last, keeps_all = self.__handlers.get(
+                topic, (None, False, False))
+            pending_events = self.__pending.setdefault(topic, [])
+            if keeps_last:
+                self.dropped_count += len(pending_events) + len(events) - 1
+                pending_events[:] = events[-1:]
+            elif keeps_all:
+                pending_events.extend(events)
+            else:
+                pending_events.extend(events)
+                overflow = len(pending_events) - self.max_pending_events
+                if overflow > 0:
+                    del pending_events[:overflow]
+                    self.dropped_count += overflow
+            self.events_count += len(events)
+            if self.__is_flush_requested:
+                return
+            self.__is_flush_requested = True
+            delay = 0
+            if self.__last_flush_at is not None:
+                delay = max(0, self.__last_flush_at + self.min_flush_interval -
+                            self.clock())
+        self.request_flush(delay)
+
+    def pending_events_count(self):
+        with self.__lock:
+            return sum(len(events) for events in self.__pending.values())
+
+    def flush(self):
+        with self.__lock:
+            pending = self.__pending
+            self.__pending = {}
+            self.__is_flush_requested = False
+            self.__last_flush_at = self.clock()
+        for topic, (handler, _, _) in list(self.__handlers.items()):
+            events = pending.get(topic)
+            if events:
+                handler(events)
+        self.flushes_count += 1
@@ -0,0 +1,59 @@
+class IRCBatch:
+    __slots__ = ('reference', 'batch_type', 'params', 'tags', 'messages')
+
+    def __init__(self, reference, batch_type, params=None, tags=None):
+        self.reference = reference
+        self.batch_type = batch_type
+        self.params = params if params is not None else []
+        self.tags = tags if tags is not None else {}
+        self.messages = []
+
+    @property
+    def target(self):
+        return self.params[0] if self.params else ''
+
+    def __len__(self):
+        return len(self.messages)
+
+    def __repr__(self):
+        return 'IRCBatch({0!r}, {1!r}, {2} messages)'.format(
+            self.reference, self.batch_type, len(self.messages))
+
+
+class BatchCollector:
+    MAX_OPEN_BATCHES = 64
+
+    def __init__(self):
+        self.__open_batches = {}
+
+    def __len__(self):
+        return len(self.__open_batches)
+
+    def open(self, message):
+        if len(message.params) < 2 or \
+                len(self.__open_batches) >= BatchCollector.MAX_OPEN_BATCHES:
+            return None
+        batch = IRCBatch(message.params[0][1:], message.params[1],
+                         message.params[2:], message.tags)
+        self.__open_batches[batch.reference] = batch
+        return batch
+
+    def collect(self, message):
+        batch = self.__open_batches.get(message.tags.get('batch'))
+        if batch is None:
+            return False
+        batch.messages.append(message)
+        return True
+
+    def close(self, message):
+        batch = self.__open_batches.pop(message.target[1:], None)
+        if batch is None:
+            return None
+        parent = self.__open_batches.get(batch.tags.get('batch'))
+        if parent is not None:
+            parent.messages.append(batch)
+            return None
+        return batch
+
+    def clear(self):
+        self.__open_batches = {}
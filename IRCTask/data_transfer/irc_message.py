@@ -0,0 +1,147 @@
+datetime = None
+
+
+def load_datetime():
+    global datetime
+    if datetime is None:
+        import datetime as loaded_datetime
+        datetime = loaded_datetime
+    return datetime
+
+
+class IRCMessage:
+    __slots__ = ('tags', 'prefix', 'nick', 'user', 'host',
+                 'command', 'params')
+
+    TAG_VALUE_ESCAPES = {
+        ':': ';',
+        's': ' ',
+        '\\': '\\',
+        'r': '\r',
+        'n': '\n'
+    }
+
+    def __init__(self, command, params=None, prefix=None, tags=None):
+        self.tags = tags if tags is not None else {}
+        self.prefix = prefix
+        self.nick = None
+        self.user = None
+        self.host = None
+        self.command = command
+        self.params = params if params is not None else []
+        if prefix is not None:
+            self.__split_prefix(prefix)
+
+    @staticmethod
+    def parse(line):
+        tags = None
+        prefix = None
+        rest = line
+        if rest.startswith('@'):
+            raw_tags, _, rest = rest[1:].partition(' ')
+            tags = IRCMessage.parse_tags(raw_tags)
+            rest = rest.lstrip(' ')
+        if rest.startswith(':'):
+            prefix, _, rest = rest[1:].partition(' ')
+            rest = rest.lstrip(' ')
+
+        trailing_start = rest.find(' :')
+        if trailing_start == -1:
+            params = rest.split()
+        else:
+            params = rest[:trailing_start].split()
+            params.append(rest[trailing_start + 2:])
+        command = params.pop(0).upper() if params else ''
+        return IRCMessage(command, params, prefix, tags)
+
+    @staticmethod
+    def parse_tags(raw_tags):
+        tags = {}
+        for raw_tag in raw_tags.split(';'):
+            if not raw_tag:
+                continue
+            key, _, value = raw_tag.partition('=')
+            if '\\' in value:
+                value = IRCMessage.unescape_tag_value(value)
+            tags[key] = value
+        return tags
+
+    @staticmethod
+    def unescape_tag_value(value):
+        unescaped = []
+        is_escaped = False
+        for char in value:
+            if is_escaped:
+                unescaped.append(IRCMessage.TAG_VALUE_ESCAPES.get(char, char))
+                is_escaped = False
+            elif char == '\\':
+                is_escaped = True
+            else:
+                unescaped.append(char)
+        return ''.join(unescaped)
+
+    @property
+    def target(self):
+        return self.params[0] if self.params else ''
+
+    @property
+    def trailing(self):
+        return self.params[-1] if self.params else ''
+
+    def server_time(self):
+        value = self.tags.get('time')
+        if not value:
+            return None
+        try:
+            return load_datetime().datetime.fromisoformat(
+                value.replace('Z', '+00:00')).timestamp()
+        except ValueError:
+            return None
+
+    @staticmethod
+    def format_server_time(timestamp):
+        datetime_module = load_datetime()
+        milliseconds = round(timestamp * 1000)
+        moment = datetime_module.datetime.fromtimestamp(
+            milliseconds // 1000, datetime_module.timezone.utc)
+        return "{0}.{1:03d}Z".format(moment.strftime('%Y-%m-%dT%H:%M:%S'),
+                                     milliseconds % 1000)
+
+    @staticmethod
+    def split_text(text, max_bytes):
+        if max_bytes < 4:
+            raise ValueError("Too few bytes left for the message text!")
+        chunks = []
+        for line in [line for line in text.splitlines() if line] or [text]:
+            data = line.encode("UTF-8")
+            while len(data) > max_bytes:
+                cut = max_bytes
+                while data[cut] & 0xC0 == 0x80:
+                    cut -= 1
+                space = data.rfind(b' ', max_bytes // 2, cut + 1)
+                if space == -1:
+                    chunks.append(data[:cut].decode("UTF-8"))
+                    data = data[cut:]
+                else:
+                    chunks.append(data[:space].decode("UTF-8"))
+                    data = data[space + 1:]
+            chunks.append(data.decode("UTF-8"))
+        return chunks
+
+    def is_from_server(self):
+        return self.prefix is not None and self.nick is None
+
+    def __split_prefix(self, prefix):
+        name, _, host = prefix.partition('@')
+        name, _, user = name.partition('!')
+        if user or host or '.' not in name:
+            self.nick = name
+            self.user = user or None
+            self.host = host or None
+        else:
+            self.host = name
+
+    def __repr__(self):
+        return 'IRCMessage({0!r}, {1!r}, {2!r})'.format(self.command,
+                                                        self.params,
+                                                        self.prefix)
@@ -0,0 +1,117 @@
+import collections
+import time
+
+ChatRecord = collections.namedtuple('ChatRecord',
+                                    ['timestamp', 'nick', 'text'])
+
+
+class Scrollback:
+    RECORD_OVERHEAD_BYTES = 16
+
+    def __init__(self, max_messages=10000, max_bytes=None, spill_path=None):
+        if max_messages <= 0:
+            raise ValueError("Scrollback should keep at least one message!")
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.spill_path = spill_path
+        self.__records = [None] * max_messages
+        self.__head = 0
+        self.__count = 0
+        self.__bytes_count = 0
+        self.__evicted_count = 0
+        self.__spill_file = None
+
+    def __len__(self):
+        return self.__count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.__count
+        if not 0 <= index < self.__count:
+            raise IndexError("Scrollback index out of range")
+        return self.__records[(self.__head + index) % self.max_messages]
+
+    def __iter__(self):
+        for index in range(self.__count):
+            yield self[index]
+
+    @property
+    def bytes_count(self):
+        return self.__bytes_count
+
+    @property
+    def evicted_count(self):
+        return self.__evicted_count
+
+    def append(self, nick, text, timestamp=None):
+        record = ChatRecord(time.time() if timestamp is None else timestamp,
+                            nick, text)
+        self.evict(self.overflow_count(nick, text))
+        tail = (self.__head + self.__count) % self.max_messages
+        self.__records[tail] = record
+        self.__count += 1
+        self.__bytes_count += Scrollback.record_size(nick, text)
+        return record
+
+    def overflow_count(self, nick, text):
+        return self.batch_overflow_count([(nick, text)])
+
+    def batch_overflow_count(self, messages):
+        overflow = max(0, self.__count + len(messages) - self.max_messages)
+        if self.max_bytes is None:
+            return min(overflow, self.__count)
+        excess_bytes = self.__bytes_count + sum(
+            Scrollback.record_size(nick, text) for nick, text in messages) - \
+            self.max_bytes
+        index = 0
+        while index < self.__count and (index < overflow or excess_bytes > 0):
+            record = self[index]
+            excess_bytes -= Scrollback.record_size(record.nick, record.text)
+            index += 1
+        return index
+
+    def evict(self, count):
+        count = min(count, self.__count)
+        for _ in range(count):
+            record = self.__records[self.__head]
+            self.__records[self.__head] = None
+            self.__head = (self.__head + 1) % self.max_messages
+            self.__count -= 1
+            self.__bytes_count -= Scrollback.record_size(record.nick,
+                                                         record.text)
+            self.__spill(record)
+        self.__evicted_count += count
+        return count
+
+    def fitting_messages(self, messages):
+        messages = messages[-self.max_messages:]
+        if self.max_bytes is None:
+            return messages
+        batch_bytes = sum(Scrollback.record_size(nick, text)
+                          for nick, text in messages)
+        start = 0
+        while start < len(messages) and batch_bytes > self.max_bytes:
+            batch_bytes -= Scrollback.record_size(*messages[start])
+            start += 1
+        return messages[start:]
+
+    def clear(self):
+        self.evict(self.__count)
+        self.__head = 0
+
+    def close(self):
+        if self.__spill_file is not None:
+            self.__spill_file.close()
+            self.__spill_file = None
+
+    @staticmethod
+    def record_size(nick, text):
+        return len(nick) + len(text) + Scrollback.RECORD_OVERHEAD_BYTES
+
+    def __spill(self, record):
+        if self.spill_path is None:
+            return
+        if self.__spill_file is None:
+            self.__spill_file = open(self.spill_path, 'a', encoding="UTF-8")
+        self.__spill_file.write("{0:.3f}\t{1}\t{2}\n".format(
+            record.timestamp, record.nick, record.text.replace('\n', ' ')))
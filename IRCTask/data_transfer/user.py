@@ -1,4 +1,5 @@
 class User: # pragma: no cover
+    __slots__ = ('username', 'real_name')
 
     def __init__(self, username):
         self.username = username
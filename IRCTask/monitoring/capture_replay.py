@@ -0,0 +1,175 @@
+import argparse
+import time
+
+from client.irc_client import IRCClient
+from client.line_framer import LineFramer
+from data_transfer.irc_message import IRCMessage
+from data_transfer.user import User
+from monitoring.traffic_capture import TrafficCapture, read_capture
+
+
+class ReplaySocket:
+
+    def __init__(self):
+        self.connected = True
+        self.joined_channel = False
+        self.connected_channel_name = "NONE"
+        self.joined_channels = {}
+        self.output_receiver = None
+        self.stats = None
+        self.capture = None
+        self.sent_lines = []
+        self.user = None
+
+    def set_server_data(self, server_name, server_port):
+        pass
+
+    def connect_to_server(self):
+        pass
+
+    def send_user_data(self, user, leading_lines=()):
+        self.user = user
+
+    def join_channel(self, channel_name):
+        self.join_channels([channel_name])
+
+    def join_channels(self, channels_names):
+        for channel_name in channels_names:
+            self.joined_channels[channel_name.lower()] = channel_name
+            self.connected_channel_name = channel_name
+        self.joined_channel = len(self.joined_channels) > 0
+
+    def part_channel(self, channel_name):
+        self.joined_channels.pop(channel_name.lower(), None)
+        self.joined_channel = len(self.joined_channels) > 0
+
+    def is_channel_joined(self, channel_name):
+        return channel_name.lower() in self.joined_channels
+
+    def get_channels_list(self, list_filter=''):
+        self.queue_message(('LIST ' + list_filter).rstrip())
+
+    def get_users_list(self):
+        self.queue_message('NAMES ' + self.connected_channel_name)
+
+    def is_message_queue_empty(self):
+        return True
+
+    def handle_message(self, message):
+        if self.output_receiver is not None:
+            self.output_receiver(message)
+
+    def send_message(self, message):
+        self.queue_message(message)
+
+    def queue_message(self, message):
+        self.sent_lines.append(message)
+
+    def send_urgent_message(self, message):
+        self.queue_message(message)
+
+    def ping(self, token="pingisn"):
+        self.queue_message("PONG :" + token)
+
+    def apply_outbound_line(self, line):
+        message = IRCMessage.parse(line)
+        if message.command == "JOIN" and message.params:
+            self.join_channels(message.params[0].split(','))
+        elif message.command == "PART" and message.params:
+            for channel_name in message.params[0].split(','):
+                self.part_channel(channel_name)
+        return message
+
+    def disconnect(self):
+        self.connected = False
+
+
+class CaptureReplayer:
+    AS_FAST_AS_POSSIBLE = 'fast'
+    REAL_TIME = 'realtime'
+
+    def __init__(self, path, mode=AS_FAST_AS_POSSIBLE):
+        if mode not in (CaptureReplayer.AS_FAST_AS_POSSIBLE,
+                        CaptureReplayer.REAL_TIME):
+            raise ValueError("Unknown replay mode: " + mode)
+        self.path = path
+        self.mode = mode
+        self.replayed_lines_count = 0
+
+    def replay(self, client, replay_socket):
+        inbound_framer = LineFramer()
+        outbound_framer = LineFramer()
+        first_timestamp = None
+        started_at = time.monotonic_ns()
+        for timestamp, direction, data in read_capture(self.path):
+            if self.mode == CaptureReplayer.REAL_TIME:
+                if first_timestamp is None:
+                    first_timestamp = timestamp
+                delay = (timestamp - first_timestamp) - \
+                    (time.monotonic_ns() - started_at)
+                if delay > 0:
+                    time.sleep(delay / 1e9)
+            if direction == TrafficCapture.INBOUND:
+                for line in inbound_framer.feed(data):
+                    self.replayed_lines_count += 1
+                    client.handle_irc_message(line)
+            elif direction == TrafficCapture.OUTBOUND:
+                for line in outbound_framer.feed(data):
+                    message = replay_socket.apply_outbound_line(line)
+                    if message.command == "NICK" and message.params and \
+                            not client.is_registered:
+                        client.set_user(User(message.params[0]))
+            else:
+                self.replayed_lines_count += 1
+                client.handle_irc_message(data.decode("UTF-8", 'replace'))
+        return self.replayed_lines_count
+
+
+def replay_capture(path, mode=CaptureReplayer.AS_FAST_AS_POSSIBLE):
+    replay_socket = ReplaySocket()
+    client = IRCClient(irc_socket=replay_socket)
+    replay_socket.output_receiver = client.handle_irc_message
+    CaptureReplayer(path, mode).replay(client, replay_socket)
+    return client
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay a raw traffic capture through IRCClient "
+                    "without a socket.")
+    parser.add_argument('capture')
+    parser.add_argument('--realtime', action='store_true',
+                        help="keep the recorded timing between records")
+    parser.add_argument('--profile', action='store_true',
+                        help="print the top functions by cumulative time")
+    parser.add_argument('--dump', action='store_true',
+                        help="print the captured lines instead of replaying")
+    arguments = parser.parse_args()
+
+    if arguments.dump:
+        directions = {TrafficCapture.INBOUND: '<',
+                      TrafficCapture.OUTBOUND: '>',
+                      TrafficCapture.ECHO: '='}
+        for timestamp, direction, data in read_capture(arguments.capture):
+            for line in data.decode("UTF-8", 'replace').splitlines():
+                print(timestamp, directions.get(direction, '?'), line)
+        return
+
+    mode = CaptureReplayer.REAL_TIME if arguments.realtime \
+        else CaptureReplayer.AS_FAST_AS_POSSIBLE
+    started_at = time.perf_counter()
+    if arguments.profile:
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        client = profiler.runcall(replay_capture, arguments.capture, mode)
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(25)
+    else:
+        client = replay_capture(arguments.capture, mode)
+    elapsed = time.perf_counter() - started_at
+    client.event_bus.close()
+    print("replayed {0} in {1:.3f}s".format(arguments.capture, elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+import bisect
+import threading
+import time
+
+
+class Histogram:
+    BUCKETS_BOUNDS = tuple(0.000001 * 2 ** power for power in range(27))
+
+    def __init__(self, bounds=BUCKETS_BOUNDS):
+        self.bounds = bounds
+        self.buckets_counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0
+        self.max = 0
+
+    def observe(self, value):
+        self.buckets_counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, fraction):
+        if self.count == 0:
+            return None
+        rank = fraction * self.count
+        cumulative_count = 0
+        for index, bucket_count in enumerate(self.buckets_counts):
+            cumulative_count += bucket_count
+            if cumulative_count >= rank:
+                if index < len(self.bounds):
+                    return min(self.bounds[index], self.max)
+                return self.max
+        return self.max
+
+    def cumulative_buckets(self):
+        cumulative_count = 0
+        buckets = []
+        for bound, bucket_count in zip(self.bounds, self.buckets_counts):
+            cumulative_count += bucket_count
+            buckets.append((bound, cumulative_count))
+        return buckets
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'max': self.max,
+            'p50': self.percentile(0.5),
+            'p90': self.percentile(0.9),
+            'p99': self.percentile(0.99)
+        }
+
+
+class PipelineStats:
+    LABELS_NAMES = {
+        'messages_handled': 'command',
+        'dispatch_seconds': 'command',
+        'delivered_events': 'topic',
+        'delivery_seconds': 'topic',
+        'delivery_queue_depth': 'topic'
+    }
+
+    def __init__(self, connection_name=''):
+        self.connection_name = connection_name
+        self.started_at = time.time()
+        self.__counters = {}
+        self.__gauges = {}
+        self.__histograms = {}
+        self.__lock = threading.Lock()
+
+    def increment(self, name, amount=1, label=None):
+        key = name, label
+        with self.__lock:
+            self.__counters[key] = self.__counters.get(key, 0) + amount
+
+    def set_gauge(self, name, value, label=None):
+        self.__gauges[name, label] = value
+
+    def observe(self, name, value, label=None):
+        key = name, label
+        with self.__lock:
+            histogram = self.__histograms.get(key)
+            if histogram is None:
+                histogram = self.__histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def counter(self, name, label=None):
+        return self.__counters.get((name, label), 0)
+
+    def gauge(self, name, label=None):
+        return self.__gauges.get((name, label))
+
+    def histogram(self, name, label=None):
+        return self.__histograms.get((name, label))
+
+    def reset(self):
+        with self.__lock:
+            self.__counters = {}
+            self.__gauges = {}
+            self.__histograms = {}
+            self.started_at = time.time()
+
+    def metrics(self):
+        with self.__lock:
+            return (dict(self.__counters), dict(self.__gauges),
+                    {key: (histogram.cumulative_buckets(), histogram.count,
+                           histogram.sum)
+                     for key, histogram in self.__histograms.items()})
+
+    def snapshot(self):
+        with self.__lock:
+            return {
+                'connection': self.connection_name,
+                'uptime_seconds': time.time() - self.started_at,
+                'counters': PipelineStats.__group(self.__counters),
+                'gauges': PipelineStats.__group(self.__gauges),
+                'histograms': PipelineStats.__group(
+                    {key: histogram.snapshot()
+                     for key, histogram in self.__histograms.items()})
+            }
+
+    @staticmethod
+    def __group(values):
+        grouped = {}
+        for (name, label), value in sorted(values.items(),
+                                           key=lambda item: (item[0][0],
+                                                             item[0][1] or '')):
+            if label is None:
+                grouped[name] = value
+            else:
+                grouped.setdefault(name, {})[label] = value
+        return grouped
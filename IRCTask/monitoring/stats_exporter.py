@@ -0,0 +1,142 @@
+import json
+import os
+import threading
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from monitoring.pipeline_stats import PipelineStats
+
+
+class StatsExporter:
+    DEFAULT_INTERVAL = 10
+    METRICS_PREFIX = "irc_"
+
+    def __init__(self, stats_sources=(), snapshot_path=None,
+                 interval=DEFAULT_INTERVAL):
+        self.stats_sources = list(stats_sources)
+        self.snapshot_path = snapshot_path
+        self.interval = interval
+        self.__stop_event = threading.Event()
+        self.__exporting_thread = None
+        self.__http_server = None
+        self.__serving_thread = None
+
+    def add_source(self, stats):
+        self.stats_sources.append(stats)
+
+    def start(self):
+        if self.snapshot_path is None or self.__exporting_thread is not None:
+            return
+        self.__stop_event.clear()
+        self.__exporting_thread = threading.Thread(target=self.export_loop,
+                                                   daemon=True)
+        self.__exporting_thread.start()
+
+    def export_loop(self):
+        while not self.__stop_event.wait(self.interval):
+            self.write_snapshot()
+
+    def write_snapshot(self):
+        snapshots = [stats.snapshot() for stats in self.stats_sources]
+        temporary_path = self.snapshot_path + '.tmp'
+        with open(temporary_path, 'w', encoding="UTF-8") as snapshot_file:
+            json.dump(snapshots, snapshot_file, indent=1)
+        os.replace(temporary_path, self.snapshot_path)
+
+    def serve_prometheus(self, host='127.0.0.1', port=0):
+        exporter = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = exporter.prometheus_text().encode("UTF-8")
+                self.send_response(200)
+                self.send_header('Content-Type',
+                                 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, message_format, *args):
+                pass
+
+        self.__http_server = ThreadingHTTPServer((host, port), MetricsHandler)
+        self.__serving_thread = threading.Thread(
+            target=self.__http_server.serve_forever, daemon=True)
+        self.__serving_thread.start()
+        return self.__http_server.server_address
+
+    def stop(self):
+        self.__stop_event.set()
+        if self.__exporting_thread is not None:
+            self.__exporting_thread.join()
+            self.__exporting_thread = None
+            self.write_snapshot()
+        if self.__http_server is not None:
+            self.__http_server.shutdown()
+            self.__http_server.server_close()
+            self.__serving_thread.join()
+            self.__http_server = None
+
+    def prometheus_text(self):
+        families = {}
+        for stats in self.stats_sources:
+            counters, gauges, histograms = stats.metrics()
+            for (name, label), value in counters.items():
+                samples = StatsExporter.__family(
+                    families, name + '_total', 'counter')
+                samples.append(StatsExporter.__sample(
+                    name + '_total', stats, name, label, value))
+            for (name, label), value in gauges.items():
+                samples = StatsExporter.__family(families, name, 'gauge')
+                samples.append(StatsExporter.__sample(name, stats, name,
+                                                      label, value))
+            for (name, label), (buckets, count, total) in histograms.items():
+                samples = StatsExporter.__family(families, name, 'histogram')
+                for bound, cumulative_count in buckets:
+                    samples.append(StatsExporter.__sample(
+                        name + '_bucket', stats, name, label,
+                        cumulative_count, ('le', repr(bound))))
+                samples.append(StatsExporter.__sample(
+                    name + '_bucket', stats, name, label, count,
+                    ('le', '+Inf')))
+                samples.append(StatsExporter.__sample(
+                    name + '_sum', stats, name, label, total))
+                samples.append(StatsExporter.__sample(
+                    name + '_count', stats, name, label, count))
+
+        lines = []
+        for metric_name in sorted(families):
+            metric_type, samples = families[metric_name]
+            lines.append("# TYPE {0}{1} {2}".format(
+                StatsExporter.METRICS_PREFIX, metric_name, metric_type))
+            lines.extend(samples)
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def __family(families, metric_name, metric_type):
+        if metric_name not in families:
+            families[metric_name] = metric_type, []
+        return families[metric_name][1]
+
+    @staticmethod
+    def __sample(metric_name, stats, name, label, value, extra_label=None):
+        labels = [('connection', stats.connection_name)]
+        if label is not None:
+            labels.append((PipelineStats.LABELS_NAMES.get(name, 'label'),
+                           label))
+        if extra_label is not None:
+            labels.append(extra_label)
+        return "{0}{1}{{{2}}} {3}".format(
+            StatsExporter.METRICS_PREFIX, metric_name,
+            ','.join('{0}="{1}"'.format(label_name,
+                                        StatsExporter.escape(label_value))
+                     for label_name, label_value in labels),
+            value)
+
+    @staticmethod
+    def escape(label_value):
+        return str(label_value).replace('\\', '\\\\') \
+            .replace('"', '\\"').replace('\n', '\\n')
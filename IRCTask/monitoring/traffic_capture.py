@@ -0,0 +1,79 @@
+import struct
+import threading
+import time
+
+from queue import Queue, Empty
+
+
+class TrafficCapture:
+    MAGIC = b'IRCCAP\x01\n'
+    HEADER = struct.Struct('<qq')
+    RECORD = struct.Struct('<qBI')
+    INBOUND = 0
+    OUTBOUND = 1
+    ECHO = 2
+
+    def __init__(self, path):
+        self.path = path
+        self.records_count = 0
+        self.__records_queue = Queue()
+        self.__capture_file = open(path, 'wb')
+        self.__capture_file.write(TrafficCapture.MAGIC)
+        self.__capture_file.write(TrafficCapture.HEADER.pack(
+            time.time_ns(), time.monotonic_ns()))
+        self.__writing_thread = threading.Thread(target=self.write_records,
+                                                 daemon=True)
+        self.__writing_thread.start()
+
+    def record_inbound(self, data):
+        self.__records_queue.put((time.monotonic_ns(),
+                                  TrafficCapture.INBOUND, bytes(data)))
+
+    def record_outbound(self, data):
+        self.__records_queue.put((time.monotonic_ns(),
+                                  TrafficCapture.OUTBOUND, bytes(data)))
+
+    def record_echo(self, line):
+        self.__records_queue.put((time.monotonic_ns(), TrafficCapture.ECHO,
+                                  line.encode("UTF-8")))
+
+    def write_records(self):
+        while True:
+            pending = [self.__records_queue.get()]
+            while True:
+                try:
+                    pending.append(self.__records_queue.get_nowait())
+                except Empty:
+                    break
+            for record in pending:
+                if record is None:
+                    self.__capture_file.close()
+                    return
+                timestamp, direction, data = record
+                self.__capture_file.write(TrafficCapture.RECORD.pack(
+                    timestamp, direction, len(data)))
+                self.__capture_file.write(data)
+                self.records_count += 1
+
+    def close(self):
+        if self.__writing_thread.is_alive():
+            self.__records_queue.put(None)
+            self.__writing_thread.join()
+
+
+def read_capture(path):
+    with open(path, 'rb') as capture_file:
+        if capture_file.read(len(TrafficCapture.MAGIC)) != \
+                TrafficCapture.MAGIC:
+            raise ValueError("Not a traffic capture: " + path)
+        capture_file.read(TrafficCapture.HEADER.size)
+        while True:
+            record_header = capture_file.read(TrafficCapture.RECORD.size)
+            if len(record_header) < TrafficCapture.RECORD.size:
+                return
+            timestamp, direction, data_length = \
+                TrafficCapture.RECORD.unpack(record_header)
+            data = capture_file.read(data_length)
+            if len(data) < data_length:
+                return
+            yield timestamp, direction, data
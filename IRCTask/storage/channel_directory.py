@@ -0,0 +1,263 @@
+import array
+import bisect
+import itertools
+import json
+import math
+import os
+import sys
+import threading
+import time
+
+from data_transfer.channel_info import ChannelInfo
+
+
+class ChannelDirectory:
+    DEFAULT_TTL = 600
+    MAX_INCREMENTAL_AGE = 3600
+    SORT_COLUMNS = ('name', 'users_count', 'topic')
+
+    def __init__(self, server_name, snapshot_path=None, ttl=DEFAULT_TTL):
+        self.server_name = server_name
+        self.snapshot_path = snapshot_path
+        self.ttl = ttl
+        self.refreshed_at = None
+        self.full_refreshed_at = None
+        self.is_incremental_refresh = False
+        self.__rows = {}
+        self.__keys = []
+        self.__names = []
+        self.__users_counts = array.array('q')
+        self.__topics_data = bytearray()
+        self.__topics_starts = array.array('q')
+        self.__topics_ends = array.array('q')
+        self.__orders = {}
+        self.__sorted_users_counts = None
+        self.__seen_channels = None
+        self.__is_replacing = False
+        self.__lock = threading.RLock()
+        if snapshot_path is not None and os.path.exists(snapshot_path):
+            self.load_snapshot()
+
+    @staticmethod
+    def for_server(server_name, snapshots_directory=None,
+                   ttl=DEFAULT_TTL):
+        snapshot_path = None
+        if snapshots_directory is not None:
+            file_name = "{}.json".format(server_name.replace(os.sep, '_'))
+            snapshot_path = os.path.join(snapshots_directory, file_name)
+        return ChannelDirectory(server_name, snapshot_path, ttl)
+
+    def __len__(self):
+        with self.__lock:
+            return len(self.__keys)
+
+    def get(self, channel_name):
+        with self.__lock:
+            row = self.__rows.get(channel_name.lower())
+            return None if row is None else self.__channel_info(row)
+
+    def is_fresh(self, now=None):
+        if self.refreshed_at is None:
+            return False
+        if now is None:
+            now = time.time()
+        return now - self.refreshed_at < self.ttl
+
+    def build_list_filters(self, elist_tokens='', min_users=None, now=None):
+        if now is None:
+            now = time.time()
+        elist_tokens = elist_tokens.upper()
+        user_filter = ''
+        if min_users is not None and 'U' in elist_tokens:
+            user_filter = '>{}'.format(min_users - 1)
+
+        if self.full_refreshed_at is None or now - self.full_refreshed_at > \
+                ChannelDirectory.MAX_INCREMENTAL_AGE:
+            self.begin_refresh()
+            return ['']
+
+        incremental_tokens = [token for token in 'CT'
+                              if token in elist_tokens]
+        if self.refreshed_at is None or not incremental_tokens:
+            self.begin_refresh(is_replacing=not user_filter)
+            return [user_filter]
+
+        self.begin_refresh(is_replacing=False, is_incremental=True)
+        minutes = math.ceil((now - self.refreshed_at) / 60) + 1
+        return ['{0}<{1}'.format(token, minutes)
+                for token in incremental_tokens]
+
+    def begin_refresh(self, is_replacing=True, is_incremental=False):
+        with self.__lock:
+            self.__is_replacing = is_replacing
+            self.is_incremental_refresh = is_incremental
+            self.__seen_channels = set()
+
+    def add_channel(self, channel_info):
+        self.add_row(channel_info.name, channel_info.users_count,
+                     channel_info.full_name)
+
+    def add_row(self, name, users_count, topic):
+        with self.__lock:
+            name = sys.intern(name)
+            channel_key = name.lower()
+            channel_key = name if channel_key == name else \
+                sys.intern(channel_key)
+            topic_start = len(self.__topics_data)
+            self.__topics_data += topic.encode("UTF-8")
+            row = self.__rows.get(channel_key)
+            if row is None:
+                self.__rows[channel_key] = len(self.__keys)
+                self.__keys.append(channel_key)
+                self.__names.append(name)
+                self.__users_counts.append(users_count)
+                self.__topics_starts.append(topic_start)
+                self.__topics_ends.append(len(self.__topics_data))
+                self.__orders.clear()
+            else:
+                self.__names[row] = name
+                self.__topics_starts[row] = topic_start
+                self.__topics_ends[row] = len(self.__topics_data)
+                self.__orders.pop('topic', None)
+                if self.__users_counts[row] != users_count:
+                    self.__users_counts[row] = users_count
+                    self.__orders.pop('users_count', None)
+            if self.__seen_channels is not None:
+                self.__seen_channels.add(channel_key)
+
+    def finish_refresh(self, now=None):
+        with self.__lock:
+            if now is None:
+                now = time.time()
+            if self.__seen_channels is not None and self.__is_replacing:
+                self.full_refreshed_at = now
+            if self.__seen_channels is not None and self.__is_replacing and \
+                    len(self.__seen_channels) < len(self.__keys):
+                self.__keep_rows([row for row, channel_key
+                                  in enumerate(self.__keys)
+                                  if channel_key in self.__seen_channels])
+            elif len(self.__topics_data) > 2 * sum(
+                    end - start for start, end in zip(self.__topics_starts,
+                                                      self.__topics_ends)):
+                self.__keep_rows(range(len(self.__keys)))
+            self.__seen_channels = None
+            self.is_incremental_refresh = False
+            self.refreshed_at = now
+            if self.snapshot_path is not None:
+                self.save_snapshot()
+
+    def filter(self, name_part=None, topic_part=None, min_users=None,
+               max_users=None, sort_by='users_count', descending=True,
+               limit=None):
+        with self.__lock:
+            rows = self.__ordered_rows(sort_by)
+            if sort_by == 'users_count':
+                rows = rows[self.__users_range_slice(min_users, max_users)]
+            elif min_users is not None or max_users is not None:
+                users_counts = self.__users_counts
+                low = -1 if min_users is None else min_users
+                high = sys.maxsize if max_users is None else max_users
+                rows = [row for row in rows
+                        if low <= users_counts[row] <= high]
+            rows = reversed(rows) if descending else iter(rows)
+            if name_part:
+                name_part = name_part.lower()
+                keys = self.__keys
+                rows = (row for row in rows if name_part in keys[row])
+            if topic_part:
+                topic_part = topic_part.lower()
+                rows = (row for row in rows
+                        if topic_part in self.__topic(row).lower())
+            return [self.__channel_info(row)
+                    for row in itertools.islice(rows, limit)]
+
+    def top(self, count, min_users=None, max_users=None):
+        return self.filter(min_users=min_users, max_users=max_users,
+                           limit=count)
+
+    def count_in_users_range(self, min_users=None, max_users=None):
+        with self.__lock:
+            self.__ordered_rows('users_count')
+            users_range = self.__users_range_slice(min_users, max_users)
+            return max(0, users_range.stop - users_range.start)
+
+    def __users_range_slice(self, min_users, max_users):
+        start = 0 if min_users is None else bisect.bisect_left(
+            self.__sorted_users_counts, min_users)
+        stop = len(self.__keys) if max_users is None else bisect.bisect_right(
+            self.__sorted_users_counts, max_users)
+        return slice(start, stop)
+
+    def __ordered_rows(self, sort_by):
+        rows = self.__orders.get(sort_by)
+        if rows is not None:
+            return rows
+        rows_count = len(self.__keys)
+        if sort_by == 'users_count':
+            column = self.__users_counts
+        elif sort_by == 'name':
+            column = self.__keys
+        elif sort_by == 'topic':
+            column = [self.__topic(row).lower() for row in range(rows_count)]
+        else:
+            raise KeyError(sort_by)
+        rows = array.array('q', sorted(range(rows_count),
+                                       key=column.__getitem__))
+        if sort_by == 'users_count':
+            self.__sorted_users_counts = array.array(
+                'q', [column[row] for row in rows])
+        self.__orders[sort_by] = rows
+        return rows
+
+    def __keep_rows(self, kept_rows):
+        topics = [self.__topic(row) for row in kept_rows]
+        self.__keys = [self.__keys[row] for row in kept_rows]
+        self.__names = [self.__names[row] for row in kept_rows]
+        self.__users_counts = array.array(
+            'q', [self.__users_counts[row] for row in kept_rows])
+        self.__topics_data = bytearray()
+        self.__topics_starts = array.array('q')
+        self.__topics_ends = array.array('q')
+        for topic in topics:
+            self.__topics_starts.append(len(self.__topics_data))
+            self.__topics_data += topic.encode("UTF-8")
+            self.__topics_ends.append(len(self.__topics_data))
+        self.__rows = {channel_key: row
+                       for row, channel_key in enumerate(self.__keys)}
+        self.__orders.clear()
+
+    def __topic(self, row):
+        return self.__topics_data[self.__topics_starts[row]:
+                                  self.__topics_ends[row]].decode("UTF-8")
+
+    def __channel_info(self, row):
+        return ChannelInfo(self.__names[row], self.__users_counts[row],
+                           self.__topic(row))
+
+    def save_snapshot(self):
+        with self.__lock:
+            snapshot = {
+                'server': self.server_name,
+                'refreshed_at': self.refreshed_at,
+                'full_refreshed_at': self.full_refreshed_at,
+                'channels': [[self.__names[row], self.__users_counts[row],
+                              self.__topic(row)]
+                             for row in range(len(self.__keys))]
+            }
+            temporary_path = self.snapshot_path + '.tmp'
+            with open(temporary_path, 'w', encoding="UTF-8") as snapshot_file:
+                json.dump(snapshot, snapshot_file, separators=(',', ':'))
+            os.replace(temporary_path, self.snapshot_path)
+
+    def load_snapshot(self):
+        try:
+            with open(self.snapshot_path, encoding="UTF-8") as snapshot_file:
+                snapshot = json.load(snapshot_file)
+        except (OSError, ValueError):
+            return
+        with self.__lock:
+            self.refreshed_at = snapshot.get('refreshed_at')
+            self.full_refreshed_at = snapshot.get('full_refreshed_at')
+            self.__keep_rows([])
+            for name, users_count, topic in snapshot.get('channels', []):
+                self.add_row(name, users_count, topic)
@@ -0,0 +1,176 @@
+import collections
+import queue
+import sqlite3
+import threading
+import time
+
+IndexedChannel = collections.namedtuple(
+    'IndexedChannel', ['server', 'name', 'users_count', 'topic', 'seen_at'])
+CrawlStatus = collections.namedtuple(
+    'CrawlStatus', ['server', 'started_at', 'finished_at', 'channels_count',
+                    'error'])
+
+
+class ChannelIndex:
+    BATCH_SIZE = 2000
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS channels (
+            server TEXT NOT NULL,
+            channel TEXT NOT NULL,
+            name TEXT NOT NULL,
+            users_count INTEGER NOT NULL,
+            topic TEXT NOT NULL,
+            seen_at REAL NOT NULL,
+            PRIMARY KEY (server, channel)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS channels_by_users
+            ON channels (users_count DESC);
+        CREATE INDEX IF NOT EXISTS channels_by_name
+            ON channels (channel);
+        CREATE TABLE IF NOT EXISTS crawls (
+            server TEXT PRIMARY KEY,
+            started_at REAL NOT NULL,
+            finished_at REAL NOT NULL,
+            channels_count INTEGER NOT NULL,
+            error TEXT
+        );
+    """
+
+    def __init__(self, database_path):
+        self.database_path = database_path
+        self.last_error = None
+        self.__records_queue = queue.SimpleQueue()
+        connection = self.__open_connection()
+        connection.executescript(ChannelIndex.SCHEMA)
+        connection.close()
+        self.__writing_thread = threading.Thread(target=self.write_records,
+                                                 daemon=True)
+        self.__writing_thread.start()
+
+    def add_channels(self, server, channels_infos, seen_at=None):
+        if seen_at is None:
+            seen_at = time.time()
+        self.__records_queue.put([
+            (server, channel_info.name.lower(), channel_info.name,
+             channel_info.users_count, channel_info.full_name, seen_at)
+            for channel_info in channels_infos])
+
+    def finish_crawl(self, server, started_at, channels_count, error=None):
+        self.__records_queue.put(CrawlStatus(server, started_at, time.time(),
+                                             channels_count, error))
+
+    def flush(self, timeout=None):
+        if not self.__writing_thread.is_alive():
+            return False
+        flushed = threading.Event()
+        self.__records_queue.put(flushed)
+        return flushed.wait(timeout)
+
+    def close(self):
+        if self.__writing_thread.is_alive():
+            self.__records_queue.put(None)
+            self.__writing_thread.join()
+        while True:
+            try:
+                item = self.__records_queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, threading.Event):
+                item.set()
+
+    def write_records(self):
+        connection = self.__open_connection()
+        is_closing = False
+        while not is_closing:
+            records = []
+            statuses = []
+            events = []
+            item = self.__records_queue.get()
+            while True:
+                if item is None:
+                    is_closing = True
+                elif isinstance(item, threading.Event):
+                    events.append(item)
+                elif isinstance(item, CrawlStatus):
+                    statuses.append(item)
+                else:
+                    records.extend(item)
+                if is_closing or len(records) >= ChannelIndex.BATCH_SIZE:
+                    break
+                try:
+                    item = self.__records_queue.get_nowait()
+                except queue.Empty:
+                    break
+            if records or statuses:
+                try:
+                    ChannelIndex.__write(connection, records, statuses)
+                except sqlite3.Error as error:
+                    self.last_error = error
+            for event in events:
+                event.set()
+        connection.close()
+
+    @staticmethod
+    def __write(connection, records, statuses):
+        with connection:
+            connection.executemany(
+                "INSERT INTO channels (server, channel, name, users_count, "
+                "topic, seen_at) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (server, channel) DO UPDATE SET "
+                "name = excluded.name, users_count = excluded.users_count, "
+                "topic = excluded.topic, seen_at = excluded.seen_at",
+                records)
+            for status in statuses:
+                if status.error is None:
+                    connection.execute(
+                        "DELETE FROM channels WHERE server = ? "
+                        "AND seen_at < ?", (status.server, status.started_at))
+                connection.execute(
+                    "INSERT OR REPLACE INTO crawls (server, started_at, "
+                    "finished_at, channels_count, error) "
+                    "VALUES (?, ?, ?, ?, ?)", status)
+
+    def search(self, name_part=None, min_users=None, server=None, limit=100):
+        conditions = []
+        parameters = []
+        if name_part:
+            conditions.append("instr(channel, ?) > 0")
+            parameters.append(name_part.lower())
+        if min_users is not None:
+            conditions.append("users_count >= ?")
+            parameters.append(min_users)
+        if server is not None:
+            conditions.append("server = ?")
+            parameters.append(server)
+        query = "SELECT server, name, users_count, topic, seen_at " \
+                "FROM channels"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY users_count DESC, channel LIMIT ?"
+        parameters.append(limit)
+        return [IndexedChannel(*row) for row in self.__query(query,
+                                                             parameters)]
+
+    def channels_count(self, server=None):
+        if server is None:
+            return self.__query("SELECT COUNT(*) FROM channels")[0][0]
+        return self.__query("SELECT COUNT(*) FROM channels WHERE server = ?",
+                            (server,))[0][0]
+
+    def crawls(self):
+        return [CrawlStatus(*row) for row in self.__query(
+            "SELECT server, started_at, finished_at, channels_count, error "
+            "FROM crawls ORDER BY server")]
+
+    def __query(self, query, parameters=()):
+        connection = self.__open_connection()
+        try:
+            return connection.execute(query, parameters).fetchall()
+        finally:
+            connection.close()
+
+    def __open_connection(self):
+        connection = sqlite3.connect(self.database_path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
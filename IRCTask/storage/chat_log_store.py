@@ -0,0 +1,162 @@
+import collections
+import queue
+import sqlite3
+import threading
+import time
+
+LogRecord = collections.namedtuple(
+    'LogRecord', ['server', 'channel', 'nick', 'timestamp', 'text'])
+
+
+class ChatLogStore:
+    BATCH_SIZE = 1000
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY,
+            server TEXT NOT NULL,
+            channel TEXT NOT NULL,
+            nick TEXT NOT NULL,
+            timestamp REAL NOT NULL,
+            text TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS messages_by_channel
+            ON messages (server, channel, timestamp);
+        CREATE INDEX IF NOT EXISTS messages_by_nick
+            ON messages (nick, timestamp);
+        CREATE VIRTUAL TABLE IF NOT EXISTS messages_text USING fts5(
+            text, content='messages', content_rowid='id'
+        );
+    """
+
+    def __init__(self, database_path):
+        self.database_path = database_path
+        self.last_error = None
+        self.failed_records_count = 0
+        self.__records_queue = queue.SimpleQueue()
+        connection = self.__open_connection()
+        connection.executescript(ChatLogStore.SCHEMA)
+        connection.close()
+        self.__writing_thread = threading.Thread(target=self.write_records,
+                                                 daemon=True)
+        self.__writing_thread.start()
+
+    def append(self, server, channel, nick, text, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+        self.__records_queue.put((server, channel.lower(), nick,
+                                  timestamp, text))
+
+    def flush(self, timeout=None):
+        if not self.__writing_thread.is_alive():
+            return False
+        flushed = threading.Event()
+        self.__records_queue.put(flushed)
+        return flushed.wait(timeout)
+
+    def close(self):
+        if self.__writing_thread.is_alive():
+            self.__records_queue.put(None)
+            self.__writing_thread.join()
+        while True:
+            try:
+                item = self.__records_queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, threading.Event):
+                item.set()
+
+    def write_records(self):
+        connection = self.__open_connection()
+        is_closing = False
+        while not is_closing:
+            records = []
+            events = []
+            item = self.__records_queue.get()
+            while True:
+                if item is None:
+                    is_closing = True
+                elif isinstance(item, threading.Event):
+                    events.append(item)
+                else:
+                    records.append(item)
+                if is_closing or len(records) >= ChatLogStore.BATCH_SIZE:
+                    break
+                try:
+                    item = self.__records_queue.get_nowait()
+                except queue.Empty:
+                    break
+            if records:
+                try:
+                    self.__insert_records(connection, records)
+                except sqlite3.Error as error:
+                    self.last_error = error
+                    self.failed_records_count += len(records)
+            for event in events:
+                event.set()
+        connection.close()
+
+    def search(self, keywords=None, server=None, channel=None, nick=None,
+               since=None, until=None, limit=100):
+        conditions = []
+        parameters = []
+        source = "messages"
+        if keywords:
+            source = "messages JOIN messages_text " \
+                     "ON messages_text.rowid = messages.id"
+            conditions.append("messages_text MATCH ?")
+            parameters.append(ChatLogStore.build_match_query(keywords))
+        for column, value in (("server", server), ("nick", nick)):
+            if value is not None:
+                conditions.append("messages.{} = ?".format(column))
+                parameters.append(value)
+        if channel is not None:
+            conditions.append("messages.channel = ?")
+            parameters.append(channel.lower())
+        if since is not None:
+            conditions.append("messages.timestamp >= ?")
+            parameters.append(since)
+        if until is not None:
+            conditions.append("messages.timestamp < ?")
+            parameters.append(until)
+
+        query = "SELECT messages.server, messages.channel, messages.nick, " \
+                "messages.timestamp, messages.text FROM " + source
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY messages.timestamp DESC LIMIT ?"
+        parameters.append(limit)
+
+        connection = self.__open_connection()
+        try:
+            return [LogRecord(*row)
+                    for row in connection.execute(query, parameters)]
+        finally:
+            connection.close()
+
+    @staticmethod
+    def build_match_query(keywords):
+        if isinstance(keywords, str):
+            keywords = keywords.split()
+        return ' '.join('"{}"'.format(keyword.replace('"', '""'))
+                        for keyword in keywords)
+
+    def __open_connection(self):
+        connection = sqlite3.connect(self.database_path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    @staticmethod
+    def __insert_records(connection, records):
+        with connection:
+            first_id = connection.execute(
+                "SELECT COALESCE(MAX(id), 0) + 1 FROM messages").fetchone()[0]
+            connection.executemany(
+                "INSERT INTO messages (id, server, channel, nick, timestamp, "
+                "text) VALUES (?, ?, ?, ?, ?, ?)",
+                ((first_id + index,) + record
+                 for index, record in enumerate(records)))
+            connection.executemany(
+                "INSERT INTO messages_text (rowid, text) VALUES (?, ?)",
+                ((first_id + index, record[4])
+                 for index, record in enumerate(records)))
@@ -0,0 +1,173 @@
+import sys
+import threading
+
+from client.irc_client import IRCClient
+
+
+class TerminalFrontEnd:
+    CHANNEL_PREFIXES = ('#', '&', '+', '!')
+    STATUS_MARK = "-!-"
+    HELP_TEXT = ("/join #a[,#b]  /part [#channel]  /channel #channel  "
+                 "/msg target text  /names  /list [min_users]  "
+                 "/raw line  /quit")
+
+    def __init__(self, irc_client=None, output=None):
+        if irc_client is None:
+            irc_client = IRCClient()
+        self.irc_client = irc_client
+        self.output = output if output is not None else sys.stdout
+        self.is_running = True
+        self.channels_to_join = []
+        self.__output_lock = threading.Lock()
+        self.__commands = {
+            "join": self.__join,
+            "part": self.__part,
+            "channel": self.__switch_channel,
+            "msg": self.__send_private_message,
+            "names": self.__show_names,
+            "list": self.__list_channels,
+            "raw": self.__send_raw,
+            "quit": self.__quit,
+            "help": self.__show_help
+        }
+
+        irc_client.chat_transmitter.connect_receiver(self.receive_chat_text)
+        irc_client.status_update_handler.connect_receiver(
+            self.receive_status)
+        irc_client.roster_transmitter.connect_receiver(
+            self.receive_roster_change)
+        irc_client.channel_data_handler.connect_receiver(
+            self.receive_channel_info)
+        irc_client.on_registered = self.on_registered
+
+    def write_line(self, line):
+        with self.__output_lock:
+            self.output.write(line + '\n')
+            self.output.flush()
+
+    def write_status(self, text):
+        self.write_line("{0} {1}".format(TerminalFrontEnd.STATUS_MARK, text))
+
+    def receive_chat_text(self, message):
+        if message.prefix is not None:
+            name = message.nick
+        else:
+            name = self.irc_client.connection_data.user.username
+        target = message.target
+        if message.prefix is not None and \
+                not target.startswith(TerminalFrontEnd.CHANNEL_PREFIXES):
+            target = message.nick
+        self.write_line("[{0}] <{1}> {2}".format(target, name,
+                                                  message.trailing))
+
+    def receive_status(self, text):
+        self.write_status(text.split(" ", 1)[-1])
+
+    def receive_roster_change(self, roster_change):
+        channel_name, change = roster_change
+        if change[0] == 'reset':
+            self.write_status("{0}: {1} users".format(channel_name,
+                                                      len(change[1])))
+
+    def receive_channel_info(self, channel_info):
+        self.write_line("{0} ({1}) {2}".format(channel_info.name,
+                                               channel_info.users_count,
+                                               channel_info.full_name))
+
+    def on_registered(self):
+        self.write_status("REGISTERED AS " +
+                          self.irc_client.connection_data.user.username)
+        if self.channels_to_join:
+            self.irc_client.connect_to_channels(self.channels_to_join)
+
+    def connect(self, server_name, server_port, user, channels_names=()):
+        self.channels_to_join = list(channels_names)
+        self.irc_client.set_user(user)
+        self.irc_client.connect_to_server(server_name, server_port)
+
+    def run(self, input_stream=None):
+        if input_stream is None:
+            input_stream = sys.stdin
+        for line in input_stream:
+            self.handle_input_line(line)
+            if not self.is_running:
+                break
+        if self.is_running:
+            self.__quit('')
+
+    def handle_input_line(self, line):
+        line = line.rstrip('\r\n')
+        if not line:
+            return
+        if not line.startswith('/') or line.startswith('//'):
+            self.__send_to_current_channel(line[1:] if line.startswith('//')
+                                           else line)
+            return
+        name, _, arguments = line[1:].partition(' ')
+        command = self.__commands.get(name.lower())
+        if command is None:
+            self.write_status("Unknown command /{0}, try /help".format(name))
+            return
+        try:
+            command(arguments.strip())
+        except ValueError as error:
+            self.write_status(str(error))
+
+    def __send_to_current_channel(self, text):
+        if not self.irc_client.connection_data.channel:
+            self.write_status("Join a channel first, try /join #channel")
+            return
+        self.irc_client.send_user_message(text)
+
+    def __join(self, arguments):
+        channels_names = [channel_name for channel_name in
+                          arguments.replace(' ', ',').split(',')
+                          if channel_name]
+        if not channels_names:
+            raise ValueError("Usage: /join #channel[,#other]")
+        self.irc_client.connect_to_channels(channels_names)
+
+    def __part(self, arguments):
+        channel_name = arguments or self.irc_client.connection_data.channel
+        if not channel_name:
+            raise ValueError("Usage: /part #channel")
+        self.irc_client.leave_channel(channel_name)
+        joined_channels = self.irc_client.joined_channels()
+        if channel_name.lower() == \
+                self.irc_client.connection_data.channel.lower():
+            self.irc_client.connection_data.channel = \
+                joined_channels[-1] if joined_channels else ''
+
+    def __switch_channel(self, arguments):
+        if not self.irc_client.is_connected_channel(arguments):
+            raise ValueError("Not on channel " + arguments)
+        self.irc_client.connection_data.channel = arguments
+        self.write_status("Talking in " + arguments)
+
+    def __send_private_message(self, arguments):
+        target, _, text = arguments.partition(' ')
+        if not target or not text:
+            raise ValueError("Usage: /msg target text")
+        self.irc_client.send_user_message(text, target)
+
+    def __show_names(self, arguments):
+        channel_name = arguments or self.irc_client.connection_data.channel
+        roster = self.irc_client.get_roster(channel_name)
+        if roster is None:
+            raise ValueError("No names known for " + channel_name)
+        self.write_status("{0}: {1}".format(channel_name,
+                                            ' '.join(roster.names())))
+
+    def __list_channels(self, arguments):
+        min_users = int(arguments) if arguments.isdigit() else None
+        self.irc_client.update_channels_list(min_users=min_users)
+
+    def __send_raw(self, arguments):
+        self.irc_client.send_raw_message(arguments)
+
+    def __quit(self, arguments):
+        self.is_running = False
+        self.irc_client.close()
+
+    def __show_help(self, arguments):
+        self.write_status(TerminalFrontEnd.HELP_TEXT)
@@ -0,0 +1,29 @@
+import argparse
+
+from data_transfer.user import User
+from terminal.terminal_front_end import TerminalFrontEnd
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Chat on IRC from a plain terminal.")
+    parser.add_argument('server')
+    parser.add_argument('--port', type=int, default=6667)
+    parser.add_argument('--nick', required=True)
+    parser.add_argument('--join', default='',
+                        help="channels joined after registration, "
+                             "as #first,#second")
+    arguments = parser.parse_args()
+
+    front_end = TerminalFrontEnd()
+    front_end.connect(arguments.server, arguments.port, User(arguments.nick),
+                      [channel_name for channel_name in
+                       arguments.join.split(',') if channel_name])
+    try:
+        front_end.run()
+    except KeyboardInterrupt:
+        front_end.handle_input_line("/quit")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,396 @@
+import argparse
+import asyncio
+import itertools
+import threading
+import time
+
+from data_transfer.irc_message import IRCMessage
+from testing.traffic_generator import read_traffic_file
+
+
+class FakeIRCSession:
+
+    def __init__(self, server, reader, writer):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.nick = None
+        self.username = None
+        self.is_registered = False
+        self.is_negotiating = False
+        self.capabilities = set()
+        self.channels = set()
+
+    @property
+    def mask(self):
+        return "{0}!{1}@localhost".format(self.nick, self.username)
+
+    def send_line(self, line):
+        if self.writer.transport.is_closing():
+            return
+        self.writer.write(bytes(line + '\r\n', "UTF-8"))
+
+    def send_tagged_line(self, line, tags):
+        allowed_tags = []
+        for key, value in tags.items():
+            if key == 'time' and 'server-time' not in self.capabilities:
+                continue
+            if key == 'batch' and 'batch' not in self.capabilities:
+                continue
+            if key not in ('time', 'batch') and \
+                    'message-tags' not in self.capabilities:
+                continue
+            allowed_tags.append("{0}={1}".format(key, value))
+        if allowed_tags:
+            line = "@{0} {1}".format(';'.join(allowed_tags), line)
+        self.send_line(line)
+
+    def send_numeric(self, numeric, *params):
+        self.send_line(":{0} {1} {2} {3}".format(self.server.server_name,
+                                                 numeric,
+                                                 self.nick or '*',
+                                                 ' '.join(params)))
+
+
+class FakeIRCServer:
+    REPLAY_CHUNK_SIZE = 256
+    REPLAY_TICK = 0.01
+    CAPABILITIES = ("message-tags", "server-time", "batch",
+                    "draft/chathistory")
+    HISTORY_LIMIT = 100
+    HISTORY_KEPT_COUNT = 1000
+
+    def __init__(self, host='127.0.0.1', port=0, server_name='irc.fake.net',
+                 ssl_context=None):
+        self.host = host
+        self.ssl_context = ssl_context
+        self.port = port
+        self.server_name = server_name
+        self.channels_topics = {}
+        self.channels_members = {}
+        self.channels_history = {}
+        self.capabilities = FakeIRCServer.CAPABILITIES
+        self.sessions = set()
+        self.received_lines = []
+        self.is_recording_lines = False
+        self.is_responding = True
+        self.replay_lines = None
+        self.replay_rate = None
+        self.replay_tasks = set()
+        self.list_delay = None
+        self.__loop = None
+        self.__server = None
+        self.__thread = None
+        self.__started = threading.Event()
+        self.__batch_references = itertools.count(1)
+        self.__commands_handlers = {
+            "CAP": self.__handle_capabilities,
+            "CHATHISTORY": self.__handle_chat_history,
+            "NICK": self.__handle_nick,
+            "USER": self.__handle_user,
+            "PING": self.__handle_ping,
+            "JOIN": self.__handle_join,
+            "PART": self.__handle_part,
+            "NAMES": self.__handle_names,
+            "LIST": self.__handle_list,
+            "PRIVMSG": self.__handle_privmsg,
+            "QUIT": self.__handle_quit
+        }
+
+    @property
+    def address(self):
+        return self.host, self.port
+
+    def add_channel(self, channel_name, topic=''):
+        self.channels_topics[channel_name] = topic
+
+    def add_history(self, channel_name, mask, text, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+        history = self.channels_history.setdefault(channel_name.lower(), [])
+        history.append((timestamp, mask, text))
+        if len(history) > FakeIRCServer.HISTORY_KEPT_COUNT:
+            del history[:len(history) - FakeIRCServer.HISTORY_KEPT_COUNT]
+
+    def start(self):
+        self.__thread = threading.Thread(target=self.__run_loop, daemon=True)
+        self.__thread.start()
+        self.__started.wait()
+        return self
+
+    def stop(self):
+        if self.__loop is None:
+            return
+        self.__loop.call_soon_threadsafe(self.__loop.stop)
+        self.__thread.join()
+        self.__loop = None
+
+    def call_soon(self, callback, *args):
+        self.__loop.call_soon_threadsafe(callback, *args)
+
+    def broadcast(self, line):
+        self.call_soon(self.__broadcast, line)
+
+    def drop_sessions(self):
+        self.call_soon(self.__drop_sessions)
+
+    def __drop_sessions(self):
+        for session in list(self.sessions):
+            session.writer.transport.abort()
+
+    def replay_on_registration(self, lines, rate=None):
+        self.replay_lines = lines
+        self.replay_rate = rate
+
+    def replay(self, lines, rate=None):
+        self.call_soon(self.__start_replays, lines, rate)
+
+    def __start_replays(self, lines, rate):
+        for session in self.sessions:
+            if session.is_registered:
+                self.__start_replay(session, lines, rate)
+
+    def __start_replay(self, session, lines, rate):
+        task = self.__loop.create_task(self.__replay(session, lines, rate))
+        self.replay_tasks.add(task)
+        task.add_done_callback(self.replay_tasks.discard)
+
+    async def __replay(self, session, lines, rate):
+        chunk_size = FakeIRCServer.REPLAY_CHUNK_SIZE
+        if rate is not None:
+            chunk_size = max(1, int(rate * FakeIRCServer.REPLAY_TICK))
+        started_at = time.monotonic()
+        try:
+            for chunk_start in range(0, len(lines), chunk_size):
+                timestamp = str(time.monotonic_ns())
+                for line in lines[chunk_start:chunk_start + chunk_size]:
+                    if '{' in line:
+                        line = line.replace('{nick}', session.nick).replace(
+                            '{timestamp}', timestamp)
+                    session.send_line(line)
+                await session.writer.drain()
+                if rate is not None:
+                    sent_count = chunk_start + chunk_size
+                    delay = started_at + sent_count / rate - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+        except ConnectionError:
+            pass
+
+    def __broadcast(self, line):
+        for session in self.sessions:
+            session.send_line(line)
+
+    def __run_loop(self):
+        self.__loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.__loop)
+        self.__server = self.__loop.run_until_complete(
+            asyncio.start_server(self.__handle_connection,
+                                 self.host, self.port, backlog=4096,
+                                 ssl=self.ssl_context))
+        self.port = self.__server.sockets[0].getsockname()[1]
+        self.__started.set()
+        try:
+            self.__loop.run_forever()
+        finally:
+            self.__server.close()
+            for session in list(self.sessions):
+                session.writer.close()
+            self.__loop.run_until_complete(asyncio.sleep(0))
+            self.__loop.close()
+
+    async def __handle_connection(self, reader, writer):
+        session = FakeIRCSession(self, reader, writer)
+        self.sessions.add(session)
+        try:
+            while True:
+                raw_line = await reader.readline()
+                if not raw_line:
+                    break
+                line = raw_line.decode("UTF-8", errors='replace').rstrip()
+                if self.is_recording_lines:
+                    self.received_lines.append(line)
+                if not self.is_responding:
+                    continue
+                message = IRCMessage.parse(line)
+                handler = self.__commands_handlers.get(message.command)
+                if handler is not None and handler(session, message):
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions.discard(session)
+            for channel_name in list(session.channels):
+                self.__leave_channel(session, channel_name)
+            writer.close()
+
+    def __handle_nick(self, session, message):
+        session.nick = message.target
+        self.__try_register(session)
+
+    def __handle_user(self, session, message):
+        session.username = message.target
+        self.__try_register(session)
+
+    def __try_register(self, session):
+        if session.is_registered or session.is_negotiating or \
+                None in (session.nick, session.username):
+            return
+        session.is_registered = True
+        session.send_numeric("001",
+                             ":Welcome to the fake network " + session.nick)
+        features = "CHANTYPES=# PREFIX=(ov)@+"
+        if "draft/chathistory" in self.capabilities:
+            features += " CHATHISTORY={}".format(FakeIRCServer.HISTORY_LIMIT)
+        session.send_numeric("005", features,
+                             ":are supported by this server")
+        session.send_numeric("376", ":End of /MOTD command.")
+        if self.replay_lines is not None:
+            self.__start_replay(session, self.replay_lines, self.replay_rate)
+
+    def __handle_capabilities(self, session, message):
+        if not self.capabilities or not message.params:
+            return
+        subcommand = message.params[0].upper()
+        if subcommand == "LS":
+            session.is_negotiating = True
+            session.send_line(":{0} CAP {1} LS :{2}".format(
+                self.server_name, session.nick or '*',
+                ' '.join(self.capabilities)))
+        elif subcommand == "REQ":
+            session.is_negotiating = True
+            requested = message.trailing.split()
+            reply = "ACK" if all(capability in self.capabilities
+                                 for capability in requested) else "NAK"
+            if reply == "ACK":
+                session.capabilities.update(requested)
+            session.send_line(":{0} CAP {1} {2} :{3}".format(
+                self.server_name, session.nick or '*', reply,
+                ' '.join(requested)))
+        elif subcommand == "END":
+            session.is_negotiating = False
+            self.__try_register(session)
+
+    def __handle_chat_history(self, session, message):
+        if "draft/chathistory" not in session.capabilities or \
+                len(message.params) < 4:
+            return
+        subcommand, channel_name = message.params[0].upper(), \
+            message.params[1]
+        history = self.channels_history.get(channel_name.lower(), [])
+        limit = min(int(message.params[3]) if message.params[3].isdigit()
+                    else FakeIRCServer.HISTORY_LIMIT,
+                    FakeIRCServer.HISTORY_LIMIT)
+        if subcommand == "LATEST":
+            selected = history[-limit:] if limit else []
+        elif subcommand == "AFTER":
+            after = IRCMessage.parse("@time={} X".format(
+                message.params[2].partition('=')[2])).server_time() or 0
+            selected = [entry for entry in history
+                        if round(entry[0], 3) > round(after, 3)][:limit]
+        else:
+            return
+        reference = "history{}".format(next(self.__batch_references))
+        session.send_line(":{0} BATCH +{1} chathistory {2}".format(
+            self.server_name, reference, channel_name))
+        for timestamp, mask, text in selected:
+            session.send_tagged_line(
+                ":{0} PRIVMSG {1} :{2}".format(mask, channel_name, text),
+                {'batch': reference,
+                 'time': IRCMessage.format_server_time(timestamp)})
+        session.send_line(":{0} BATCH -{1}".format(self.server_name,
+                                                   reference))
+
+    def __handle_ping(self, session, message):
+        session.send_line(":{0} PONG {0} :{1}".format(self.server_name,
+                                                      message.trailing))
+
+    def __handle_join(self, session, message):
+        for channel_name in message.target.split(','):
+            self.channels_topics.setdefault(channel_name, '')
+            self.channels_members.setdefault(channel_name, set()).add(session)
+            session.channels.add(channel_name)
+            join_line = ":{0} JOIN {1}".format(session.mask, channel_name)
+            for member in self.__channel_members(channel_name):
+                member.send_line(join_line)
+            self.__send_names(session, channel_name)
+
+    def __handle_part(self, session, message):
+        for channel_name in message.target.split(','):
+            part_line = ":{0} PART {1}".format(session.mask, channel_name)
+            for member in self.__channel_members(channel_name):
+                member.send_line(part_line)
+            self.__leave_channel(session, channel_name)
+
+    def __handle_names(self, session, message):
+        self.__send_names(session, message.target)
+
+    def __send_names(self, session, channel_name):
+        names = ' '.join(member.nick
+                         for member in self.__channel_members(channel_name))
+        session.send_numeric("353", "=", channel_name, ":" + names)
+        session.send_numeric("366", channel_name, ":End of /NAMES list.")
+
+    def __handle_list(self, session, message):
+        if self.list_delay:
+            self.__loop.call_later(self.list_delay, self.__send_list, session)
+        else:
+            self.__send_list(session)
+
+    def __send_list(self, session):
+        session.send_numeric("321", "Channel", ":Users Name")
+        for channel_name, topic in self.channels_topics.items():
+            users_count = len(self.__channel_members(channel_name))
+            session.send_numeric("322", channel_name, str(users_count),
+                                 ":" + topic)
+        session.send_numeric("323", ":End of /LIST")
+
+    def __handle_privmsg(self, session, message):
+        line = ":{0} PRIVMSG {1} :{2}".format(session.mask, message.target,
+                                              message.trailing)
+        timestamp = time.time()
+        if message.target.startswith('#'):
+            self.add_history(message.target, session.mask, message.trailing,
+                             timestamp)
+        tags = {'time': IRCMessage.format_server_time(timestamp)}
+        for member in self.__channel_members(message.target):
+            if member is not session:
+                member.send_tagged_line(line, tags)
+
+    def __handle_quit(self, session, message):
+        return True
+
+    def __leave_channel(self, session, channel_name):
+        session.channels.discard(channel_name)
+        members = self.channels_members.get(channel_name)
+        if members is not None:
+            members.discard(session)
+
+    def __channel_members(self, channel_name):
+        return self.channels_members.get(channel_name, ())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake IRC server.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=6667)
+    parser.add_argument('--replay', help="traffic file replayed to every "
+                                         "client after registration")
+    parser.add_argument('--rate', type=float,
+                        help="replay rate in lines per second")
+    arguments = parser.parse_args()
+
+    server = FakeIRCServer(arguments.host, arguments.port)
+    if arguments.replay is not None:
+        server.replay_on_registration(read_traffic_file(arguments.replay),
+                                      arguments.rate)
+    server.start()
+    print("{0}:{1}".format(*server.address), flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+import gc
+import math
+import os
+import threading
+import time
+import tracemalloc
+
+from client.irc_client import IRCClient
+from data_transfer.frame_bridge import FrameBridge
+from data_transfer.scrollback import Scrollback
+from data_transfer.user import User
+from testing.fake_irc_server import FakeIRCServer
+
+
+class ResourceSample:
+    __slots__ = ('cycle', 'traced_bytes', 'threads_count', 'fds_count')
+
+    def __init__(self, cycle, traced_bytes, threads_count, fds_count):
+        self.cycle = cycle
+        self.traced_bytes = traced_bytes
+        self.threads_count = threads_count
+        self.fds_count = fds_count
+
+    @staticmethod
+    def take(cycle):
+        gc.collect()
+        return ResourceSample(cycle, tracemalloc.get_traced_memory()[0],
+                              threading.active_count(),
+                              ResourceSample.count_fds())
+
+    @staticmethod
+    def count_fds():
+        for fds_directory in ('/proc/self/fd', '/dev/fd'):
+            if os.path.isdir(fds_directory):
+                return len(os.listdir(fds_directory))
+        return None
+
+
+class SoakBudget:
+    __slots__ = ('memory_growth_bytes', 'threads_growth', 'fds_growth')
+
+    def __init__(self, memory_growth_bytes=2 * 1024 * 1024, threads_growth=0,
+                 fds_growth=0):
+        self.memory_growth_bytes = memory_growth_bytes
+        self.threads_growth = threads_growth
+        self.fds_growth = fds_growth
+
+
+class SoakReport:
+
+    def __init__(self, cycles, simulated_seconds, elapsed, samples,
+                 top_allocations, violations):
+        self.cycles = cycles
+        self.simulated_seconds = simulated_seconds
+        self.elapsed = elapsed
+        self.samples = samples
+        self.top_allocations = top_allocations
+        self.violations = violations
+
+    def is_within_budget(self):
+        return not self.violations
+
+    def format(self):
+        lines = ["{0} cycles, {1:.1f} simulated hours in {2:.1f} s".format(
+            self.cycles, self.simulated_seconds / 3600, self.elapsed)]
+        lines.append("{0:>7} {1:>12} {2:>8} {3:>5}".format(
+            "cycle", "traced KiB", "threads", "fds"))
+        for sample in self.samples:
+            lines.append("{0:>7} {1:>12.1f} {2:>8} {3:>5}".format(
+                sample.cycle, sample.traced_bytes / 1024,
+                sample.threads_count,
+                '-' if sample.fds_count is None else sample.fds_count))
+        lines.append("top allocation growth:")
+        lines.extend("  " + allocation for allocation in self.top_allocations)
+        lines.extend("BUDGET EXCEEDED: " + violation
+                     for violation in self.violations)
+        return '\n'.join(lines)
+
+
+class SoakHarness:
+    SIMULATED_CYCLE_SECONDS = 60
+    SYNC_CHANNEL = "#soak"
+    SYNC_TIMEOUT = 10
+    SYNC_RESEND_INTERVAL = 0.5
+    TRACEBACK_FRAMES = 8
+    SCROLLBACK_MESSAGES = 200
+
+    def __init__(self, cycles=600, budget=None, channels_count=20,
+                 messages_per_cycle=200, list_every=10, reconnect_every=25,
+                 restart_every=60, samples_count=10, warmup_cycles=None,
+                 top_count=10):
+        self.cycles = cycles
+        self.budget = budget if budget is not None else SoakBudget()
+        self.channels_count = channels_count
+        self.messages_per_cycle = messages_per_cycle
+        self.list_every = list_every
+        self.reconnect_every = reconnect_every
+        self.restart_every = restart_every
+        self.samples_count = samples_count
+        if warmup_cycles is None:
+            warmup_cycles = max(cycles // 10, math.ceil(
+                channels_count * 2 * SoakHarness.SCROLLBACK_MESSAGES /
+                max(1, messages_per_cycle)))
+        self.warmup_cycles = min(warmup_cycles, cycles - 1)
+        self.top_count = top_count
+        self.on_cycle = None
+        self.server = None
+        self.client = None
+        self.scrollbacks = {}
+        self.__frame_bridge = None
+        self.__synced_cycle = -1
+        self.__registrations_count = 0
+        self.__registered = threading.Condition()
+        self.__channels_listed = threading.Event()
+
+    def run(self):
+        tracemalloc.start(SoakHarness.TRACEBACK_FRAMES)
+        started_at = time.monotonic()
+        try:
+            self.__start()
+            for cycle in range(self.warmup_cycles):
+                self.__run_cycle(cycle)
+            baseline = tracemalloc.take_snapshot()
+            samples = [ResourceSample.take(self.warmup_cycles)]
+            sample_every = max(1, (self.cycles - self.warmup_cycles) //
+                               self.samples_count)
+            for cycle in range(self.warmup_cycles, self.cycles):
+                self.__run_cycle(cycle)
+                if (cycle + 1 - self.warmup_cycles) % sample_every == 0 or \
+                        cycle + 1 == self.cycles:
+                    samples.append(ResourceSample.take(cycle + 1))
+            gc.collect()
+            final = tracemalloc.take_snapshot()
+        finally:
+            self.__stop()
+            tracemalloc.stop()
+        top_allocations = [
+            str(statistic) for statistic in final.filter_traces(
+                SoakHarness.__filters()).compare_to(
+                    baseline.filter_traces(SoakHarness.__filters()),
+                    'lineno')[:self.top_count]]
+        return SoakReport(self.cycles,
+                          self.cycles * SoakHarness.SIMULATED_CYCLE_SECONDS,
+                          time.monotonic() - started_at, samples,
+                          top_allocations, self.__check_budget(samples))
+
+    @staticmethod
+    def __filters():
+        return (tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<unknown>"))
+
+    def __check_budget(self, samples):
+        first, last = samples[0], samples[-1]
+        violations = []
+        memory_growth = last.traced_bytes - first.traced_bytes
+        if memory_growth > self.budget.memory_growth_bytes:
+            violations.append("memory grew by {0:.1f} KiB (budget {1:.1f} "
+                              "KiB)".format(memory_growth / 1024,
+                                            self.budget.memory_growth_bytes /
+                                            1024))
+        threads_growth = last.threads_count - first.threads_count
+        if threads_growth > self.budget.threads_growth:
+            violations.append("threads grew by {0} (budget {1})".format(
+                threads_growth, self.budget.threads_growth))
+        if first.fds_count is not None:
+            fds_growth = last.fds_count - first.fds_count
+            if fds_growth > self.budget.fds_growth:
+                violations.append("file descriptors grew by {0} (budget "
+                                  "{1})".format(fds_growth,
+                                                self.budget.fds_growth))
+        return violations
+
+    def __start(self):
+        self.server = FakeIRCServer().start()
+        for index in range(self.channels_count * 2):
+            self.server.add_channel(self.__channel_name(index),
+                                    "soak topic {0}".format(index))
+        self.client = IRCClient()
+        self.client.set_user(User("soaker"))
+        self.client.on_registered = self.__count_registration
+        self.client.on_channels_listed = self.__channels_listed.set
+        self.__frame_bridge = FrameBridge(lambda delay: None)
+        self.__frame_bridge.connect(self.client.chat_transmitter,
+                                    self.__receive_chat_messages)
+        self.__connect()
+
+    def __connect(self):
+        registrations_count = self.__registrations_count + 1
+        self.client.enable_auto_reconnect(base_delay=0.01, max_delay=0.05)
+        self.client.connect_to_server(*self.server.address)
+        self.__wait_for_registrations(registrations_count)
+
+    def __stop(self):
+        if self.client is not None:
+            self.client.close()
+        if self.server is not None:
+            self.server.stop()
+
+    def __count_registration(self):
+        self.client.connect_to_channel(SoakHarness.SYNC_CHANNEL)
+        with self.__registered:
+            self.__registrations_count += 1
+            self.__registered.notify_all()
+
+    def __wait_for_registrations(self, registrations_count):
+        with self.__registered:
+            if not self.__registered.wait_for(
+                    lambda: self.__registrations_count >= registrations_count,
+                    SoakHarness.SYNC_TIMEOUT):
+                raise TimeoutError("Client did not register")
+
+    @staticmethod
+    def __channel_name(index):
+        return "#soak-{0}".format(index)
+
+    def __receive_chat_messages(self, messages):
+        for message in messages:
+            if message.target == SoakHarness.SYNC_CHANNEL:
+                self.__synced_cycle = int(message.trailing)
+                continue
+            scrollback = self.scrollbacks.get(message.target)
+            if scrollback is None:
+                scrollback = Scrollback(
+                    max_messages=SoakHarness.SCROLLBACK_MESSAGES)
+                self.scrollbacks[message.target] = scrollback
+            scrollback.append(message.nick, message.trailing)
+
+    def __run_cycle(self, cycle):
+        channels_names = [
+            self.__channel_name((cycle + index) % (self.channels_count * 2))
+            for index in range(self.channels_count)]
+        self.client.connect_to_channels(channels_names)
+        for index in range(self.messages_per_cycle):
+            self.server.broadcast(
+                ":user{0}!~u@soak.host PRIVMSG {1} :cycle {2} line {3}".format(
+                    index % 50, channels_names[index % len(channels_names)],
+                    cycle, index))
+        if (cycle + 1) % self.list_every == 0:
+            self.__channels_listed.clear()
+            self.client.update_channels_list(force=True)
+            if not self.__channels_listed.wait(SoakHarness.SYNC_TIMEOUT):
+                raise TimeoutError("Channels list did not finish")
+        for channel_name in channels_names[:len(channels_names) // 2]:
+            self.client.leave_channel(channel_name)
+        if (cycle + 1) % self.reconnect_every == 0:
+            registrations_count = self.__registrations_count + 1
+            self.server.drop_sessions()
+            self.__wait_for_registrations(registrations_count)
+        if (cycle + 1) % self.restart_every == 0:
+            self.client.disconnect()
+            self.__connect()
+        if self.on_cycle is not None:
+            self.on_cycle(cycle)
+        self.__sync(cycle)
+
+    def __sync(self, cycle):
+        deadline = time.monotonic() + SoakHarness.SYNC_TIMEOUT
+        resend_at = 0
+        while self.__synced_cycle < cycle:
+            now = time.monotonic()
+            if now > deadline:
+                raise TimeoutError("Cycle {0} was not delivered".format(cycle))
+            if now >= resend_at:
+                self.server.broadcast(":sync!~s@soak.host PRIVMSG {0} :{1}"
+                                      .format(SoakHarness.SYNC_CHANNEL, cycle))
+                resend_at = now + SoakHarness.SYNC_RESEND_INTERVAL
+            time.sleep(0.002)
+            self.__frame_bridge.flush()
@@ -0,0 +1,92 @@
+import argparse
+import os
+
+END_OF_REPLAY = "END-OF-REPLAY"
+TIMESTAMP_PLACEHOLDER = "{timestamp}"
+SERVER_NAME = "irc.fake.net"
+BENCH_CHANNEL = "#bench"
+
+
+def privmsg_flood(lines_count=100000, channel_name=BENCH_CHANNEL):
+    for index in range(lines_count):
+        yield ":user{0}!u{0}@host{1}.example PRIVMSG {2} :ts={3} message " \
+              "number {4} with some filler text to look like chat".format(
+                  index % 500, index % 50, channel_name,
+                  TIMESTAMP_PLACEHOLDER, index)
+
+
+def channels_list(channels_count=50000):
+    yield ":{0} 321 {{nick}} Channel :Users Name".format(SERVER_NAME)
+    for index in range(channels_count):
+        yield ":{0} 322 {{nick}} #channel{1} {2} :[+nt] Topic of channel " \
+              "{1} about things".format(SERVER_NAME, index,
+                                         (index * 7919) % 5000)
+
+
+def names_list(users_count=10000, channel_name=BENCH_CHANNEL,
+               line_length=400):
+    prefixes = ('', '', '', '', '+', '@')
+    names = []
+    names_length = 0
+    for index in range(users_count):
+        name = "{0}user{1}".format(prefixes[index % len(prefixes)], index)
+        if names and names_length + len(name) > line_length:
+            yield ":{0} 353 {{nick}} = {1} :{2}".format(SERVER_NAME,
+                                                       channel_name,
+                                                       ' '.join(names))
+            names = []
+            names_length = 0
+        names.append(name)
+        names_length += len(name) + 1
+    if names:
+        yield ":{0} 353 {{nick}} = {1} :{2}".format(SERVER_NAME, channel_name,
+                                                   ' '.join(names))
+
+
+def ping_storm(pings_count=20000):
+    for index in range(pings_count):
+        yield "PING :storm{}".format(index)
+
+
+SCENARIOS = {
+    'privmsg_flood': privmsg_flood,
+    'channels_list': channels_list,
+    'names_list': names_list,
+    'ping_storm': ping_storm
+}
+
+
+def end_of_replay_line(channel_name=BENCH_CHANNEL):
+    return ":bench!b@host PRIVMSG {0} :{1}".format(channel_name,
+                                                   END_OF_REPLAY)
+
+
+def write_traffic_file(path, lines):
+    with open(path, 'w', encoding="UTF-8", newline='') as traffic_file:
+        for line in lines:
+            traffic_file.write(line + '\r\n')
+
+
+def read_traffic_file(path):
+    with open(path, encoding="UTF-8", newline='') as traffic_file:
+        return [line.rstrip('\r\n') for line in traffic_file
+                if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Write recorded IRC traffic files for replay.")
+    parser.add_argument('directory')
+    parser.add_argument('--scenarios', nargs='+', default=list(SCENARIOS),
+                        choices=list(SCENARIOS))
+    arguments = parser.parse_args()
+
+    os.makedirs(arguments.directory, exist_ok=True)
+    for scenario in arguments.scenarios:
+        path = os.path.join(arguments.directory, scenario + '.irc')
+        write_traffic_file(path, SCENARIOS[scenario]())
+        print(path)
+
+
+if __name__ == '__main__':
+    main()
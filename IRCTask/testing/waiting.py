@@ -0,0 +1,21 @@
+import asyncio
+import time
+
+POLL_INTERVAL = 0.01
+DEFAULT_TIMEOUT = 5
+
+
+def wait_for(predicate, timeout=DEFAULT_TIMEOUT):
+    for _ in range(int(timeout / POLL_INTERVAL)):
+        if predicate():
+            return True
+        time.sleep(POLL_INTERVAL)
+    return False
+
+
+async def wait_for_async(predicate, timeout=DEFAULT_TIMEOUT):
+    for _ in range(int(timeout / POLL_INTERVAL)):
+        if predicate():
+            return True
+        await asyncio.sleep(POLL_INTERVAL)
+    return False
@@ -0,0 +1,74 @@
+import asyncio
+
+from client.async_irc_client import AsyncIRCClient
+from data_transfer.user import User
+from testing.fake_irc_server import FakeIRCServer
+from testing.waiting import wait_for_async
+
+
+class TestAsyncIRCClient:
+
+    def setup_method(self):
+        self.server = FakeIRCServer().start()
+        self.server.add_channel("#python", "Python talk")
+
+    def test_connect_to_server_changes_status_on_success(self):
+        async def scenario():
+            client = AsyncIRCClient()
+            client.set_user(User("asyncuser"))
+            await client.connect_to_server(*self.server.address)
+            status = client.current_status
+            await client.close()
+            return status
+
+        assert asyncio.run(scenario()) == "S: SUCCESSFULLY CONNECTED"
+
+    def test_connect_to_server_changes_status_on_wrong_server(self):
+        async def scenario():
+            client = AsyncIRCClient()
+            client.set_user(User("asyncuser"))
+            await client.connect_to_server("E: WRONG SERVER NAME", 6667)
+            return client.current_status
+
+        assert asyncio.run(scenario()) == "E: WRONG SERVER NAME"
+
+    def test_get_channels_list_transmits_channels(self):
+        async def scenario():
+            channels = []
+            client = AsyncIRCClient()
+            client.set_user(User("asyncuser"))
+            client.channel_data_handler.connect_receiver(channels.append)
+            await client.connect_to_server(*self.server.address)
+            client.update_channels_list()
+            await wait_for_async(lambda: not client.is_searching_for_channels)
+            await client.close()
+            return channels
+
+        channels = asyncio.run(scenario())
+        assert [channel.name for channel in channels] == ["#python"]
+
+    def test_one_loop_serves_many_connections(self):
+        async def scenario():
+            messages = []
+            clients = []
+            for index in range(20):
+                client = AsyncIRCClient()
+                client.set_user(User("user{}".format(index)))
+                client.chat_transmitter.connect_receiver(messages.append)
+                clients.append(client)
+            await asyncio.gather(*(client.connect_to_server(
+                *self.server.address) for client in clients))
+            for client in clients:
+                client.connect_to_channel("#python")
+            await asyncio.sleep(0.1)
+            clients[0].send_user_message("hello")
+            await wait_for_async(lambda: len(messages) == 20)
+            await asyncio.gather(*(client.close() for client in clients))
+            return messages
+
+        messages = asyncio.run(scenario())
+        assert len(messages) == 20
+        assert all(message.trailing == "hello" for message in messages)
+
+    def teardown_method(self):
+        self.server.stop()
@@ -0,0 +1,128 @@
+import asyncio
+
+from bouncer.irc_bouncer import IRCBouncer, UpstreamNetwork
+from data_transfer.user import User
+from testing.fake_irc_server import FakeIRCServer
+from testing.waiting import wait_for_async
+
+
+async def attach(address, nick, capabilities=()):
+    reader, writer = await asyncio.open_connection(*address)
+    if capabilities:
+        writer.write(bytes("CAP LS 302\r\nCAP REQ :{0}\r\nCAP END\r\n"
+                           .format(' '.join(capabilities)), "UTF-8"))
+    writer.write(bytes("NICK {0}\r\nUSER {0} 0 * :{0}\r\n".format(nick),
+                       "UTF-8"))
+    return reader, writer
+
+
+async def read_until(reader, fragment):
+    lines = []
+    while True:
+        line = await asyncio.wait_for(reader.readline(), 5)
+        if not line:
+            return lines
+        lines.append(str(line, "UTF-8").rstrip('\r\n'))
+        if fragment in lines[-1]:
+            return lines
+
+
+class TestIRCBouncer:
+
+    def setup_method(self):
+        self.server = FakeIRCServer().start()
+        self.server.add_channel("#python", "Python talk")
+
+    def teardown_method(self):
+        self.server.stop()
+
+    def run_scenario(self, scenario):
+        async def run():
+            bouncer = IRCBouncer()
+            network = bouncer.add_network(UpstreamNetwork(
+                "fake", *self.server.address, User("keeper"), ["#python"],
+                scrollback_messages=3))
+            await bouncer.start('127.0.0.1', 0)
+            try:
+                await wait_for_async(
+                    lambda: network.client.get_roster("#python") is not None)
+                return await scenario(bouncer, network)
+            finally:
+                await bouncer.stop()
+
+        return asyncio.run(run())
+
+    def test_downstream_clients_share_one_upstream_session(self):
+        async def scenario(bouncer, network):
+            first_reader, first_writer = await attach(
+                bouncer.addresses()[0], "first")
+            second_reader, second_writer = await attach(
+                bouncer.addresses()[0], "second")
+            welcome = await read_until(first_reader, " 366 ")
+            await read_until(second_reader, " 366 ")
+            await wait_for_async(lambda: len(network.downstream_clients) == 2)
+            self.server.broadcast(":visitor!v@host PRIVMSG #python :hello")
+            first_line = await read_until(first_reader, "hello")
+            second_line = await read_until(second_reader, "hello")
+            first_writer.close()
+            second_writer.close()
+            return (len(self.server.sessions), welcome, first_line[-1],
+                    second_line[-1])
+
+        sessions_count, welcome, first_line, second_line = \
+            self.run_scenario(scenario)
+        assert sessions_count == 1
+        assert ":keeper!keeper@bouncer JOIN #python" in welcome
+        assert first_line == ":visitor!v@host PRIVMSG #python :hello"
+        assert second_line == first_line
+
+    def test_late_client_receives_bounded_scrollback(self):
+        async def scenario(bouncer, network):
+            for index in range(5):
+                self.server.broadcast(
+                    ":visitor!v@host PRIVMSG #python :line {0}".format(index))
+            await wait_for_async(
+                lambda: len(network.get_scrollback("#python")) == 3)
+            reader, writer = await attach(bouncer.addresses()[0], "late",
+                                          ["server-time"])
+            lines = await read_until(reader, "line 4")
+            writer.close()
+            return [line for line in lines if "PRIVMSG" in line]
+
+        replayed = self.run_scenario(scenario)
+        assert [line.rpartition(':')[2] for line in replayed] == \
+            ["line 2", "line 3", "line 4"]
+        assert all(line.startswith("@time=") for line in replayed)
+
+    def test_client_without_tags_capabilities_receives_untagged_lines(self):
+        async def scenario(bouncer, network):
+            reader, writer = await attach(bouncer.addresses()[0], "plain",
+                                          ["batch"])
+            await read_until(reader, " 366 ")
+            await wait_for_async(lambda: len(network.downstream_clients) == 1)
+            self.server.broadcast("@time=2026-01-02T03:04:05.000Z "
+                                  ":visitor!v@host PRIVMSG #python :tagged")
+            lines = await read_until(reader, "tagged")
+            writer.close()
+            return lines[-1]
+
+        assert self.run_scenario(scenario) == \
+            ":visitor!v@host PRIVMSG #python :tagged"
+
+    def test_downstream_message_is_sent_upstream_and_echoed(self):
+        async def scenario(bouncer, network):
+            sender_reader, sender_writer = await attach(
+                bouncer.addresses()[0], "sender")
+            watcher_reader, watcher_writer = await attach(
+                bouncer.addresses()[0], "watcher")
+            await read_until(sender_reader, " 366 ")
+            await read_until(watcher_reader, " 366 ")
+            await wait_for_async(lambda: len(network.downstream_clients) == 2)
+            sender_writer.write(b"PRIVMSG #python :from downstream\r\n")
+            echoed = await read_until(watcher_reader, "from downstream")
+            sender_writer.close()
+            watcher_writer.close()
+            return echoed[-1]
+
+        assert self.run_scenario(scenario) == \
+            ":keeper!keeper@bouncer PRIVMSG #python :from downstream"
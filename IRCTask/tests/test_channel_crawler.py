@@ -0,0 +1,147 @@
+import socket
+import sqlite3
+import time
+
+import pytest
+
+from client.channel_crawler import ChannelCrawler, CrawlTarget
+from data_transfer.channel_info import ChannelInfo
+from storage.channel_index import ChannelIndex
+from testing.fake_irc_server import FakeIRCServer
+
+
+class TestChannelIndex:
+
+    def setup_method(self):
+        self.index = None
+
+    def teardown_method(self):
+        if self.index is not None:
+            self.index.close()
+
+    def test_search_merges_servers_by_users_count(self, tmp_path):
+        self.index = ChannelIndex(str(tmp_path / "index.db"))
+        self.index.add_channels("a.net", [ChannelInfo("#Python", 10, "a"),
+                                          ChannelInfo("#rust", 3, "b")])
+        self.index.add_channels("b.net", [ChannelInfo("#python", 20, "c")])
+        self.index.add_channels("a.net", [ChannelInfo("#python", 12, "d")])
+        self.index.flush()
+        assert [(channel.server, channel.name, channel.users_count)
+                for channel in self.index.search("PYTH")] == \
+            [("b.net", "#python", 20), ("a.net", "#python", 12)]
+        assert self.index.channels_count() == 3
+        assert self.index.search(min_users=15, limit=5)[0].server == "b.net"
+
+    def test_successful_crawl_drops_channels_not_seen_again(self, tmp_path):
+        self.index = ChannelIndex(str(tmp_path / "index.db"))
+        self.index.add_channels("a.net", [ChannelInfo("#old", 1, "")],
+                                seen_at=100)
+        self.index.add_channels("a.net", [ChannelInfo("#new", 1, "")],
+                                seen_at=200)
+        self.index.finish_crawl("a.net", 150, 1, "TimeoutError: ")
+        self.index.flush()
+        assert self.index.channels_count("a.net") == 2
+        self.index.finish_crawl("a.net", 150, 1)
+        self.index.flush()
+        assert [channel.name for channel in self.index.search()] == ["#new"]
+        assert [(crawl.server, crawl.error) for crawl in self.index.crawls()] \
+            == [("a.net", None)]
+
+    def test_flush_survives_write_errors_and_close(self, tmp_path):
+        self.index = ChannelIndex(str(tmp_path / "index.db"))
+        connection = sqlite3.connect(self.index.database_path)
+        connection.execute("DROP TABLE channels")
+        connection.close()
+        self.index.add_channels("a.net", [ChannelInfo("#lost", 1, "")])
+        assert self.index.flush(timeout=5) is True
+        assert isinstance(self.index.last_error, sqlite3.Error)
+        self.index.close()
+        assert self.index.flush(timeout=5) is False
+
+
+class TestChannelCrawler:
+
+    def setup_method(self):
+        self.servers = []
+        self.index = None
+
+    def teardown_method(self):
+        for server in self.servers:
+            server.stop()
+        if self.index is not None:
+            self.index.close()
+
+    def start_server(self, channels_count, list_delay=None):
+        server = FakeIRCServer().start()
+        server.list_delay = list_delay
+        for index in range(channels_count):
+            server.add_channel("#chan{0}-{1}".format(server.port, index),
+                               "topic {0}".format(index))
+        self.servers.append(server)
+        return CrawlTarget(server.host, server.port)
+
+    def create_crawler(self, tmp_path, **crawler_options):
+        self.index = ChannelIndex(str(tmp_path / "index.db"))
+        return ChannelCrawler(self.index, "crawler", **crawler_options)
+
+    def test_parse_reads_address_and_tls_flag(self):
+        target = CrawlTarget.parse("irc.example.net:6697+tls")
+        assert (target.server_name, target.server_port, target.uses_tls) == \
+            ("irc.example.net", 6697, True)
+        with pytest.raises(ValueError):
+            CrawlTarget.parse("irc.example.net")
+
+    def test_crawl_lists_servers_concurrently_into_index(self, tmp_path):
+        targets = [self.start_server(50 * (index + 1), list_delay=0.3)
+                   for index in range(4)]
+        crawler = self.create_crawler(tmp_path)
+        started_at = time.monotonic()
+        results = crawler.run(targets)
+        elapsed = time.monotonic() - started_at
+        self.index.flush()
+        assert [result.channels_count for result in results] == \
+            [50, 100, 150, 200]
+        assert all(result.error is None and result.attempts == 1
+                   for result in results)
+        assert elapsed < 0.3 * len(targets)
+        assert self.index.channels_count() == 500
+        assert len(self.index.crawls()) == 4
+
+    def test_crawl_bounds_concurrent_connections(self, tmp_path):
+        targets = [self.start_server(5, list_delay=0.1) for _ in range(5)]
+        crawler = self.create_crawler(tmp_path, max_connections=2)
+        results = crawler.run(targets)
+        assert crawler.peak_connections_count == 2
+        assert sum(result.channels_count for result in results) == 25
+
+    def test_crawl_retries_and_records_timeouts(self, tmp_path):
+        target = self.start_server(5)
+        self.servers[0].is_responding = False
+        crawler = self.create_crawler(tmp_path, timeout=0.2, retries=1,
+                                      retry_delay=0.01)
+        result = crawler.run([target])[0]
+        self.index.flush()
+        assert result.attempts == 2
+        assert result.error.startswith("TimeoutError")
+        assert self.index.crawls()[0].error == result.error
+
+    def test_crawl_reports_refused_connections(self, tmp_path):
+        with socket.create_server(('127.0.0.1', 0)) as listener:
+            port = listener.getsockname()[1]
+        crawler = self.create_crawler(tmp_path, retries=2, retry_delay=0.01)
+        result = crawler.run([CrawlTarget('127.0.0.1', port)])[0]
+        assert result.attempts == 3
+        assert result.error == "ConnectionError: E: WRONG SERVER NAME"
+
+    def test_crawl_turns_unexpected_errors_into_failed_results(self,
+                                                               tmp_path):
+        def broken_client(event_bus):
+            raise RuntimeError("broken client")
+
+        targets = [self.start_server(5), self.start_server(5)]
+        crawler = self.create_crawler(tmp_path, client_factory=broken_client)
+        results = crawler.run(targets)
+        assert [(result.server_address, result.channels_count, result.error)
+                for result in results] == \
+            [(target.address, 0, "RuntimeError: broken client")
+             for target in targets]
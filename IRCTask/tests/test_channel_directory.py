@@ -0,0 +1,147 @@
+import threading
+
+from data_transfer.channel_info import ChannelInfo
+from storage.channel_directory import ChannelDirectory
+
+
+class TestChannelDirectory:
+
+    def setup_method(self):
+        self.directory = ChannelDirectory("irc.net", ttl=60)
+        self.directory.begin_refresh()
+        self.directory.add_channel(ChannelInfo("#python", 1500, "Python"))
+        self.directory.add_channel(ChannelInfo("#rust", 700, "Rust lang"))
+        self.directory.add_channel(ChannelInfo("#go", 90, "Gophers"))
+        self.directory.finish_refresh(now=1000.0)
+
+    def test_is_fresh_until_ttl_expires(self):
+        assert self.directory.is_fresh(now=1059.0) is True
+        assert self.directory.is_fresh(now=1061.0) is False
+
+    def test_filter_sorts_by_numeric_users_count(self):
+        channels = self.directory.filter()
+        assert [channel.name for channel in channels] == ["#python", "#rust",
+                                                          "#go"]
+
+    def test_filter_by_name_topic_and_users_range(self):
+        assert [channel.name for channel in
+                self.directory.filter(name_part="RU")] == ["#rust"]
+        assert [channel.name for channel in
+                self.directory.filter(topic_part="lang")] == ["#rust"]
+        assert [channel.name for channel in
+                self.directory.filter(min_users=100, max_users=1000)] == \
+            ["#rust"]
+
+    def test_full_refresh_removes_vanished_channels(self):
+        self.directory.build_list_filters('', now=5000.0)
+        self.directory.add_channel(ChannelInfo("#python", 1600, "Python"))
+        self.directory.finish_refresh(now=5000.0)
+        assert len(self.directory) == 1
+        assert self.directory.get("#PYTHON").users_count == 1600
+
+    def test_build_list_filters_uses_elist_for_incremental_refresh(self):
+        list_filters = self.directory.build_list_filters('CMNTU', now=1290.0)
+        assert list_filters == ["C<6", "T<6"]
+        self.directory.add_channel(ChannelInfo("#new", 3, "New"))
+        self.directory.finish_refresh(now=1290.0)
+        assert len(self.directory) == 4
+
+    def test_incremental_refreshes_do_not_postpone_full_refresh(self):
+        for now in (1290.0, 2400.0, 3500.0, 4500.0):
+            assert self.directory.build_list_filters('CT', now=now)[0] \
+                .startswith("C<")
+            self.directory.add_channel(ChannelInfo("#new", 3, "New"))
+            self.directory.finish_refresh(now=now)
+        assert self.directory.full_refreshed_at == 1000.0
+        self.directory.build_list_filters('CT', now=4700.0)
+        self.directory.add_channel(ChannelInfo("#python", 1400, "Python"))
+        self.directory.finish_refresh(now=4700.0)
+        assert self.directory.full_refreshed_at == 4700.0
+        assert len(self.directory) == 1
+        assert self.directory.get("#python").users_count == 1400
+
+    def test_stale_directory_lists_everything_despite_user_filter(self):
+        assert self.directory.build_list_filters('CTU', 10, now=5000.0) == \
+            [""]
+        assert self.directory.is_incremental_refresh is False
+
+    def test_build_list_filters_requests_full_list_without_elist(self):
+        assert self.directory.build_list_filters('', 10, now=1290.0) == [""]
+
+    def test_build_list_filters_filters_users_server_side(self):
+        assert self.directory.build_list_filters('U', 10, now=1290.0) == \
+            [">9"]
+
+    def test_snapshot_restores_directory(self, tmp_path):
+        snapshot_path = str(tmp_path / "irc.net.json")
+        self.directory.snapshot_path = snapshot_path
+        self.directory.save_snapshot()
+        restored = ChannelDirectory("irc.net", snapshot_path, ttl=60)
+        assert restored.refreshed_at == 1000.0
+        assert [channel.name for channel in restored.filter(limit=1)] == \
+            ["#python"]
+
+    def test_top_and_users_range_use_inclusive_bounds(self):
+        assert [channel.name for channel in self.directory.top(2)] == \
+            ["#python", "#rust"]
+        assert [channel.name for channel in
+                self.directory.filter(min_users=90, max_users=700)] == \
+            ["#rust", "#go"]
+        assert self.directory.count_in_users_range(90, 700) == 2
+        assert self.directory.count_in_users_range(2000) == 0
+
+    def test_updated_users_count_reorders_channels(self):
+        self.directory.top(3)
+        self.directory.add_channel(ChannelInfo("#Go", 5000, "Gophers!"))
+        channels = self.directory.top(1)
+        assert [(channel.name, channel.users_count, channel.full_name)
+                for channel in channels] == [("#Go", 5000, "Gophers!")]
+        assert len(self.directory) == 3
+
+    def test_filter_sorts_by_name_and_topic(self):
+        assert [channel.name for channel in self.directory.filter(
+            sort_by='name', descending=False)] == ["#go", "#python", "#rust"]
+        assert [channel.name for channel in self.directory.filter(
+            sort_by='topic', descending=True, limit=1)] == ["#rust"]
+
+    def test_topics_survive_repeated_incremental_updates(self):
+        for index in range(5):
+            self.directory.begin_refresh(is_replacing=False)
+            self.directory.add_channel(ChannelInfo(
+                "#rust", 700, "Rust lang, take {0}".format(index)))
+            self.directory.finish_refresh(now=1000.0)
+        assert self.directory.get("#rust").full_name == "Rust lang, take 4"
+        assert self.directory.get("#python").full_name == "Python"
+
+    def test_records_have_no_instance_dict(self):
+        channel_info = self.directory.get("#python")
+        assert not hasattr(channel_info, '__dict__')
+
+    def test_filter_stays_consistent_during_refresh(self):
+        stop = threading.Event()
+        errors = []
+
+        def refresh():
+            cycle = 0
+            while not stop.is_set():
+                self.directory.begin_refresh()
+                for index in range(cycle % 2, 300, 2):
+                    self.directory.add_row("#chan{0}".format(index), index,
+                                           "topic {0}".format(index))
+                self.directory.finish_refresh()
+                cycle += 1
+
+        refresher = threading.Thread(target=refresh)
+        refresher.start()
+        try:
+            for _ in range(300):
+                for channel in self.directory.filter(name_part="chan"):
+                    index = int(channel.name[len("#chan"):])
+                    if (channel.users_count, channel.full_name) != \
+                            (index, "topic {0}".format(index)):
+                        errors.append(channel.name)
+        finally:
+            stop.set()
+            refresher.join()
+        assert errors == []
+
@@ -0,0 +1,44 @@
+from data_transfer.channel_roster import ChannelRoster
+
+
+class TestChannelRoster:
+
+    def setup_method(self):
+        self.changes = []
+        self.roster = ChannelRoster("#python")
+        self.roster.change_receiver = self.changes.append
+        self.roster.add_names("+voiced @Op regular")
+        self.roster.add_names("~owner @@another")
+        self.roster.end_names()
+
+    def test_end_names_sorts_by_prefix_weight_and_nick(self):
+        assert self.roster.names() == ["~owner", "@another", "@Op",
+                                       "+voiced", "regular"]
+        assert self.changes[-1] == ('reset', self.roster.names())
+
+    def test_add_inserts_member_in_order(self):
+        self.roster.add("middle")
+        assert self.changes[-1] == ('insert', 4, "middle")
+        assert self.roster.names()[4] == "middle"
+
+    def test_remove_reports_removed_index(self):
+        assert self.roster.remove("OP") is True
+        assert self.changes[-1] == ('remove', 2)
+        assert "Op" not in self.roster
+
+    def test_rename_moves_member(self):
+        self.roster.rename("regular", "aardvark")
+        assert self.changes[-1] == ('move', 4, 4, "aardvark")
+        self.roster.rename("voiced", "zed")
+        assert self.roster.names()[3] == "+zed"
+
+    def test_set_mode_moves_member_to_new_weight(self):
+        self.roster.set_mode("regular", "o", True)
+        assert self.changes[-1] == ('move', 4, 3, "@regular")
+        assert self.roster.set_mode("regular", "o", True) is False
+
+    def test_custom_prefix_feature(self):
+        roster = ChannelRoster("#a", "(ov)@+")
+        roster.add_names("~notprefix +v")
+        roster.end_names()
+        assert roster.names() == ["+v", "~notprefix"]
@@ -0,0 +1,60 @@
+import sqlite3
+
+from storage.chat_log_store import ChatLogStore
+
+
+class TestChatLogStore:
+
+    def setup_method(self):
+        self.store = None
+
+    def create_store(self, tmp_path):
+        self.store = ChatLogStore(str(tmp_path / "chat.db"))
+        self.store.append("irc.net", "#Python", "alice", "hello world", 10.0)
+        self.store.append("irc.net", "#python", "bob", "hello there", 20.0)
+        self.store.append("irc.net", "#rust", "alice", "borrow checker", 30.0)
+        self.store.append("other.net", "#python", "carol", "hello", 40.0)
+        self.store.flush()
+        return self.store
+
+    def test_search_by_keywords(self, tmp_path):
+        store = self.create_store(tmp_path)
+        records = store.search(keywords="hello")
+        assert [record.nick for record in records] == ["carol", "bob",
+                                                       "alice"]
+
+    def test_search_by_server_channel_and_nick(self, tmp_path):
+        store = self.create_store(tmp_path)
+        records = store.search(server="irc.net", channel="#PYTHON",
+                               nick="alice")
+        assert [record.text for record in records] == ["hello world"]
+
+    def test_search_by_time_range(self, tmp_path):
+        store = self.create_store(tmp_path)
+        records = store.search(keywords=["hello"], since=15.0, until=40.0)
+        assert [record.nick for record in records] == ["bob"]
+
+    def test_search_escapes_query_syntax(self, tmp_path):
+        store = self.create_store(tmp_path)
+        assert store.search(keywords='"AND OR') == []
+
+    def test_appended_records_survive_reopening(self, tmp_path):
+        self.create_store(tmp_path).close()
+        self.store = ChatLogStore(str(tmp_path / "chat.db"))
+        assert len(self.store.search(channel="#python")) == 3
+
+    def test_flush_survives_write_errors_and_close(self, tmp_path):
+        store = self.create_store(tmp_path)
+        connection = sqlite3.connect(store.database_path)
+        connection.execute("DROP TABLE messages")
+        connection.close()
+        store.append("irc.net", "#python", "dave", "lost")
+        assert store.flush(timeout=5) is True
+        assert isinstance(store.last_error, sqlite3.Error)
+        assert store.failed_records_count == 1
+        store.close()
+        assert store.flush(timeout=5) is False
+
+    def teardown_method(self):
+        if self.store is not None:
+            self.store.close()
@@ -0,0 +1,95 @@
+import random
+import time
+
+from client.connection_supervisor import ConnectionSupervisor
+from client.irc_client import IRCClient
+from data_transfer.user import User
+from testing.fake_irc_server import FakeIRCServer
+from testing.waiting import wait_for
+
+
+class TestConnectionSupervisor:
+
+    def setup_method(self):
+        self.server = FakeIRCServer().start()
+        self.server.is_recording_lines = True
+        self.client = IRCClient()
+        self.client.set_user(User("survivor"))
+        self.registrations = []
+        self.client.on_registered = \
+            lambda: self.registrations.append(time.monotonic())
+
+    def teardown_method(self):
+        self.client.close()
+        self.server.stop()
+
+    def connect(self, **supervisor_options):
+        supervisor_options.setdefault('base_delay', 0.01)
+        supervisor_options.setdefault('max_delay', 0.05)
+        supervisor = self.client.enable_auto_reconnect(**supervisor_options)
+        self.client.connect_to_server(*self.server.address)
+        assert wait_for(lambda: len(self.registrations) == 1)
+        return supervisor
+
+    def test_next_delay_grows_exponentially_with_jitter(self):
+        supervisor = ConnectionSupervisor(
+            self.client, None, base_delay=1, max_delay=8,
+            random_source=random.Random(1))
+        delays = [supervisor.next_delay(attempt) for attempt in range(6)]
+        assert 0.5 <= delays[0] <= 1
+        assert 2 <= delays[2] <= 4
+        assert all(4 <= delay <= 8 for delay in delays[3:])
+
+    def test_reconnect_restores_channels_in_batched_join(self):
+        supervisor = self.connect()
+        self.client.connect_to_channels(["#one", "#two", "#three"])
+        assert wait_for(lambda: len(self.server.channels_members) == 3)
+
+        self.server.received_lines.clear()
+        self.server.drop_sessions()
+        assert wait_for(lambda: len(self.registrations) == 2)
+        assert wait_for(lambda: len(self.server.channels_members) == 3)
+
+        join_lines = [line for line in self.server.received_lines
+                      if line.startswith("JOIN")]
+        assert join_lines == ["JOIN #one,#two,#three"]
+        assert supervisor.reconnects_count == 1
+        assert self.client.is_connected() is True
+
+    def test_messages_queued_while_disconnected_are_flushed_in_order(self):
+        self.connect()
+        self.client.connect_to_channel("#chat")
+        assert wait_for(lambda: "#chat" in self.server.channels_members)
+        port = self.server.port
+
+        self.server.stop()
+        assert wait_for(lambda: not self.client.is_connected())
+        self.client.send_user_message("first", "#chat")
+        self.client.send_user_message("second", "#chat")
+        self.server = FakeIRCServer(port=port).start()
+        self.server.is_recording_lines = True
+
+        assert wait_for(lambda: len([
+            line for line in self.server.received_lines
+            if line.startswith("PRIVMSG")]) == 2)
+        commands = [line.split()[0] for line in self.server.received_lines]
+        assert commands.index("JOIN") < commands.index("PRIVMSG")
+        assert [line for line in self.server.received_lines
+                if line.startswith("PRIVMSG")] == ["PRIVMSG #chat :first",
+                                                   "PRIVMSG #chat :second"]
+
+    def test_missed_pong_drops_and_reconnects(self):
+        supervisor = self.connect(ping_interval=0.1, pong_timeout=0.1)
+        self.server.is_responding = False
+        assert wait_for(lambda: "PING :keepalive" in
+                        self.server.received_lines)
+        assert wait_for(lambda: supervisor.reconnects_count == 1 or
+                        not self.client.is_connected())
+        self.server.is_responding = True
+        assert wait_for(lambda: len(self.registrations) == 2)
+
+    def test_disconnect_stops_supervision(self):
+        supervisor = self.connect()
+        self.client.disconnect()
+        assert supervisor.is_running() is False
+        assert self.client.supervisor is None
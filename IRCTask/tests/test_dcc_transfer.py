@@ -0,0 +1,191 @@
+import os
+import threading
+
+import pytest
+
+from client.dcc_transfer import DccManager, DccOffer, DccReceiver, \
+    DccSender, DccTransfer
+from client.irc_client import IRCClient
+from client.message_rules import MessageRules
+from data_transfer.event_bus import EventBus
+from data_transfer.irc_message import IRCMessage
+
+
+class LoopbackClient:
+
+    def __init__(self, nick):
+        self.nick = nick
+        self.peer = None
+        self.event_bus = EventBus()
+        self.ctcp_transmitter = self.event_bus.transmitter("ctcp")
+        self.sent_ctcp = []
+
+    def send_ctcp_message(self, target, text):
+        self.sent_ctcp.append((target, text))
+        self.peer.ctcp_transmitter.transmit(IRCMessage(
+            "PRIVMSG", [target, '\x01' + text + '\x01'],
+            "{0}!~{0}@localhost".format(self.nick)))
+
+    @staticmethod
+    def local_address():
+        return '127.0.0.1'
+
+
+def create_file(path, size):
+    data = os.urandom(size)
+    path.write_bytes(data)
+    return data
+
+
+class TestDccTransfer:
+
+    def test_split_arguments_keeps_quoted_file_names(self):
+        assert DccOffer.split_arguments('SEND "my file.txt" 2130706433 '
+                                        '5000 12') == \
+            ["SEND", "my file.txt", "2130706433", "5000", "12"]
+        assert DccOffer.decode_host("2130706433") == "127.0.0.1"
+        assert DccOffer.encode_host("127.0.0.1") == "2130706433"
+        assert DccOffer.safe_filename("../../etc/passwd") == "passwd"
+
+    def test_sender_and_receiver_transfer_file_on_loopback(self, tmp_path):
+        data = create_file(tmp_path / "sent.bin", 3 * 1024 * 1024 + 17)
+        event_bus = EventBus()
+        progress = []
+        transmitter = event_bus.transmitter("dcc")
+        transmitter.connect_receiver(progress.append)
+        sender = DccSender(str(tmp_path / "sent.bin"), "peer", transmitter,
+                           '127.0.0.1', timeout=10).start()
+        offer = DccOffer("me", "sent.bin", '127.0.0.1', sender.port,
+                         len(data))
+        receiver = DccReceiver(offer, str(tmp_path / "received.bin"),
+                               transmitter, timeout=10).start()
+        assert receiver.wait(10) and sender.wait(10)
+        event_bus.flush(1)
+        event_bus.close()
+        assert (receiver.state, sender.state) == (DccTransfer.DONE,
+                                                  DccTransfer.DONE)
+        assert (tmp_path / "received.bin").read_bytes() == data
+        finished = [event for event in progress
+                    if event.state == DccTransfer.DONE]
+        assert sorted(event.direction for event in finished) == \
+            [DccTransfer.RECEIVE, DccTransfer.SEND]
+        assert all(event.bytes_transferred == len(data) for event in finished)
+
+    def test_receiver_truncates_file_to_received_bytes_on_failure(
+            self, tmp_path):
+        sender = DccSender(__file__, "peer", host='127.0.0.1', timeout=10)
+        sender.cancel()
+        offer = DccOffer("me", "lost.bin", '127.0.0.1', sender.port, 1000)
+        receiver = DccReceiver(offer, str(tmp_path / "lost.bin"),
+                               timeout=10).start()
+        assert receiver.wait(10)
+        assert receiver.state == DccTransfer.FAILED
+        assert os.path.getsize(tmp_path / "lost.bin") == 0
+
+
+class TestDccManager:
+
+    def setup_method(self):
+        self.alice = LoopbackClient("alice")
+        self.bob = LoopbackClient("bob")
+        self.alice.peer = self.bob
+        self.bob.peer = self.alice
+        self.offers = []
+        self.bob.event_bus.transmitter("dcc_offers").connect_receiver(
+            self.offers.append)
+
+    def teardown_method(self):
+        self.alice.event_bus.close()
+        self.bob.event_bus.close()
+
+    def create_managers(self, tmp_path):
+        (tmp_path / "bob").mkdir()
+        sending = DccManager(self.alice, str(tmp_path), '127.0.0.1',
+                             timeout=10)
+        receiving = DccManager(self.bob, str(tmp_path / "bob"), '127.0.0.1',
+                               timeout=10)
+        return sending, receiving
+
+    def test_parallel_transfers_are_offered_and_accepted(self, tmp_path):
+        sending, receiving = self.create_managers(tmp_path)
+        contents = {}
+        senders = []
+        for index in range(3):
+            name = "file {0}.bin".format(index)
+            contents[name] = create_file(tmp_path / name,
+                                         (index + 1) * 512 * 1024)
+            senders.append(sending.send_file("bob", str(tmp_path / name)))
+        self.bob.event_bus.flush(1)
+        assert sorted(offer.filename for offer in self.offers) == \
+            sorted(contents)
+        receivers = [receiving.accept_offer(offer) for offer in self.offers]
+        for transfer in receivers + senders:
+            assert transfer.wait(10)
+            assert transfer.state == DccTransfer.DONE
+        for name, data in contents.items():
+            assert (tmp_path / "bob" / name).read_bytes() == data
+        assert receiving.active_transfers() == []
+        assert sending.transfers == [] and receiving.transfers == []
+
+    def test_accept_offer_resumes_partial_download(self, tmp_path):
+        sending, receiving = self.create_managers(tmp_path)
+        received = threading.Event()
+        self.bob.event_bus.transmitter("dcc").connect_receiver(
+            lambda progress: progress.direction == DccTransfer.RECEIVE and
+            progress.state == DccTransfer.DONE and received.set())
+        data = create_file(tmp_path / "resumed.bin", 1024 * 1024)
+        (tmp_path / "bob" / "resumed.bin").write_bytes(data[:300000])
+        sender = sending.send_file("bob", str(tmp_path / "resumed.bin"))
+        self.bob.event_bus.flush(1)
+        assert receiving.accept_offer(self.offers[0], resume=True) is None
+        self.alice.event_bus.flush(1)
+        self.bob.event_bus.flush(1)
+        assert sender.wait(10) and sender.state == DccTransfer.DONE
+        assert sender.bytes_transferred == len(data) - 300000
+        assert received.wait(10)
+        assert (tmp_path / "bob" / "resumed.bin").read_bytes() == data
+        assert [text.split()[1] for _, text in self.bob.sent_ctcp] == \
+            ["RESUME"]
+
+    def test_failed_sender_is_forgotten(self, tmp_path):
+        sending, _ = self.create_managers(tmp_path)
+        create_file(tmp_path / "unsent.bin", 1024)
+        sender = sending.send_file("bob", str(tmp_path / "unsent.bin"))
+        sender.cancel()
+        assert sender.wait(10) and sender.state == DccTransfer.FAILED
+        assert sending.transfers == []
+        self.alice.event_bus.flush(1)
+        self.bob.send_ctcp_message(
+            "alice", "DCC RESUME unsent.bin {0} 10".format(sender.port))
+        self.alice.event_bus.flush(1)
+        assert self.alice.sent_ctcp[-1][1].startswith("DCC SEND")
+
+    def test_transfer_needs_transfer_and_cancel(self):
+        with pytest.raises(TypeError):
+            DccTransfer(DccTransfer.SEND, "peer", "file.bin", 1)
+
+
+class TestIRCClientCtcp:
+
+    def test_ctcp_requests_are_not_transmitted_as_chat(self):
+        client = IRCClient()
+        requests = []
+        client.ctcp_transmitter.connect_receiver(requests.append)
+        client.handle_irc_message(':bob!b@h PRIVMSG me :\x01DCC SEND a.txt '
+                                  '2130706433 5000 12\x01')
+        client.event_bus.flush(1)
+        client.event_bus.close()
+        assert [message.nick for message in requests] == ["bob"]
+
+    def test_ctcp_requests_from_ignored_senders_are_dropped(self):
+        client = IRCClient()
+        requests = []
+        client.ctcp_transmitter.connect_receiver(requests.append)
+        client.set_message_rules(MessageRules(ignores=["*!*@spam.example"]))
+        client.handle_irc_message(':troll!t@spam.example PRIVMSG me '
+                                  ':\x01DCC SEND a.txt 2130706433 5000 12\x01')
+        client.handle_irc_message(':bob!b@h PRIVMSG me :\x01VERSION\x01')
+        client.event_bus.flush(1)
+        client.event_bus.close()
+        assert [message.nick for message in requests] == ["bob"]
+        assert client.ignored_messages_count == 1
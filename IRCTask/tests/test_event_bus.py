@@ -0,0 +1,106 @@
+import threading
+
+import pytest
+from data_transfer.event_bus import EventBus, Subscription
+
+
+class TestEventBus:
+
+    def setup_method(self):
+        self.event_bus = EventBus()
+
+    def test_publish_delivers_to_every_subscriber(self):
+        first, second = [], []
+        self.event_bus.subscribe("chat", first.append)
+        self.event_bus.subscribe("chat", second.append)
+        self.event_bus.publish("chat", "hello")
+        self.event_bus.publish("names", "ignored")
+        self.event_bus.flush()
+        assert first == ["hello"]
+        assert second == ["hello"]
+
+    def test_publish_does_not_wait_for_slow_subscriber(self):
+        started = threading.Event()
+        release = threading.Event()
+        received = []
+
+        def slow_receiver(data):
+            started.set()
+            release.wait()
+            received.append(data)
+        subscription = self.event_bus.subscribe("chat", slow_receiver,
+                                                max_queue_size=2)
+        self.event_bus.publish("chat", 0)
+        started.wait()
+        for index in range(1, 5):
+            self.event_bus.publish("chat", index)
+        release.set()
+        self.event_bus.flush()
+        assert received == [0, 3, 4]
+        assert subscription.dropped_count == 2
+
+    def test_coalesce_replaces_pending_data_with_same_key(self):
+        release = threading.Event()
+        received = []
+
+        def slow_receiver(data):
+            release.wait()
+            received.append(data)
+        self.event_bus.subscribe("status", slow_receiver,
+                                 overflow_policy=Subscription.COALESCE,
+                                 coalesce_key=lambda data: data[0])
+        self.event_bus.publish("status", ("first", 0))
+        for index in range(1, 4):
+            self.event_bus.publish("status", ("second", index))
+        release.set()
+        self.event_bus.flush()
+        assert received[-1] == ("second", 3)
+        assert ("second", 1) not in received
+
+    def test_batches_are_delivered_as_lists(self):
+        batches = []
+        release = threading.Event()
+
+        def batch_receiver(batch):
+            release.wait()
+            batches.append(batch)
+        self.event_bus.subscribe("chat", batch_receiver, batch_size=10)
+        for index in range(4):
+            self.event_bus.publish("chat", index)
+        release.set()
+        self.event_bus.flush()
+        assert sum(batches, []) == [0, 1, 2, 3]
+        assert all(isinstance(batch, list) for batch in batches)
+
+    def test_transmitter_keeps_transmitter_surface(self):
+        transmitter = self.event_bus.transmitter("chat")
+        with pytest.raises(ValueError):
+            transmitter.transmit("data")
+        received = []
+        replaced = []
+        transmitter.connect_receiver(replaced.append)
+        transmitter.connect_receiver(received.append)
+        transmitter.transmit("data")
+        self.event_bus.flush()
+        assert transmitter.is_transmitted_any_data() is True
+        assert replaced == []
+        assert received == ["data"]
+        assert len(self.event_bus.subscriptions("chat")) == 1
+
+    def test_transmitter_subscribe_adds_receivers(self):
+        transmitter = self.event_bus.transmitter("chat")
+        first = []
+        second = []
+        transmitter.connect_receiver(first.append)
+        transmitter.subscribe(second.append)
+        transmitter.transmit("data")
+        self.event_bus.flush()
+        assert first == ["data"]
+        assert second == ["data"]
+
+    def test_subscribe_rejects_unknown_policy(self):
+        with pytest.raises(ValueError):
+            self.event_bus.subscribe("chat", print, overflow_policy="wait")
+
+    def teardown_method(self):
+        self.event_bus.close()
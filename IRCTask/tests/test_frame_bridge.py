@@ -0,0 +1,87 @@
+import pytest
+
+from data_transfer.event_bus import EventBus
+from data_transfer.frame_bridge import FrameBridge
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 10.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestFrameBridge:
+
+    def setup_method(self):
+        self.clock = FakeClock()
+        self.flush_delays = []
+        self.bridge = FrameBridge(self.flush_delays.append, 30,
+                                  max_pending_events=5, clock=self.clock)
+        self.batches = []
+        self.bridge.add_handler("chat", self.batches.append)
+
+    def test_idle_bridge_requests_nothing(self):
+        assert self.flush_delays == []
+        self.bridge.flush()
+        assert self.batches == []
+
+    def test_events_are_batched_into_one_flush_request(self):
+        for index in range(3):
+            self.bridge.post("chat", index)
+        assert self.flush_delays == [0]
+        self.bridge.flush()
+        assert self.batches == [[0, 1, 2]]
+        assert self.bridge.pending_events_count() == 0
+
+    def test_flush_requests_are_capped_by_rate(self):
+        self.bridge.post("chat", 1)
+        self.bridge.flush()
+        self.clock.now += 0.01
+        self.bridge.post("chat", 2)
+        assert self.flush_delays[-1] == pytest.approx(1 / 30 - 0.01)
+        self.clock.now += 1
+        self.bridge.flush()
+        self.bridge.post("chat", 3)
+        assert self.flush_delays[-1] == pytest.approx(1 / 30)
+        self.bridge.flush()
+        self.clock.now += 1
+        self.bridge.post("chat", 4)
+        assert self.flush_delays[-1] == 0
+        assert len(self.flush_delays) == 4
+
+    def test_keeps_last_event_and_bounds_pending_events(self):
+        statuses = []
+        self.bridge.add_handler("status", statuses.append, keeps_last=True)
+        self.bridge.post_many("status", ["N: one", "N: two"])
+        self.bridge.post("status", "S: three")
+        self.bridge.post_many("chat", list(range(8)))
+        self.bridge.flush()
+        assert statuses == [["S: three"]]
+        assert self.batches == [[3, 4, 5, 6, 7]]
+        assert self.bridge.dropped_count == 5
+
+    def test_keeps_all_events_are_never_trimmed(self):
+        roster_changes = []
+        self.bridge.add_handler("roster", roster_changes.append,
+                                keeps_all=True)
+        self.bridge.post_many("roster", list(range(8)))
+        self.bridge.post_many("roster", list(range(8, 12)))
+        self.bridge.flush()
+        assert roster_changes == [list(range(12))]
+        assert self.bridge.dropped_count == 0
+
+    def test_connect_receives_event_bus_batches(self):
+        event_bus = EventBus()
+        self.bridge.connect(event_bus.transmitter("chat"),
+                            self.batches.append)
+        transmitter = event_bus.transmitter("chat")
+        for index in range(4):
+            transmitter.transmit(index)
+        event_bus.flush(1)
+        self.bridge.flush()
+        event_bus.close()
+        assert sum(self.batches, []) == [0, 1, 2, 3]
+
@@ -1,12 +1,18 @@
+import threading
+
 from data_transfer.user import User
 from client.irc_client import IRCClient
+from data_transfer.channel_roster import ChannelRoster
 
 
 class TestIRCClient:
 
-    def setup(self):
+    def setup_method(self):
         self.client = IRCClient()
 
+    def teardown_method(self):
+        self.client.close()
+
     def test_update_channels_list_makes_client_search_for_channels(self):
         self.client.update_channels_list()
         assert self.client.is_searching_for_channels is True
@@ -16,6 +22,77 @@ class TestIRCClient:
                        ':Test response '
         assert self.client.is_message_user_message(user_message) is True
 
+    def test_is_message_user_message_should_be_false_for_join(self):
+        join_message = ':Macha!~macha@unaffiliated/macha JOIN #botwar'
+        assert self.client.is_message_user_message(join_message) is False
+
+    def test_handle_irc_message_transmits_listed_channels(self):
+        channels = []
+        self.client.channel_data_handler.connect_receiver(channels.append)
+        self.client.update_channels_list()
+        self.client.handle_irc_message(':irc.net 321 me Channel :Users Name')
+        self.client.handle_irc_message(':irc.net 322 me #botwar 12 :Bots')
+        self.client.handle_irc_message(':irc.net 323 me :End of /LIST')
+        self.client.event_bus.flush()
+        assert [channel.name for channel in channels] == ["#botwar"]
+        assert channels[0].users_count == 12
+        assert channels[0].full_name == "Bots"
+        assert self.client.is_searching_for_channels is False
+
+    def test_update_channels_list_replays_fresh_directory(self):
+        self.client.update_channels_list()
+        self.client.handle_irc_message(':irc.net 322 me #botwar 12 :Bots')
+        self.client.handle_irc_message(':irc.net 323 me :End of /LIST')
+        channels = []
+        self.client.channel_data_handler.connect_receiver(channels.append)
+        self.client.update_channels_list()
+        self.client.event_bus.flush()
+        assert [channel.name for channel in channels] == ["#botwar"]
+        assert self.client.is_searching_for_channels is False
+
+    def test_incremental_list_replays_directory_above_min_users(self):
+        self.client.handle_irc_message(
+            ':irc.net 005 me ELIST=CTU :are supported')
+        self.client.update_channels_list()
+        self.client.handle_irc_message(':irc.net 322 me #botwar 12 :Bots')
+        self.client.handle_irc_message(':irc.net 322 me #quiet 2 :Quiet')
+        self.client.handle_irc_message(':irc.net 323 me :End of /LIST')
+        channels = []
+        self.client.channel_data_handler.connect_receiver(channels.append)
+        self.client.update_channels_list(force=True, min_users=10)
+        assert self.client.channel_directory.is_incremental_refresh is True
+        self.client.handle_irc_message(':irc.net 322 me #new 30 :New')
+        self.client.handle_irc_message(':irc.net 322 me #tiny 1 :Tiny')
+        self.client.handle_irc_message(':irc.net 323 me :End of /LIST')
+        self.client.handle_irc_message(':irc.net 323 me :End of /LIST')
+        self.client.event_bus.flush()
+        assert [channel.name for channel in channels] == ["#new", "#botwar"]
+
+    def test_handle_irc_message_keeps_roster_up_to_date(self):
+        self.client.set_user(User("me"))
+        roster = self.create_loaded_roster("#botwar", "@me alice bob")
+        self.client.rosters["#botwar"] = roster
+        self.client.handle_irc_message(':carol!c@host JOIN #botwar')
+        self.client.handle_irc_message(':alice!a@host PART #botwar')
+        self.client.handle_irc_message(':bob!b@host NICK :robert')
+        self.client.handle_irc_message(':me!m@host MODE #botwar +ov-b '
+                                       'carol robert *!*@spam')
+        assert roster.names() == ["@carol", "@me", "+robert"]
+        self.client.handle_irc_message(':carol!c@host QUIT :bye')
+        assert roster.names() == ["@me", "+robert"]
+
+    @staticmethod
+    def create_loaded_roster(channel_name, names):
+        roster = ChannelRoster(channel_name)
+        roster.add_names(names)
+        roster.end_names()
+        return roster
+
+    def test_handle_irc_message_ignores_foreign_join(self):
+        self.client.set_user(User("Username1234321"))
+        self.client.handle_irc_message(':Other!o@host JOIN NONE')
+        assert self.client.is_searching_for_names is False
+
     def test_establish_connection_should_change_status_empty_fields(self):
         self.client.connect_to_server('',
                                           6667)
@@ -28,3 +105,14 @@ class TestIRCClient:
                                       6667)
         self.client.establish_connection()
         assert self.client.current_status == "E: WRONG SERVER NAME"
+
+    def test_close_stops_event_delivery_threads(self):
+        threads_count = threading.active_count()
+        clients = [IRCClient() for _ in range(5)]
+        for client in clients:
+            client.chat_transmitter.connect_receiver(print)
+            client.status_update_handler.connect_receiver(print)
+        assert threading.active_count() >= threads_count + 10
+        for client in clients:
+            client.close()
+        assert threading.active_count() <= threads_count
@@ -0,0 +1,47 @@
+from data_transfer.irc_message import IRCMessage
+
+
+class TestIRCMessage:
+
+    def test_parse_splits_prefix_into_nick_user_and_host(self):
+        message = IRCMessage.parse(':Macha!~macha@unaffiliated/macha '
+                                   'PRIVMSG #botwar :Test response ')
+        assert message.nick == "Macha"
+        assert message.user == "~macha"
+        assert message.host == "unaffiliated/macha"
+        assert message.command == "PRIVMSG"
+        assert message.params == ["#botwar", "Test response "]
+
+    def test_parse_keeps_numeric_command_and_params(self):
+        message = IRCMessage.parse(':irc.example.net 322 me #python 1500 '
+                                   ':Python language: chat')
+        assert message.is_from_server() is True
+        assert message.command == "322"
+        assert message.params == ["me", "#python", "1500",
+                                  "Python language: chat"]
+
+    def test_parse_message_without_prefix(self):
+        message = IRCMessage.parse("PING :irc.example.net")
+        assert message.prefix is None
+        assert message.command == "PING"
+        assert message.trailing == "irc.example.net"
+
+    def test_parse_message_without_trailing(self):
+        message = IRCMessage.parse(":nick!user@host JOIN #channel")
+        assert message.target == "#channel"
+        assert message.params == ["#channel"]
+
+    def test_parse_unescapes_tags(self):
+        message = IRCMessage.parse('@time=2020-01-01T00:00:00.000Z;'
+                                   'msg=a\\sb\\:c;flag :nick!u@h '
+                                   'PRIVMSG #a :hi')
+        assert message.tags == {"time": "2020-01-01T00:00:00.000Z",
+                                "msg": "a b;c",
+                                "flag": ""}
+        assert message.nick == "nick"
+        assert message.trailing == "hi"
+
+    def test_parse_empty_line(self):
+        message = IRCMessage.parse("")
+        assert message.command == ""
+        assert message.params == []
@@ -4,7 +4,7 @@ from client.irc_socket import IRCSocket
 
 class TestIrcSocket:
 
-    def setup(self):
+    def setup_method(self):
         self.irc_socket = IRCSocket()
 
     def test_join_channel_throws_value_error_when_not_connected(self):
@@ -37,6 +37,21 @@ class TestIrcSocket:
         self.irc_socket.get_users_list()
         assert self.irc_socket.is_message_queue_empty() is False
 
+    def test_collect_pending_data_joins_queued_messages(self):
+        self.irc_socket.send_message("NICK first")
+        self.irc_socket.send_message("PRIVMSG #channel :second")
+        data, is_stopping = self.irc_socket.collect_pending_data()
+        assert data == b"NICK first\r\nPRIVMSG #channel :second\r\n"
+        assert is_stopping is False
+        assert self.irc_socket.is_message_queue_empty() is True
+
+    def test_collect_pending_data_stops_after_quit(self):
+        self.irc_socket.send_message("QUIT")
+        self.irc_socket._messages_queue.put(None)
+        data, is_stopping = self.irc_socket.collect_pending_data()
+        assert data == b"QUIT\r\n"
+        assert is_stopping is True
+
     def test_join_channel_should_join_channel(self):
         self.irc_socket.set_server_data('chat.freenode.net', 6667)
         self.irc_socket.connect_to_server()
@@ -49,5 +64,5 @@ class TestIrcSocket:
         self.irc_socket.disconnect()
         assert self.irc_socket.connected is False
 
-    def teardown(self):
+    def teardown_method(self):
         self.irc_socket.disconnect()
@@ -0,0 +1,178 @@
+import time
+
+from client.capability_negotiator import CapabilityNegotiator
+from client.irc_client import IRCClient
+from data_transfer.irc_batch import BatchCollector, IRCBatch
+from data_transfer.irc_message import IRCMessage
+from data_transfer.user import User
+from testing.fake_irc_server import FakeIRCServer
+from testing.waiting import wait_for
+
+
+class TestCapabilityNegotiator:
+
+    def setup_method(self):
+        self.negotiator = CapabilityNegotiator(["server-time", "batch",
+                                                "unsupported"])
+
+    def test_requests_wanted_capabilities_after_final_list(self):
+        assert self.negotiator.start() == ["CAP LS 302"]
+        assert self.negotiator.handle(IRCMessage.parse(
+            ":irc CAP * LS * :server-time sasl=PLAIN")) == []
+        assert self.negotiator.handle(IRCMessage.parse(
+            ":irc CAP * LS :batch")) == ["CAP REQ :batch server-time"]
+        assert self.negotiator.available_capabilities["sasl"] == "PLAIN"
+
+    def test_acknowledgement_enables_capabilities_and_ends(self):
+        self.negotiator.start()
+        self.negotiator.handle(IRCMessage.parse(
+            ":irc CAP * LS :server-time batch"))
+        assert self.negotiator.handle(IRCMessage.parse(
+            ":irc CAP * ACK :batch server-time")) == ["CAP END"]
+        assert self.negotiator.enabled_capabilities == {"batch",
+                                                        "server-time"}
+        assert self.negotiator.is_negotiating is False
+
+    def test_rejection_ends_negotiation(self):
+        self.negotiator.start()
+        self.negotiator.handle(IRCMessage.parse(":irc CAP * LS :batch"))
+        assert self.negotiator.handle(IRCMessage.parse(
+            ":irc CAP * NAK :batch")) == ["CAP END"]
+        assert self.negotiator.enabled_capabilities == set()
+
+    def test_ends_without_request_when_nothing_wanted_is_available(self):
+        self.negotiator.start()
+        assert self.negotiator.handle(IRCMessage.parse(
+            ":irc CAP * LS :sasl")) == ["CAP END"]
+
+    def test_deleted_capability_is_disabled(self):
+        self.negotiator.start()
+        self.negotiator.handle(IRCMessage.parse(":irc CAP * LS :batch"))
+        self.negotiator.handle(IRCMessage.parse(":irc CAP * ACK :batch"))
+        self.negotiator.handle(IRCMessage.parse(":irc CAP nick DEL :batch"))
+        assert self.negotiator.is_enabled("batch") is False
+
+
+class TestBatchCollector:
+
+    def test_nested_batch_is_attached_to_its_parent(self):
+        collector = BatchCollector()
+        collector.open(IRCMessage.parse(":irc BATCH +outer netjoin"))
+        collector.open(IRCMessage.parse(
+            "@batch=outer :irc BATCH +inner chathistory #channel"))
+        assert collector.collect(IRCMessage.parse(
+            "@batch=inner :a!b@c PRIVMSG #channel :hi")) is True
+        assert collector.close(IRCMessage.parse(":irc BATCH -inner")) is None
+        batch = collector.close(IRCMessage.parse(":irc BATCH -outer"))
+
+        assert batch.batch_type == "netjoin"
+        assert isinstance(batch.messages[0], IRCBatch)
+        assert batch.messages[0].target == "#channel"
+        assert batch.messages[0].messages[0].trailing == "hi"
+
+    def test_messages_of_unknown_batches_are_not_collected(self):
+        collector = BatchCollector()
+        assert collector.collect(IRCMessage.parse(
+            "@batch=missing :a!b@c PRIVMSG #channel :hi")) is False
+
+
+class TestServerTime:
+
+    def test_server_time_round_trips_through_formatting(self):
+        message = IRCMessage.parse(
+            "@time=2024-05-01T10:20:30.123Z :a!b@c PRIVMSG #channel :hi")
+        assert IRCMessage.format_server_time(message.server_time()) == \
+            "2024-05-01T10:20:30.123Z"
+
+    def test_invalid_server_time_is_none(self):
+        assert IRCMessage.parse(
+            "@time=yesterday PING :x").server_time() is None
+
+
+class TestClientIRCv3:
+
+    def setup_method(self):
+        self.server = FakeIRCServer().start()
+        self.server.is_recording_lines = True
+        self.client = IRCClient()
+        self.client.set_user(User("modern"))
+        self.batches = []
+        self.client.batch_transmitter.connect_receiver(self.batches.append)
+
+    def teardown_method(self):
+        self.client.close()
+        self.server.stop()
+
+    def connect(self):
+        self.client.connect_to_server(*self.server.address)
+        assert wait_for(lambda: self.client.is_registered)
+
+    def test_negotiates_capabilities_before_registration(self):
+        self.connect()
+        assert self.client.capability_negotiator.enabled_capabilities == \
+            set(IRCClient.DEFAULT_CAPABILITIES)
+        assert self.server.received_lines[:4] == [
+            "CAP LS 302", "USER modern modern modern Ivan",
+            "NICK modern", "CAP REQ :batch draft/chathistory message-tags "
+                           "server-time"]
+        assert "CAP END" in self.server.received_lines
+
+    def test_registers_without_capabilities_on_old_servers(self):
+        self.server.capabilities = ()
+        self.connect()
+        assert self.client.capability_negotiator.enabled_capabilities == \
+            set()
+
+    def test_join_backfills_history_as_one_batch(self):
+        for index in range(3):
+            self.server.add_history("#history", "old!o@host",
+                                    "message {}".format(index),
+                                    1700000000 + index)
+        self.connect()
+        self.client.connect_to_channel("#history")
+        self.client.event_bus.flush()
+        assert wait_for(lambda: self.batches)
+        self.client.event_bus.flush()
+
+        batch = self.batches[0]
+        assert batch.batch_type == "chathistory"
+        assert [message.trailing for message in batch.messages] == \
+            ["message 0", "message 1", "message 2"]
+        assert batch.messages[2].server_time() == 1700000002
+        assert self.client.last_message_times["#history"] == 1700000002
+
+    def test_history_after_reconnect_fetches_only_missed_messages(self):
+        self.server.add_history("#history", "old!o@host", "seen", 1700000000)
+        self.connect()
+        self.client.connect_to_channel("#history")
+        assert wait_for(lambda: self.batches)
+        self.server.add_history("#history", "old!o@host", "missed",
+                                1700000005)
+
+        self.server.received_lines.clear()
+        assert self.client.request_history("#history") is True
+        assert wait_for(lambda: len(self.batches) == 2)
+        assert [message.trailing for message in self.batches[1].messages] \
+            == ["missed"]
+        assert "CHATHISTORY AFTER #history " \
+               "timestamp=2023-11-14T22:13:20.000Z 50" in \
+            self.server.received_lines
+
+    def test_relayed_messages_carry_server_time(self):
+        received = []
+        self.client.chat_transmitter.connect_receiver(received.append)
+        self.connect()
+        self.client.connect_to_channel("#live")
+        assert wait_for(lambda: "#live" in self.server.channels_members)
+        speaker = IRCClient()
+        speaker.set_user(User("speaker"))
+        speaker.on_registered = lambda: speaker.connect_to_channel("#live")
+        speaker.connect_to_server(*self.server.address)
+        try:
+            assert wait_for(lambda: len(
+                self.server.channels_members.get("#live", ())) == 2)
+            speaker.send_user_message("now", "#live")
+            assert wait_for(lambda: received)
+        finally:
+            speaker.close()
+        assert abs(received[0].server_time() - time.time()) < 5
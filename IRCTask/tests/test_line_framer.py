@@ -0,0 +1,36 @@
+from client.line_framer import LineFramer
+
+
+class TestLineFramer:
+
+    def setup_method(self):
+        self.line_framer = LineFramer(buffer_size=64)
+
+    def test_feed_yields_complete_lines_only(self):
+        lines = list(self.line_framer.feed(b"PING :one\r\nPRIVMSG #a :par"))
+        assert lines == ["PING :one"]
+        assert self.line_framer.pending_bytes_count() == 15
+
+    def test_feed_frames_lines_ending_with_bare_newline(self):
+        lines = list(self.line_framer.feed(b"first\nsecond\r\n"))
+        assert lines == ["first", "second"]
+
+    def test_feed_keeps_multibyte_character_split_between_chunks(self):
+        encoded = "PRIVMSG #a :привет\r\n".encode("UTF-8")
+        lines = list(self.line_framer.feed(encoded[:14]))
+        lines += list(self.line_framer.feed(encoded[14:]))
+        assert lines == ["PRIVMSG #a :привет"]
+
+    def test_feed_falls_back_to_latin_1_for_invalid_utf_8(self):
+        lines = list(self.line_framer.feed(b"caf\xe9\r\n"))
+        assert lines == ["caf\xe9"]
+
+    def test_feed_reuses_buffer_for_long_streams(self):
+        data = b"PRIVMSG #a :0123456789\r\n" * 100
+        lines = list(self.line_framer.feed(data))
+        assert len(lines) == 100
+        assert self.line_framer.pending_bytes_count() == 0
+
+    def test_feed_drops_line_longer_than_buffer(self):
+        lines = list(self.line_framer.feed(b"A" * 100 + b"\r\nok\r\n"))
+        assert lines == ["ok"]
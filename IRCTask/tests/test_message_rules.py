@@ -0,0 +1,94 @@
+import re
+
+import pytest
+
+from client.irc_client import IRCClient
+from client.message_rules import MessageRules
+from data_transfer.irc_message import IRCMessage
+
+
+def create_message(text, prefix="Macha!~macha@unaffiliated/macha"):
+    return IRCMessage("PRIVMSG", ["#botwar", text], prefix)
+
+
+class TestMessageRules:
+
+    def test_apply_finds_whole_word_highlights_ignoring_case(self):
+        rules = MessageRules(highlights=["ivan", "ivan_"])
+        verdict = rules.apply(create_message("hi IVAN, and Ivan_ too"))
+        assert verdict.highlights == ("IVAN", "Ivan_")
+        assert not rules.apply(create_message("ivanov is here"))
+
+    def test_apply_routes_keywords_once_per_route(self):
+        rules = MessageRules(keywords=[("release", "news"),
+                                       ("python 4", "news"),
+                                       ("spam", "abuse")])
+        verdict = rules.apply(create_message("python 4 release, no spam"))
+        assert verdict.routes == ("news", "abuse")
+        assert verdict.highlights == ()
+
+    def test_apply_ignores_hostmask_globs(self):
+        rules = MessageRules(highlights=["ivan"], ignores=[
+            "Troll", "*!*@spam.example", "bad!~bad@host",
+            "*!*bot@*.example"])
+        ignored_prefixes = ["troll!~t@anywhere", "x!y@SPAM.example",
+                            "bad!~bad@host", "a!evilbot@irc.example"]
+        for prefix in ignored_prefixes:
+            assert rules.apply(create_message("ivan", prefix)).is_ignored
+        assert rules.apply(create_message("ivan")).highlights == ("ivan",)
+        assert not rules.apply(create_message("ivan", None)).is_ignored
+
+    def test_words_pattern_matches_every_word_and_escapes(self):
+        words = ["a+b", "ab", "abc", "[m]", "b"]
+        pattern = MessageRules.words_pattern(words)
+        for word in words:
+            assert re.fullmatch(pattern, word)
+
+    def test_parse_reads_rules_and_rejects_unknown_lines(self):
+        rules = MessageRules.parse(["# watch list", "", "highlight ivan",
+                                    "keyword news big release",
+                                    "ignore *!*@spam.example"])
+        assert rules.rules_count == 3
+        verdict = rules.apply(create_message("ivan: big release"))
+        assert verdict.highlights == ("ivan",)
+        assert verdict.routes == ("news",)
+        with pytest.raises(ValueError):
+            MessageRules.parse(["keyword lonely"])
+
+
+class TestIRCClientMessageRules:
+
+    def setup_method(self):
+        self.client = IRCClient()
+
+    def teardown_method(self):
+        self.client.event_bus.close()
+
+    def test_handle_irc_message_drops_ignored_and_transmits_highlights(self):
+        highlights = []
+        routed = []
+        self.client.highlight_transmitter.connect_receiver(highlights.append)
+        self.client.routed_transmitter.connect_receiver(routed.append)
+        self.client.set_message_rules(MessageRules(
+            highlights=["ivan"], keywords=[("urgent", "alerts")],
+            ignores=["troll"]))
+        self.client.handle_irc_message(':troll!t@h PRIVMSG #botwar :ivan')
+        self.client.handle_irc_message(
+            ':Macha!m@h PRIVMSG #botwar :ivan, urgent')
+        self.client.event_bus.flush(1)
+        assert self.client.ignored_messages_count == 1
+        assert [(words, message.nick) for words, message in highlights] == \
+            [(("ivan",), "Macha")]
+        assert [route for route, _ in routed] == ["alerts"]
+
+    def test_reload_message_rules_swaps_compiled_rules(self, tmp_path):
+        rules_path = tmp_path / "rules.txt"
+        rules_path.write_text("ignore troll\n", encoding="UTF-8")
+        self.client.reload_message_rules(str(rules_path)).join()
+        assert self.client.message_rules.rules_count == 1
+        assert self.client.current_status == "S: RULES RELOADED"
+        previous_rules = self.client.message_rules
+        rules_path.write_text("unknown rule\n", encoding="UTF-8")
+        self.client.reload_message_rules(str(rules_path)).join()
+        assert self.client.message_rules is previous_rules
+        assert self.client.current_status == "E: COULD NOT RELOAD RULES"
@@ -0,0 +1,151 @@
+import pytest
+
+from client.irc_client import IRCClient
+from client.irc_socket import IRCSocket
+from client.outbound_scheduler import OutboundScheduler, TokenBucket
+from data_transfer.irc_message import IRCMessage
+from data_transfer.user import User
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def taken_lines(entries):
+    return [data.decode().rstrip('\r\n') for data, _ in entries]
+
+
+class TestTokenBucket:
+
+    def test_bucket_refills_at_rate_up_to_burst(self):
+        clock = FakeClock()
+        bucket = TokenBucket(0.5, 2, clock)
+        bucket.consume()
+        bucket.consume()
+        assert bucket.delay() == 2
+        clock.now += 1
+        assert bucket.delay() == 1
+        clock.now += 100
+        bucket.refill()
+        assert bucket.tokens == 2
+
+    def test_bucket_rejects_non_positive_rate(self):
+        with pytest.raises(ValueError):
+            TokenBucket(0, 5)
+
+
+class TestOutboundScheduler:
+
+    def setup_method(self):
+        self.clock = FakeClock()
+        self.scheduler = OutboundScheduler(self.clock)
+
+    def put_lines(self, *lines):
+        for line in lines:
+            self.scheduler.put(bytes(line + '\r\n', "UTF-8"))
+
+    def test_classify_puts_pong_and_quit_first_and_chat_last(self):
+        assert OutboundScheduler.classify(b"PONG :x\r\n") == \
+            OutboundScheduler.URGENT
+        assert OutboundScheduler.classify(b"@label=1 QUIT\r\n") == \
+            OutboundScheduler.URGENT
+        assert OutboundScheduler.classify(b"JOIN #a\r\n") == \
+            OutboundScheduler.CONTROL
+        assert OutboundScheduler.classify(b"privmsg #a :hi\r\n") == \
+            OutboundScheduler.CHAT
+
+    def test_take_orders_lanes_by_priority(self):
+        self.put_lines("PRIVMSG #a :one", "JOIN #b", "PONG :token",
+                       "PRIVMSG #a :two")
+        entries, delay = self.scheduler.take()
+        assert taken_lines(entries) == ["PONG :token", "JOIN #b",
+                                        "PRIVMSG #a :one", "PRIVMSG #a :two"]
+        assert delay == 0
+
+    def test_rate_limit_holds_back_chat_but_not_pong(self):
+        self.scheduler.set_rate_limit(1, 2)
+        self.put_lines("PRIVMSG #a :one", "PRIVMSG #a :two",
+                       "PRIVMSG #a :three")
+        entries, delay = self.scheduler.take()
+        assert taken_lines(entries) == ["PRIVMSG #a :one", "PRIVMSG #a :two"]
+        assert delay == 1
+        self.put_lines("PONG :token")
+        entries, delay = self.scheduler.take()
+        assert taken_lines(entries) == ["PONG :token"]
+        assert delay == 2
+        self.clock.now += 2
+        entries, delay = self.scheduler.take()
+        assert taken_lines(entries) == ["PRIVMSG #a :three"]
+        assert self.scheduler.throttled_count == 2
+
+    def test_stop_sends_quit_after_allowed_lines_and_keeps_the_rest(self):
+        self.scheduler.set_rate_limit(1, 1)
+        self.put_lines("PRIVMSG #a :one", "PRIVMSG #a :two", "QUIT")
+        self.scheduler.put(None)
+        entries, is_stopping = self.scheduler.wait_and_take()
+        assert taken_lines(entries) == ["PRIVMSG #a :one", "QUIT"]
+        assert is_stopping is True
+        assert self.scheduler.lanes_sizes() == (0, 0, 1)
+        self.scheduler.resume()
+        self.clock.now += 2
+        assert taken_lines(self.scheduler.take()[0]) == ["PRIVMSG #a :two"]
+
+
+class TestMessageSplitting:
+
+    def test_split_text_keeps_short_text_whole(self):
+        assert IRCMessage.split_text("hello", 100) == ["hello"]
+
+    def test_split_text_prefers_spaces_and_never_breaks_characters(self):
+        chunks = IRCMessage.split_text("ab " + "é" * 10, 8)
+        assert chunks == ["ab éé", "éééé", "éééé"]
+        assert IRCMessage.split_text("abcd efgh ij", 8) == ["abcd", "efgh ij"]
+        assert all(len(chunk.encode("UTF-8")) <= 8 for chunk in chunks)
+
+    def test_split_text_sends_each_line_separately(self):
+        assert IRCMessage.split_text("one\r\n\ntwo", 100) == ["one", "two"]
+
+    def test_long_user_message_is_split_within_line_limit(self):
+        irc_socket = IRCSocket()
+        client = IRCClient(irc_socket)
+        client.set_user(User("me"))
+        client.send_user_message(' '.join(["word"] * 300), "#channel")
+        data, _ = irc_socket.collect_pending_data()
+        lines = data.split(b'\r\n')[:-1]
+        assert len(lines) > 1
+        assert b' '.join(line.partition(b' :')[2] for line in lines) == \
+            b' '.join([b'word'] * 300)
+        prefix_length = len(":me!~{0}@{1} ".format('u' * 10, 'h' * 63))
+        assert all(prefix_length + len(line) <= IRCClient.MAX_LINE_BYTES
+                   for line in lines)
+
+    def test_broadcast_groups_targets_by_targmax(self):
+        irc_socket = IRCSocket()
+        echoed = []
+        irc_socket.output_receiver = echoed.append
+        client = IRCClient(irc_socket)
+        client.set_user(User("me"))
+        client.handle_irc_message(
+            ":irc.net 005 me TARGMAX=PRIVMSG:2,NOTICE:2 :are supported")
+        client.send_broadcast_message(["#a", "#b", "#c"], "news")
+        data, _ = irc_socket.collect_pending_data()
+        assert data == b"PRIVMSG #a,#b :news\r\nPRIVMSG #c :news\r\n"
+        assert echoed == ["PRIVMSG #a :news", "PRIVMSG #b :news",
+                          "PRIVMSG #c :news"]
+
+    def test_empty_targmax_value_means_no_targets_limit(self):
+        irc_socket = IRCSocket()
+        client = IRCClient(irc_socket)
+        client.set_user(User("me"))
+        client.handle_irc_message(
+            ":irc.net 005 me TARGMAX=PRIVMSG:,NOTICE:2 :are supported")
+        assert client.max_targets("PRIVMSG") is None
+        assert client.max_targets("NOTICE") == 2
+        client.send_broadcast_message(["#a", "#b", "#c"], "news")
+        data, _ = irc_socket.collect_pending_data()
+        assert data == b"PRIVMSG #a,#b,#c :news\r\n"
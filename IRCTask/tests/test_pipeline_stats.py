@@ -0,0 +1,127 @@
+import json
+import urllib.request
+
+from client.irc_client import IRCClient
+from data_transfer.user import User
+from monitoring.pipeline_stats import Histogram, PipelineStats
+from monitoring.stats_exporter import StatsExporter
+from testing.fake_irc_server import FakeIRCServer
+from testing.waiting import wait_for
+
+
+class TestHistogram:
+
+    def test_percentiles_use_bucket_bounds_capped_by_max(self):
+        histogram = Histogram(bounds=(1, 2, 4, 8))
+        for value in (0.5, 1.5, 1.5, 3, 7):
+            histogram.observe(value)
+        assert histogram.count == 5
+        assert histogram.percentile(0.5) == 2
+        assert histogram.percentile(0.99) == 7
+        assert histogram.cumulative_buckets() == [(1, 1), (2, 3), (4, 4),
+                                                  (8, 5)]
+
+    def test_percentile_is_none_without_observations(self):
+        assert Histogram().percentile(0.5) is None
+
+
+class TestPipelineStats:
+
+    def setup_method(self):
+        self.stats = PipelineStats("irc.example.net")
+
+    def test_snapshot_groups_labelled_metrics(self):
+        self.stats.increment('bytes_received', 100)
+        self.stats.increment('messages_handled', 1, 'PRIVMSG')
+        self.stats.increment('messages_handled', 2, 'PRIVMSG')
+        self.stats.set_gauge('outbound_queue_depth', 3)
+        self.stats.observe('dispatch_seconds', 0.001, 'PRIVMSG')
+
+        snapshot = self.stats.snapshot()
+        assert snapshot['connection'] == "irc.example.net"
+        assert snapshot['counters'] == {'bytes_received': 100,
+                                        'messages_handled': {'PRIVMSG': 3}}
+        assert snapshot['gauges'] == {'outbound_queue_depth': 3}
+        assert snapshot['histograms']['dispatch_seconds']['PRIVMSG'][
+            'count'] == 1
+
+    def test_reset_clears_metrics(self):
+        self.stats.increment('lines_received')
+        self.stats.reset()
+        assert self.stats.counter('lines_received') == 0
+
+    def test_prometheus_text_groups_samples_by_metric(self):
+        other_stats = PipelineStats("irc.other.net")
+        self.stats.increment('lines_received', 5)
+        other_stats.increment('lines_received', 7)
+        self.stats.observe('parse_seconds', 0.000001)
+
+        text = StatsExporter([self.stats, other_stats]).prometheus_text()
+        lines = text.splitlines()
+        type_index = lines.index("# TYPE irc_lines_received_total counter")
+        assert lines[type_index + 1:type_index + 3] == [
+            'irc_lines_received_total{connection="irc.example.net"} 5',
+            'irc_lines_received_total{connection="irc.other.net"} 7']
+        assert 'irc_parse_seconds_bucket{connection="irc.example.net",' \
+               'le="+Inf"} 1' in lines
+        assert 'irc_parse_seconds_count{connection="irc.example.net"} 1' \
+            in lines
+
+    def test_exporter_writes_snapshot_file_on_stop(self, tmp_path):
+        snapshot_path = str(tmp_path / "stats.json")
+        self.stats.increment('lines_sent', 2)
+        exporter = StatsExporter([self.stats], snapshot_path, interval=60)
+        exporter.start()
+        exporter.stop()
+        with open(snapshot_path) as snapshot_file:
+            snapshots = json.load(snapshot_file)
+        assert snapshots[0]['counters'] == {'lines_sent': 2}
+
+    def test_exporter_serves_prometheus_endpoint(self):
+        self.stats.increment('bytes_sent', 10)
+        exporter = StatsExporter([self.stats])
+        host, port = exporter.serve_prometheus()
+        try:
+            with urllib.request.urlopen(
+                    "http://{0}:{1}/metrics".format(host, port)) as response:
+                body = response.read().decode()
+        finally:
+            exporter.stop()
+        assert 'irc_bytes_sent_total{connection="irc.example.net"} 10' \
+            in body
+
+
+class TestClientStats:
+
+    def setup_method(self):
+        self.server = FakeIRCServer().start()
+        self.client = IRCClient()
+        self.client.set_user(User("measured"))
+
+    def teardown_method(self):
+        self.client.close()
+        self.server.stop()
+
+    def test_enabled_stats_measure_pipeline_and_ping_latency(self):
+        registered = []
+        self.client.on_registered = lambda: registered.append(True)
+        stats = self.client.enable_stats()
+        self.client.connect_to_server(*self.server.address)
+        assert wait_for(lambda: registered)
+        self.client.probe_latency()
+        assert wait_for(
+            lambda: stats.histogram('ping_round_trip_seconds') is not None)
+
+        assert stats.counter('lines_received') >= 4
+        assert stats.counter('bytes_received') > 0
+        assert stats.counter('lines_sent') >= 1
+        assert stats.counter('messages_handled', '001') == 1
+        assert stats.histogram('dispatch_seconds', 'PONG').count == 1
+        assert stats.histogram('outbound_wait_seconds').count >= 1
+
+    def test_disabled_stats_record_nothing(self):
+        stats = self.client.enable_stats()
+        self.client.disable_stats()
+        self.client.connect_to_server(*self.server.address)
+        assert wait_for(lambda: self.client.is_registered)
+        assert stats.snapshot()['counters'] == {}
@@ -0,0 +1,61 @@
+import pytest
+from data_transfer.scrollback import Scrollback
+
+
+class TestScrollback:
+
+    def test_append_keeps_messages_in_order(self):
+        scrollback = Scrollback(max_messages=3)
+        for index in range(3):
+            scrollback.append("nick", "message {}".format(index))
+        assert [record.text for record in scrollback] == \
+            ["message 0", "message 1", "message 2"]
+
+    def test_append_evicts_oldest_message_when_full(self):
+        scrollback = Scrollback(max_messages=3)
+        for index in range(5):
+            scrollback.append("nick", "message {}".format(index))
+        assert len(scrollback) == 3
+        assert scrollback[0].text == "message 2"
+        assert scrollback[-1].text == "message 4"
+        assert scrollback.evicted_count == 2
+
+    def test_append_evicts_by_bytes_count(self):
+        record_size = Scrollback.record_size("nick", "x" * 10)
+        scrollback = Scrollback(max_messages=100, max_bytes=record_size * 2)
+        for _ in range(4):
+            scrollback.append("nick", "x" * 10)
+        assert len(scrollback) == 2
+        assert scrollback.bytes_count == record_size * 2
+
+    def test_overflow_count_predicts_evictions(self):
+        scrollback = Scrollback(max_messages=2)
+        scrollback.append("nick", "first")
+        assert scrollback.overflow_count("nick", "second") == 0
+        scrollback.append("nick", "second")
+        assert scrollback.overflow_count("nick", "third") == 1
+
+    def test_fitting_messages_trims_batch_to_limits(self):
+        scrollback = Scrollback(max_messages=3, max_bytes=60)
+        messages = [("nick", "x" * 10)] * 5
+        assert scrollback.fitting_messages(messages) == messages[-2:]
+
+    def test_batch_overflow_count_counts_evicted_records(self):
+        scrollback = Scrollback(max_messages=3)
+        scrollback.append("a", "one")
+        scrollback.append("b", "two")
+        assert scrollback.batch_overflow_count([("c", "3"), ("d", "4")]) == 1
+        assert scrollback.batch_overflow_count([("c", "3")] * 3) == 2
+
+    def test_evicted_messages_are_spilled_to_disk(self, tmp_path):
+        spill_path = tmp_path / "spill.log"
+        scrollback = Scrollback(max_messages=1, spill_path=str(spill_path))
+        scrollback.append("nick", "old", timestamp=1.0)
+        scrollback.append("nick", "new", timestamp=2.0)
+        scrollback.close()
+        assert spill_path.read_text(encoding="UTF-8") == "1.000\tnick\told\n"
+
+    def test_getitem_raises_index_error_out_of_range(self):
+        scrollback = Scrollback(max_messages=2)
+        with pytest.raises(IndexError):
+            scrollback[0]
@@ -0,0 +1,57 @@
+import pytest
+from client.session_manager import SessionManager
+from data_transfer.user import User
+from testing.fake_irc_server import FakeIRCServer
+from testing.waiting import wait_for
+
+
+class TestSessionManager:
+
+    def setup_method(self):
+        self.first_server = FakeIRCServer().start()
+        self.second_server = FakeIRCServer().start()
+        self.session_manager = SessionManager()
+        self.speaker = SessionManager()
+
+    def test_join_channels_uses_one_connection_per_server(self):
+        self.session_manager.add_server("127.0.0.1",
+                                        self.first_server.port,
+                                        User("watcher"))
+        self.session_manager.join_channels("127.0.0.1",
+                                           ["#one", "#two", "#three"])
+        assert wait_for(lambda: len(self.first_server.channels_members) == 3)
+        assert len(self.first_server.sessions) == 1
+
+    def test_messages_are_routed_by_server_and_channel(self):
+        received = []
+        self.session_manager.add_server("127.0.0.1", self.first_server.port,
+                                        User("watcher"))
+        self.session_manager.add_server("localhost", self.second_server.port,
+                                        User("watcher"))
+        self.session_manager.subscribe(
+            "localhost", "#Two",
+            lambda server_name, channel_name, message:
+            received.append((channel_name, message.trailing)))
+        for server_name in self.session_manager.servers():
+            self.session_manager.join_channels(server_name, ["#one", "#two"])
+
+        self.speaker.add_server("127.0.0.1", self.second_server.port,
+                                User("speaker"))
+        self.speaker.join_channels("127.0.0.1", ["#one", "#two"])
+        assert wait_for(lambda: len(
+            self.second_server.channels_members.get("#two", ())) == 2)
+        self.speaker.send_message("127.0.0.1", "#one", "ignored")
+        self.speaker.send_message("127.0.0.1", "#two", "routed")
+
+        assert wait_for(lambda: len(received) == 1)
+        assert received == [("#two", "routed")]
+
+    def test_join_channel_raises_value_error_for_unknown_server(self):
+        with pytest.raises(ValueError):
+            self.session_manager.join_channel("unknown", "#channel")
+
+    def teardown_method(self):
+        self.session_manager.disconnect_all()
+        self.speaker.disconnect_all()
+        self.first_server.stop()
+        self.second_server.stop()
@@ -0,0 +1,46 @@
+import threading
+
+from testing.soak_harness import SoakBudget, SoakHarness
+
+
+class TestSoakHarness:
+
+    def test_short_run_stays_within_budget(self):
+        harness = SoakHarness(cycles=8, channels_count=3,
+                              messages_per_cycle=20, list_every=3,
+                              reconnect_every=4, restart_every=5,
+                              samples_count=2, warmup_cycles=2, top_count=5)
+        report = harness.run()
+        assert report.is_within_budget(), report.format()
+        assert report.samples[0].cycle == 2
+        assert report.samples[-1].cycle == 8
+        assert len(report.top_allocations) <= 5
+        assert report.simulated_seconds == 8 * 60
+        assert set(harness.scrollbacks) <= {
+            "#soak-{0}".format(index) for index in range(6)}
+        assert "8 cycles" in report.format()
+
+    def test_reports_leaks_over_budget(self):
+        leaked = []
+        stop = threading.Event()
+
+        def leak(cycle):
+            leaked.append(bytearray(64 * 1024))
+            if cycle == 3:
+                threading.Thread(target=stop.wait, daemon=True).start()
+
+        harness = SoakHarness(cycles=6, budget=SoakBudget(
+            memory_growth_bytes=128 * 1024), channels_count=2,
+            messages_per_cycle=10, samples_count=2, warmup_cycles=1)
+        harness.on_cycle = leak
+        try:
+            report = harness.run()
+        finally:
+            stop.set()
+        assert not report.is_within_budget()
+        assert any(violation.startswith("memory grew")
+                   for violation in report.violations)
+        assert any(violation.startswith("threads grew")
+                   for violation in report.violations)
+        assert "test_soak_harness.py" in report.top_allocations[0]
+        assert "BUDGET EXCEEDED" in report.format()
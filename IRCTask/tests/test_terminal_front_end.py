@@ -0,0 +1,81 @@
+import io
+import subprocess
+import sys
+
+from client.irc_client import IRCClient
+from data_transfer.user import User
+from terminal.terminal_front_end import TerminalFrontEnd
+from testing.fake_irc_server import FakeIRCServer
+from testing.waiting import wait_for
+
+
+class TestTerminalFrontEnd:
+
+    def setup_method(self):
+        self.server = FakeIRCServer().start()
+        self.server.add_channel("#python", "Python talk")
+        self.output = io.StringIO()
+        self.front_end = TerminalFrontEnd(IRCClient(), self.output)
+
+    def teardown_method(self):
+        self.front_end.handle_input_line("/quit")
+        self.server.stop()
+
+    def connect(self, channels_names=()):
+        self.front_end.connect(*self.server.address, User("termuser"),
+                               channels_names)
+        assert wait_for(lambda: "REGISTERED AS termuser" in
+                        self.output.getvalue())
+
+    def test_joins_requested_channels_after_registration(self):
+        self.connect(["#python"])
+        assert wait_for(lambda: "#python: 1 users" in self.output.getvalue())
+
+    def test_plain_line_is_sent_to_current_channel(self):
+        self.connect(["#python"])
+        assert wait_for(lambda: "#python: 1 users" in self.output.getvalue())
+        self.front_end.handle_input_line("hello terminal\n")
+        assert wait_for(lambda: "[#python] <termuser> hello terminal" in
+                        self.output.getvalue())
+
+    def test_incoming_private_message_is_shown_by_sender(self):
+        self.connect(["#python"])
+        assert wait_for(lambda: "#python: 1 users" in self.output.getvalue())
+        self.server.broadcast(":friend!f@host PRIVMSG termuser :psst")
+        assert wait_for(lambda: "[friend] <friend> psst" in
+                        self.output.getvalue())
+
+    def test_list_prints_fresh_directory(self):
+        directory = self.front_end.irc_client.get_channel_directory()
+        for index in range(50):
+            directory.add_row("#cached{0}".format(index), index, "topic")
+        directory.finish_refresh()
+        self.front_end.handle_input_line("/list")
+        self.front_end.irc_client.event_bus.flush()
+        lines = self.output.getvalue().splitlines()
+        assert len([line for line in lines
+                    if line.startswith("#cached")]) == 50
+        assert lines[0] == "#cached49 (49) topic"
+
+    def test_unknown_command_and_missing_channel_are_reported(self):
+        self.front_end.handle_input_line("/dance")
+        self.front_end.handle_input_line("no channel yet")
+        assert "Unknown command /dance" in self.output.getvalue()
+        assert "Join a channel first" in self.output.getvalue()
+
+    def test_run_stops_on_quit(self):
+        self.connect()
+        self.front_end.run(io.StringIO("/help\n/quit\n/join #never\n"))
+        assert self.front_end.is_running is False
+        assert "/join #a[,#b]" in self.output.getvalue()
+        assert not self.front_end.irc_client.is_connected()
+
+    def test_import_does_not_load_gui_or_optional_modules(self):
+        loaded = subprocess.check_output(
+            [sys.executable, '-c',
+             "import sys, terminal.terminal_front_end; "
+             "print(' '.join(sorted(sys.modules)))"]).decode().split()
+        for module_prefix in ('PyQt5', 'asyncio', 'datetime', 'sqlite3',
+                              'monitoring', 'storage', 'widgets'):
+            assert not any(name.startswith(module_prefix)
+                           for name in loaded), module_prefix
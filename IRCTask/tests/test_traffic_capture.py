@@ -0,0 +1,79 @@
+import pytest
+from client.irc_client import IRCClient
+from data_transfer.user import User
+from monitoring.capture_replay import CaptureReplayer, replay_capture
+from monitoring.traffic_capture import TrafficCapture, read_capture
+from testing.fake_irc_server import FakeIRCServer
+from testing.waiting import wait_for
+
+
+class TestTrafficCapture:
+
+    def test_records_are_read_back_in_order(self, tmp_path):
+        capture_path = str(tmp_path / "traffic.cap")
+        capture = TrafficCapture(capture_path)
+        capture.record_outbound(b"NICK tester\r\n")
+        capture.record_inbound(b":irc.fake.net 001 tester :Welcome\r\n")
+        capture.record_echo("PRIVMSG #channel :hello")
+        capture.close()
+
+        records = list(read_capture(capture_path))
+        assert [(direction, data) for _, direction, data in records] == [
+            (TrafficCapture.OUTBOUND, b"NICK tester\r\n"),
+            (TrafficCapture.INBOUND, b":irc.fake.net 001 tester :Welcome\r\n"),
+            (TrafficCapture.ECHO, b"PRIVMSG #channel :hello")]
+        assert records[0][0] <= records[1][0] <= records[2][0]
+
+    def test_truncated_capture_stops_at_last_complete_record(self, tmp_path):
+        capture_path = str(tmp_path / "traffic.cap")
+        capture = TrafficCapture(capture_path)
+        capture.record_inbound(b"PING :first\r\n")
+        capture.record_inbound(b"PING :second\r\n")
+        capture.close()
+        with open(capture_path, 'r+b') as capture_file:
+            capture_file.truncate(capture_file.seek(0, 2) - 3)
+
+        assert len(list(read_capture(capture_path))) == 1
+
+
+class TestCaptureReplay:
+
+    def setup_method(self):
+        self.server = FakeIRCServer().start()
+        self.server.add_channel("#replay", "Replayed channel")
+
+    def teardown_method(self):
+        self.server.stop()
+
+    def test_replay_rebuilds_client_state_without_socket(self, tmp_path):
+        capture_path = str(tmp_path / "session.cap")
+        client = IRCClient()
+        client.set_user(User("recorder"))
+        client.on_registered = lambda: client.connect_to_channel("#replay")
+        client.start_capture(capture_path)
+        client.connect_to_server(*self.server.address)
+        assert wait_for(lambda: client.get_roster("#replay") is not None and
+                        len(client.get_roster("#replay")) == 1)
+        self.server.broadcast(":other!o@host PRIVMSG #replay :hi there")
+        self.server.broadcast(":other!o@host JOIN #replay")
+        assert wait_for(lambda: len(client.get_roster("#replay")) == 2)
+        client.close()
+        client.stop_capture()
+
+        outbound = b''.join(data for _, direction, data
+                            in read_capture(capture_path)
+                            if direction == TrafficCapture.OUTBOUND)
+        assert b"USER recorder" in outbound
+        assert b"NICK recorder\r\n" in outbound
+        assert outbound.count(b"\n") == outbound.count(b"\r\n")
+
+        replayed_client = replay_capture(capture_path)
+
+        assert replayed_client.is_registered is True
+        assert replayed_client.server_features['PREFIX'] == "(ov)@+"
+        assert replayed_client.get_roster("#replay").names() == \
+            client.get_roster("#replay").names()
+
+    def test_replay_rejects_unknown_mode(self, tmp_path):
+        with pytest.raises(ValueError):
+            CaptureReplayer(str(tmp_path / "missing.cap"), mode='slow')
@@ -0,0 +1,57 @@
+import threading
+
+from client.irc_socket import IRCSocket
+from data_transfer.user import User
+from testing import traffic_generator
+from testing.fake_irc_server import FakeIRCServer
+
+
+class TestTrafficReplay:
+
+    def setup_method(self):
+        self.server = FakeIRCServer().start()
+        self.irc_socket = IRCSocket()
+        self.received = []
+        self.finished = threading.Event()
+
+    def teardown_method(self):
+        self.irc_socket.disconnect()
+        self.server.stop()
+
+    def receive(self, text):
+        self.received.append(text)
+        if text.endswith(traffic_generator.END_OF_REPLAY):
+            self.finished.set()
+
+    def connect(self):
+        self.irc_socket.output_receiver = self.receive
+        self.irc_socket.set_server_data(*self.server.address)
+        self.irc_socket.connect_to_server()
+        self.irc_socket.send_user_data(User("replayer"))
+
+    def test_registered_client_receives_replayed_lines_in_order(self):
+        lines = list(traffic_generator.channels_list(1000))
+        lines.append(traffic_generator.end_of_replay_line())
+        self.server.replay_on_registration(lines)
+        self.connect()
+
+        assert self.finished.wait(5)
+        replayed = [text for text in self.received
+                    if " 321 " in text or " 322 " in text]
+        assert len(replayed) == 1001
+        assert replayed[1].endswith("322 replayer #channel0 0 "
+                                    ":[+nt] Topic of channel 0 about things")
+        assert "#channel999 " in replayed[-1]
+
+    def test_replay_substitutes_send_timestamps(self):
+        lines = list(traffic_generator.privmsg_flood(10))
+        lines.append(traffic_generator.end_of_replay_line())
+        self.server.replay_on_registration(lines)
+        self.connect()
+
+        assert self.finished.wait(5)
+        messages = [text for text in self.received if "ts=" in text]
+        assert len(messages) == 10
+        assert traffic_generator.TIMESTAMP_PLACEHOLDER not in messages[0]
+        timestamp = messages[0].split("ts=")[1].split()[0]
+        assert timestamp.isdigit()
@@ -7,7 +7,7 @@ def receiver(data):
 
 
 class TestTransmitter:
-    def setup(self):
+    def setup_method(self):
         self.transmitter = Transmitter()
 
     def test_can_transmit_when_receiver_is_connected(self):
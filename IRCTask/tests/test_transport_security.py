@@ -0,0 +1,163 @@
+import asyncio
+import shutil
+import socket
+import ssl
+import subprocess
+
+import pytest
+
+from client.async_irc_client import AsyncIRCClient
+from client.dual_stack_connector import DualStackConnector
+from client.irc_client import IRCClient
+from client.transport_security import TransportSecurity
+from data_transfer.user import User
+from testing.fake_irc_server import FakeIRCServer
+from testing.waiting import wait_for
+
+
+@pytest.fixture(scope="module")
+def certificate(tmp_path_factory):
+    if shutil.which("openssl") is None:
+        pytest.skip("openssl is not installed")
+    directory = tmp_path_factory.mktemp("tls")
+    certificate_path = directory / "certificate.pem"
+    key_path = directory / "key.pem"
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "ec", "-pkeyopt",
+         "ec_paramgen_curve:prime256v1", "-nodes", "-days", "1",
+         "-subj", "/CN=localhost", "-addext",
+         "subjectAltName=DNS:localhost,IP:127.0.0.1",
+         "-keyout", str(key_path), "-out", str(certificate_path)],
+        check=True, capture_output=True)
+    return str(certificate_path), str(key_path)
+
+
+def certificate_fingerprint(certificate_path):
+    with open(certificate_path) as certificate_file:
+        return TransportSecurity.fingerprint(
+            ssl.PEM_cert_to_DER_cert(certificate_file.read()))
+
+
+class TestTransportSecurity:
+
+    @pytest.fixture(autouse=True)
+    def tls_server(self, certificate):
+        self.certificate_path = certificate[0]
+        server_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        server_context.load_cert_chain(*certificate)
+        self.server = FakeIRCServer(ssl_context=server_context).start()
+        self.client = IRCClient()
+        self.client.set_user(User("secure"))
+        self.registrations = []
+        self.client.on_registered = lambda: self.registrations.append(True)
+        yield
+        self.client.close()
+        self.server.stop()
+
+    def connect(self):
+        registrations_count = len(self.registrations) + 1
+        self.client.connect_to_server("localhost", self.server.port)
+        return wait_for(lambda: len(self.registrations) == registrations_count)
+
+    def test_reconnect_resumes_tls_session(self):
+        security = self.client.enable_tls(ca_file=self.certificate_path)
+        assert self.connect()
+        assert self.client.current_status == "S: SUCCESSFULLY CONNECTED"
+        self.client.disconnect()
+        assert security.has_session("localhost", self.server.port)
+
+        assert self.connect()
+        assert security.resumed_count == 1
+        assert len(self.registrations) == 2
+
+    def test_concurrent_reads_and_writes_keep_tls_records_intact(self):
+        self.client.enable_tls(ca_file=self.certificate_path)
+        self.server.is_recording_lines = True
+        received = []
+        self.client.chat_transmitter.connect_receiver(received.append)
+        assert self.connect()
+        self.client.connect_to_channel("#tls")
+        for index in range(300):
+            self.server.broadcast(
+                ":peer!p@host PRIVMSG #tls :in {0}".format(index))
+            self.client.send_user_message("out {0}".format(index), "peer")
+        assert wait_for(lambda: len([
+            line for line in self.server.received_lines
+            if line.startswith("PRIVMSG peer :out")]) == 300)
+        self.client.event_bus.flush(5)
+        assert wait_for(lambda: len([
+            message for message in received
+            if message.trailing.startswith("in ")]) == 300)
+        assert self.client.is_connected()
+
+    def test_parallel_connection_reuses_shared_session_cache(self):
+        security = self.client.enable_tls(ca_file=self.certificate_path)
+        assert self.connect()
+        self.client.disconnect()
+        other_client = IRCClient()
+        other_client.set_user(User("parallel"))
+        other_client.enable_tls(security)
+        other_client.connect_to_server("localhost", self.server.port)
+        try:
+            assert wait_for(lambda: other_client.is_registered)
+            assert security.resumed_count == 1
+        finally:
+            other_client.close()
+
+    def test_pinned_fingerprint_is_checked(self):
+        pinned = certificate_fingerprint(self.certificate_path)
+        self.client.enable_tls(verify=False, pinned_fingerprints=[pinned])
+        assert self.connect()
+        self.client.disconnect()
+
+        self.client.enable_tls(verify=False, pinned_fingerprints=["00" * 32])
+        self.client.connect_to_server("localhost", self.server.port)
+        assert wait_for(lambda: self.client.current_status ==
+                        "E: SECURE CONNECTION FAILED")
+        assert not self.client.is_connected()
+
+    def test_untrusted_certificate_is_rejected(self):
+        self.client.enable_tls()
+        self.client.connect_to_server("localhost", self.server.port)
+        assert wait_for(lambda: self.client.current_status ==
+                        "E: SECURE CONNECTION FAILED")
+
+    def test_async_client_connects_over_tls(self):
+        async def connect():
+            client = AsyncIRCClient()
+            client.set_user(User("asyncsecure"))
+            client.enable_tls(ca_file=self.certificate_path)
+            await client.connect_to_server("localhost", self.server.port)
+            for _ in range(500):
+                if client.is_registered:
+                    break
+                await asyncio.sleep(0.01)
+            is_registered = client.is_registered
+            await client.close()
+            return is_registered
+        assert asyncio.run(connect())
+
+
+class TestDualStackConnector:
+
+    def test_interleave_addresses_alternates_families(self):
+        addresses = [(socket.AF_INET6, 1), (socket.AF_INET6, 2),
+                     (socket.AF_INET, 3), (socket.AF_INET, 4),
+                     (socket.AF_INET6, 5)]
+        assert [address[1] for address in
+                DualStackConnector.interleave_addresses(addresses)] == \
+            [1, 3, 2, 4, 5]
+
+    def test_connect_falls_back_to_listening_family(self):
+        with socket.create_server(('127.0.0.1', 0)) as listener:
+            port = listener.getsockname()[1]
+            with DualStackConnector.connect('localhost', port, 5) as \
+                    connection:
+                assert connection.getpeername()[:2] == ('127.0.0.1', port)
+                assert connection.getblocking()
+
+    def test_connect_raises_last_error_when_every_attempt_fails(self):
+        with socket.create_server(('127.0.0.1', 0)) as listener:
+            port = listener.getsockname()[1]
+        with pytest.raises(OSError):
+            DualStackConnector.connect('127.0.0.1', port, 5)
@@ -1,11 +1,56 @@
+import PyQt5.QtCore as QtCore
 import PyQt5.QtWidgets as QtWidgets
 
 
-class ChannelsListWidget(QtWidgets.QListWidget): # pragma: no cover
+class ChannelsModel(QtCore.QAbstractListModel):  # pragma: no cover
+    CHANNEL_ROLE = QtCore.Qt.UserRole
+
+    def __init__(self):
+        super(ChannelsModel, self).__init__()
+        self.channels = []
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.channels)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        channel_info = self.channels[index.row()]
+        if role == QtCore.Qt.DisplayRole:
+            return channel_info.full_name
+        if role == QtCore.Qt.ToolTipRole:
+            return "{0}\nUsers: {1}".format(channel_info.name,
+                                            channel_info.users_count)
+        if role == ChannelsModel.CHANNEL_ROLE:
+            return channel_info
+        return None
+
+    def append_channels(self, channels):
+        if not channels:
+            return
+        row = len(self.channels)
+        self.beginInsertRows(QtCore.QModelIndex(), row,
+                             row + len(channels) - 1)
+        self.channels.extend(channels)
+        self.endInsertRows()
+
+    def set_channels(self, channels):
+        self.beginResetModel()
+        self.channels = list(channels)
+        self.endResetModel()
+
+
+class ChannelsListWidget(QtWidgets.QListView):  # pragma: no cover
 
     def __init__(self):
         super(ChannelsListWidget, self).__init__()
         self.joining_delegate = None
+        self.channels_model = ChannelsModel()
+        self.setModel(self.channels_model)
+        self.setUniformItemSizes(True)
+        self.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
 
     def set_joining_delegate(self, joining_delegate):
         self.joining_delegate = joining_delegate
@@ -13,8 +58,18 @@ class ChannelsListWidget(QtWidgets.QListWidget): # pragma: no cover
     def check_joining_delegate(self):
         return self.joining_delegate is not None
 
-    def connect_to_channel(self, item):
+    def add_channels(self, channels):
+        self.channels_model.append_channels(channels)
+
+    def set_channels(self, channels):
+        self.channels_model.set_channels(channels)
+
+    def clear(self):
+        self.channels_model.set_channels([])
+
+    def connect_to_channel(self, index):
         if self.check_joining_delegate():
-            self.joining_delegate(item.data(256).name)
+            self.joining_delegate(
+                index.data(ChannelsModel.CHANNEL_ROLE).name)
         else:
             raise ValueError("Joining delegate is None!")
@@ -0,0 +1,87 @@
+import PyQt5.QtCore as QtCore
+import PyQt5.QtWidgets as QtWidgets
+
+
+class ChatModel(QtCore.QAbstractListModel):  # pragma: no cover
+
+    def __init__(self, scrollback):
+        super(ChatModel, self).__init__()
+        self.scrollback = scrollback
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.scrollback)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid() or role != QtCore.Qt.DisplayRole:
+            return None
+        record = self.scrollback[index.row()]
+        return '{0}: {1}'.format(record.nick, record.text)
+
+    def append_message(self, nick, text):
+        self.append_messages([(nick, text)])
+
+    def append_messages(self, messages):
+        messages = self.scrollback.fitting_messages(messages)
+        if not messages:
+            return
+        evicted_count = self.scrollback.batch_overflow_count(messages)
+        if evicted_count > 0:
+            self.beginRemoveRows(QtCore.QModelIndex(), 0, evicted_count - 1)
+            self.scrollback.evict(evicted_count)
+            self.endRemoveRows()
+        row = len(self.scrollback)
+        self.beginInsertRows(QtCore.QModelIndex(), row,
+                             row + len(messages) - 1)
+        for nick, text in messages:
+            self.scrollback.append(nick, text)
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.scrollback.clear()
+        self.endResetModel()
+
+
+class ChatViewWidget(QtWidgets.QListView):  # pragma: no cover
+
+    def __init__(self):
+        super(ChatViewWidget, self).__init__()
+        self.__models = {}
+        self.setUniformItemSizes(True)
+        self.setWordWrap(False)
+        self.setSelectionMode(QtWidgets.QAbstractItemView.NoSelection)
+        self.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.setVerticalScrollMode(QtWidgets.QAbstractItemView.ScrollPerItem)
+
+    def show_scrollback(self, scrollback):
+        model = self.__model_for(scrollback)
+        if self.model() is not model:
+            self.setModel(model)
+            self.scrollToBottom()
+
+    def append_message(self, scrollback, nick, text):
+        self.append_messages(scrollback, [(nick, text)])
+
+    def append_messages(self, scrollback, messages):
+        model = self.__model_for(scrollback)
+        is_at_bottom = self.__is_at_bottom()
+        model.append_messages(messages)
+        if model is self.model() and is_at_bottom:
+            self.scrollToBottom()
+
+    def clear(self):
+        for model in self.__models.values():
+            model.clear()
+
+    def __model_for(self, scrollback):
+        model = self.__models.get(id(scrollback))
+        if model is None:
+            model = ChatModel(scrollback)
+            self.__models[id(scrollback)] = model
+        return model
+
+    def __is_at_bottom(self):
+        scroll_bar = self.verticalScrollBar()
+        return scroll_bar.value() >= scroll_bar.maximum()
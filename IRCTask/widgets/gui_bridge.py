@@ -0,0 +1,24 @@
+import PyQt5.QtCore as QtCore
+
+from data_transfer.frame_bridge import FrameBridge
+
+
+class GuiBridge(QtCore.QObject):  # pragma: no cover
+    flush_requested = QtCore.pyqtSignal(float)
+
+    def __init__(self, max_flushes_per_second=
+                 FrameBridge.DEFAULT_MAX_FLUSHES_PER_SECOND):
+        super(GuiBridge, self).__init__()
+        self.frame_bridge = FrameBridge(self.flush_requested.emit,
+                                        max_flushes_per_second)
+        self.flush_requested.connect(self.__schedule_flush,
+                                     QtCore.Qt.QueuedConnection)
+
+    def connect_transmitter(self, transmitter, handler, keeps_last=False,
+                            keeps_all=False):
+        return self.frame_bridge.connect(transmitter, handler, keeps_last,
+                                         keeps_all)
+
+    def __schedule_flush(self, delay):
+        QtCore.QTimer.singleShot(round(delay * 1000),
+                                 self.frame_bridge.flush)
@@ -1,22 +1,19 @@
 from client.irc_client import IRCClient
 from widgets.channel_list_widget import ChannelsListWidget
-import queue
-import threading
+from widgets.chat_view_widget import ChatViewWidget
+from widgets.gui_bridge import GuiBridge
 import PyQt5.QtWidgets as QtWidgets
 from data_transfer.user import User
-import re
+from data_transfer.scrollback import Scrollback
 
 
 class MainWidget(QtWidgets.QWidget):  # pragma: no cover
 
-    NAMES_REGEX = r".*? (@|=) .*? :(.*?$)"
-    USERS_PREFIXES_WEIGHT = {
-        "~": 1,
-        "&": 2,
-        "@": 3,
-        "%": 4,
-        "+": 5
-    }
+    SCROLLBACK_MESSAGES_COUNT = 10000
+    SCROLLBACK_BYTES_COUNT = 4 * 1024 * 1024
+    CHANNEL_PREFIXES = ('#', '&', '+', '!')
+    PLAIN_PORT = 6667
+    TLS_PORT = 6697
     STATUS_TYPES_COLOR = {
         "N": "black",
         "E": "red",
@@ -26,39 +23,48 @@ class MainWidget(QtWidgets.QWidget):  # pragma: no cover
     def __init__(self):
         super().__init__()
         self.__irc_client = IRCClient()
+        self.__gui_bridge = GuiBridge()
 
-        self.__irc_client.chat_transmitter.connect_receiver(
-            self.receive_chat_text)
-
-        self.__irc_client.channel_names_transmitter.connect_receiver(
-            self.receive_names)
+        self.__gui_bridge.connect_transmitter(
+            self.__irc_client.chat_transmitter, self.receive_chat_texts)
 
-        self.__irc_client.status_update_handler.connect_receiver(
-            self.update_status_widget)
+        self.__gui_bridge.connect_transmitter(
+            self.__irc_client.roster_transmitter, self.receive_roster_changes,
+            keeps_all=True)
 
-        self.__irc_client.channel_data_handler.connect_receiver(
-            self.handle_channels_list)
+        self.__gui_bridge.connect_transmitter(
+            self.__irc_client.status_update_handler,
+            self.receive_statuses, keeps_last=True)
 
-        self.__irc_client.on_connected_to_server = self.on_connected_to_server
+        self.__gui_bridge.connect_transmitter(
+            self.__irc_client.channel_data_handler, self.handle_channels_list)
 
-        self.__channels_list_thread = threading.Thread(
-            target=self.__fill_channels_list)
-        self.__channels_info_queue = queue.Queue()
+        self.__gui_bridge.frame_bridge.add_handler(
+            'connected', lambda _: self.on_connected_to_server(),
+            keeps_last=True)
+        self.__irc_client.on_connected_to_server = \
+            lambda: self.__gui_bridge.frame_bridge.post('connected', None)
 
         self.connect_button = QtWidgets.QPushButton('Connect', self)
         self.join_button = QtWidgets.QPushButton('Join', self)
         self.send_button = QtWidgets.QPushButton('Send', self)
         self.search_button = QtWidgets.QPushButton('Search', self)
 
-        self.__chat_text_widget = QtWidgets.QTextEdit()
+        self.__scrollbacks = {}
+        self.__chat_view_widget = ChatViewWidget()
         self.__server_name_widget = QtWidgets.QLineEdit()
+        self.__server_port_widget = QtWidgets.QSpinBox()
+        self.__tls_widget = QtWidgets.QCheckBox('TLS')
+        self.__transport_security = None
         self.__channel_name_widget = QtWidgets.QLineEdit()
         self.__username_widget = QtWidgets.QLineEdit()
         self.__chat_input_widget = QtWidgets.QLineEdit()
+        self.__channels_filter_widget = QtWidgets.QLineEdit()
         self.__channels_list_widget = ChannelsListWidget()
         self.__channels_list_widget.set_joining_delegate(
             self.__irc_client.connect_to_channel)
         self.__users_list_widget = QtWidgets.QListWidget()
+        self.__users_list_widget.setUniformItemSizes(True)
         self.__status_widget = QtWidgets.QLabel()
 
         self.initialize_ui()
@@ -68,7 +74,7 @@ class MainWidget(QtWidgets.QWidget):  # pragma: no cover
 
         self.setLayout(grid)
 
-        self.__channels_list_widget.itemDoubleClicked.connect(
+        self.__channels_list_widget.doubleClicked.connect(
             self.__channels_list_widget.connect_to_channel
         )
 
@@ -78,11 +84,19 @@ class MainWidget(QtWidgets.QWidget):  # pragma: no cover
 
     def create_grid(self):
         server_name_label = QtWidgets.QLabel('Server')
+        server_port_label = QtWidgets.QLabel('Port')
         channel_join_label = QtWidgets.QLabel('Join by name:')
         username_label = QtWidgets.QLabel('Username')
         channels_list_label = QtWidgets.QLabel('Channels:')
         users_list_label = QtWidgets.QLabel('Users')
 
+        self.__server_port_widget.setRange(1, 65535)
+        self.__server_port_widget.setValue(MainWidget.TLS_PORT)
+        self.__tls_widget.setChecked(True)
+        self.__tls_widget.setToolTip('Verify the server certificate and '
+                                     'encrypt the connection')
+        self.__tls_widget.toggled.connect(self.switch_default_port)
+
         self.connect_button.setToolTip('Establish connection')
         self.connect_button.clicked.connect(self.connect_to_server)
 
@@ -98,14 +112,20 @@ class MainWidget(QtWidgets.QWidget):  # pragma: no cover
         self.search_button.setDisabled(True)
         self.search_button.clicked.connect(self.update_channels_list)
 
-        self.__chat_text_widget.setMinimumSize(400, 500)
-        self.__chat_text_widget.setReadOnly(True)
+        self.__channels_filter_widget.setPlaceholderText('Filter channels')
+        self.__channels_filter_widget.textChanged.connect(
+            self.filter_channels_list)
+
+        self.__chat_view_widget.setMinimumSize(400, 500)
 
         grid = QtWidgets.QGridLayout()
         grid.setSpacing(7)
 
         grid.addWidget(server_name_label, 1, 0)
         grid.addWidget(self.__server_name_widget, 1, 1)
+        grid.addWidget(server_port_label, 2, 0)
+        grid.addWidget(self.__server_port_widget, 2, 1)
+        grid.addWidget(self.__tls_widget, 2, 2)
 
         grid.addWidget(channel_join_label, 6, 0)
         grid.addWidget(self.join_button, 7, 0)
@@ -117,9 +137,10 @@ class MainWidget(QtWidgets.QWidget):  # pragma: no cover
 
         grid.addWidget(channels_list_label, 5, 0)
         grid.addWidget(self.search_button, 5, 1)
-        grid.addWidget(self.__channels_list_widget, 6, 1)
+        grid.addWidget(self.__channels_filter_widget, 5, 2)
+        grid.addWidget(self.__channels_list_widget, 6, 1, 1, 2)
 
-        grid.addWidget(self.__chat_text_widget, 1, 4, 6, 2)
+        grid.addWidget(self.__chat_view_widget, 1, 4, 6, 2)
         grid.addWidget(self.send_button, 7, 4, 1, 1)
         grid.addWidget(self.__chat_input_widget, 7, 5, 1, 1)
 
@@ -130,65 +151,75 @@ class MainWidget(QtWidgets.QWidget):  # pragma: no cover
 
         return grid
 
-    def receive_chat_text(self, text):
-        if text.startswith(":"):
-            name = text.split('!', 1)[0][1:]
-            split_message = text.split('PRIVMSG', 1)
-            message = split_message[1].split(':', 1)[1]
-        else:
-            name = self.__irc_client.connection_data.user.username
-            message_start_index = text.find(":")
-            message = text[message_start_index + 1:]
-        self.__chat_text_widget.append('{0}: {1}'.format(name, message))
-
-    def receive_names(self, text):
-        names_match = re.match(MainWidget.NAMES_REGEX, text)
-        if names_match is None:
-            print("No names found!")
-            return
-
-        names = names_match.group(2)
-        names_list = names.split()
-        names_list = sorted(names_list,
-                            key=lambda username:
-                            self.prefixes_compare(username))
-        for name in names_list:
-            list_item = QtWidgets.QListWidgetItem()
-            list_item.setText(name)
-            self.__users_list_widget.addItem(list_item)
-        self.__irc_client.is_searching_for_names = False
+    def receive_chat_texts(self, messages):
+        channels_messages = {}
+        for message in messages:
+            if message.prefix is not None:
+                name = message.nick
+            else:
+                name = self.__irc_client.connection_data.user.username
+            channel_name = message.target
+            if message.prefix is not None and \
+                    not channel_name.startswith(self.CHANNEL_PREFIXES):
+                channel_name = message.nick
+            channels_messages.setdefault(channel_name.lower(), []).append(
+                (name, message.trailing))
+        for channel_name, channel_messages in channels_messages.items():
+            self.__chat_view_widget.append_messages(
+                self.__get_scrollback(channel_name), channel_messages)
+        self.__chat_view_widget.show_scrollback(
+            self.__get_scrollback(self.__irc_client.connection_data.channel))
+
+    def __get_scrollback(self, channel_name):
+        scrollback = self.__scrollbacks.get(channel_name.lower())
+        if scrollback is None:
+            scrollback = Scrollback(self.SCROLLBACK_MESSAGES_COUNT,
+                                    self.SCROLLBACK_BYTES_COUNT)
+            self.__scrollbacks[channel_name.lower()] = scrollback
+        return scrollback
+
+    def receive_roster_changes(self, roster_changes):
+        current_channel_name = \
+            self.__irc_client.connection_data.channel.lower()
+        changes = [change for channel_name, change in roster_changes
+                   if channel_name.lower() == current_channel_name]
+        resets_indexes = [index for index, change in enumerate(changes)
+                          if change[0] == 'reset']
+        if resets_indexes:
+            changes = changes[resets_indexes[-1]:]
+        self.__users_list_widget.setUpdatesEnabled(False)
+        for change in changes:
+            self.receive_roster_change(change)
+        self.__users_list_widget.setUpdatesEnabled(True)
+
+    def receive_roster_change(self, change):
+        change_type = change[0]
+        if change_type == 'reset':
+            self.__users_list_widget.clear()
+            self.__users_list_widget.addItems(change[1])
+        elif change_type == 'insert':
+            self.__users_list_widget.insertItem(change[1], change[2])
+        elif change_type == 'remove':
+            self.__users_list_widget.takeItem(change[1])
+        elif change_type == 'move':
+            self.__users_list_widget.takeItem(change[1])
+            self.__users_list_widget.insertItem(change[2], change[3])
 
     def update_channels_list(self):
-        if self.__channels_list_thread.is_alive():
-            self.__channels_list_thread.join()
         self.__channels_list_widget.clear()
-        self.__channels_info_queue = queue.Queue()
+        self.__channels_filter_widget.clear()
         self.__irc_client.update_channels_list()
-        self.__channels_list_thread.start()
 
-    def prefixes_compare(self, username):
-        if username[0] in self.USERS_PREFIXES_WEIGHT:
-            return self.USERS_PREFIXES_WEIGHT[username[0]]
-        else:
-            return len(self.USERS_PREFIXES_WEIGHT) + 1
-
-    def handle_channels_list(self, channel_info):
-        if self.__irc_client.is_searching_for_channels:
-            self.__channels_info_queue.put(channel_info)
-        elif self.__channels_list_thread.is_alive():
-            self.__channels_list_thread.join()
-
-    def __fill_channels_list(self):
-        while True:
-            if not self.__channels_info_queue.empty():
-                channel_info = self.__channels_info_queue.get()
-                list_item = QtWidgets.QListWidgetItem()
-                list_item.setData(256, channel_info)
-                list_item.setText(channel_info.full_name)
-                list_item.setToolTip("{0}\nUsers: {1}"
-                                     .format(channel_info.name,
-                                             channel_info.users_count))
-                self.__channels_list_widget.addItem(list_item)
+    def filter_channels_list(self, text):
+        directory = self.__irc_client.get_channel_directory()
+        self.__channels_list_widget.set_channels(
+            directory.filter(name_part=text))
+
+    def handle_channels_list(self, channels_infos):
+        self.__channels_list_widget.add_channels(channels_infos)
+
+    def receive_statuses(self, texts):
+        self.update_status_widget(texts[-1])
 
     def update_status_widget(self, text):
         status_data = text.split(" ", 1)
@@ -207,11 +238,23 @@ class MainWidget(QtWidgets.QWidget):  # pragma: no cover
         self.__chat_input_widget.clear()
         self.__irc_client.send_user_message(message)
 
+    def switch_default_port(self, uses_tls):
+        previous_port, port = MainWidget.PLAIN_PORT, MainWidget.TLS_PORT
+        if not uses_tls:
+            previous_port, port = port, previous_port
+        if self.__server_port_widget.value() == previous_port:
+            self.__server_port_widget.setValue(port)
+
     def connect_to_server(self):
         self.clear_widgets()
         self.__irc_client.set_user(User(self.__username_widget.text()))
+        if self.__tls_widget.isChecked():
+            self.__transport_security = self.__irc_client.enable_tls(
+                self.__transport_security)
+        else:
+            self.__irc_client.disable_tls()
         self.__irc_client.connect_to_server(self.__server_name_widget.text(),
-                                            6667)
+                                            self.__server_port_widget.value())
 
     def connect_to_channel(self):
         self.__irc_client.connect_to_channel(self.__channel_name_widget.text())
@@ -219,7 +262,7 @@ class MainWidget(QtWidgets.QWidget):  # pragma: no cover
     def clear_widgets(self):
         self.__users_list_widget.clear()
         self.__channels_list_widget.clear()
-        self.__chat_text_widget.clear()
+        self.__chat_view_widget.clear()
 
     def closeEvent(self, event):
         reply = QtWidgets.QMessageBox.question(self,
@@ -229,7 +272,7 @@ class MainWidget(QtWidgets.QWidget):  # pragma: no cover
                                                QtWidgets.QMessageBox.No,
                                                QtWidgets.QMessageBox.No)
         if reply == QtWidgets.QMessageBox.Yes:
-            self.__irc_client.disconnect()
+            self.__irc_client.close()
             event.accept()
         else:
             event.ignore()